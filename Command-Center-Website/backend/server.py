@@ -0,0 +1,381 @@
+"""
+FinAgent Command Center backend.
+
+WebSocket protocol (ws://localhost:8000/ws), as expected by the frontend:
+  client -> server : a task command (plain text)
+                     HITL:RESUME (the human finished a sensitive step)
+  server -> client : BROADCAST_IMAGE:<base64 jpeg>
+                     HITL_STATUS:RUNNING | PAUSED | RESUMED | IDLE
+                     STREAM:START | STREAM:STOP
+                     anything else is shown as an agent log line
+
+Commands run under finagent's BASE_RULES, with finagent-2's HITL gate
+(dom_watch + approvals) before every step: on a password, PIN, OTP or
+confirm page the agent pauses until a viewer sends HITL:RESUME after
+doing that step by hand in the agent's (headed) browser.
+
+Live frames come from one CDP screencast on the agent's browser. Chrome
+encodes each frame once as JPEG; we build the message string once and
+fan it out to every viewer. Each viewer has its own frame-rate cap and
+only ever gets the newest frame, so a slow client drops stale frames
+instead of building a backlog. Viewers never trigger screenshots.
+
+    python server.py            # or: uvicorn server:app --port 8000
+    ws://localhost:8000/ws?fps=5
+"""
+import asyncio
+import inspect
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Deque, Optional, Set
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import uvicorn
+
+from browser_use import Agent, Browser, ChatBrowserUse
+
+# The gate and the agent rules come from the two agent apps next door
+_ROOT = Path(__file__).resolve().parents[2]
+sys.path[:0] = [str(_ROOT / "finagent-2"), str(_ROOT / "finagent")]
+
+from approvals import approvals  # noqa: E402  (finagent-2)
+from dom_watch import SensitivityWatcher  # noqa: E402  (finagent-2)
+from prompt_templates import BASE_RULES  # noqa: E402  (finagent)
+
+load_dotenv()
+
+START_URL = os.getenv("COMMAND_CENTER_START_URL", "http://localhost:5173/login")
+DEFAULT_FPS = float(os.getenv("STREAM_FPS", "8"))
+MAX_FPS = 30.0
+JPEG_QUALITY = int(os.getenv("STREAM_JPEG_QUALITY", "60"))
+MAX_WIDTH = int(os.getenv("STREAM_MAX_WIDTH", "1280"))
+MAX_HEIGHT = int(os.getenv("STREAM_MAX_HEIGHT", "800"))
+
+# =========================
+# Fan-out hub
+# =========================
+class Viewer:
+    """One connected client: text messages in order, frames newest-only."""
+
+    def __init__(self, ws: WebSocket, fps: float):
+        self.ws = ws
+        self.min_interval = 1.0 / max(0.5, min(fps, MAX_FPS))
+        self.messages: Deque[str] = deque()
+        self.wake = asyncio.Event()
+        self.sent_version = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    def push_text(self, msg: str):
+        self.messages.append(msg)
+        self.wake.set()
+
+    async def _flush_text(self):
+        while self.messages:
+            await self.ws.send_text(self.messages.popleft())
+
+    async def run(self, hub: "Hub"):
+        last_frame_at = 0.0
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            await self._flush_text()
+
+            if hub.frame_version <= self.sent_version:
+                continue
+
+            # Throttle: newer frames arriving meanwhile simply replace the
+            # pending one, which is how stale frames get dropped.
+            delay = self.min_interval - (time.monotonic() - last_frame_at)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                await self._flush_text()
+
+            version, message = hub.frame_version, hub.frame_message
+            if version <= self.sent_version or message is None:
+                continue
+            self.frames_dropped += version - self.sent_version - 1
+            await self.ws.send_text(message)
+            self.sent_version = version
+            self.frames_sent += 1
+            last_frame_at = time.monotonic()
+
+
+class Hub:
+    def __init__(self):
+        self.viewers: Set[Viewer] = set()
+        self.frame_version = 0
+        self.frame_message: Optional[str] = None
+
+    def add(self, viewer: Viewer):
+        self.viewers.add(viewer)
+        if self.frame_message is not None:
+            viewer.wake.set()
+
+    def remove(self, viewer: Viewer):
+        self.viewers.discard(viewer)
+
+    def publish_text(self, msg: str):
+        for v in self.viewers:
+            v.push_text(msg)
+
+    def publish_frame(self, b64_jpeg: str):
+        # Built once, shared by every viewer
+        self.frame_message = "BROADCAST_IMAGE:" + b64_jpeg
+        self.frame_version += 1
+        for v in self.viewers:
+            v.wake.set()
+
+    def clear_frame(self):
+        self.frame_message = None
+
+
+hub = Hub()
+
+# =========================
+# CDP screencast
+# =========================
+class Screencast:
+    """Page.startScreencast on the browser's focused tab, frames -> hub."""
+
+    def __init__(self, hub: Hub):
+        self.hub = hub
+        self.client = None
+        self.session_id: Optional[str] = None
+        self._registered = set()
+
+    async def follow(self, browser: Browser):
+        """Start streaming, or move the stream if the agent switched tabs."""
+        cdp = await browser.get_or_create_cdp_session()
+        if cdp.session_id == self.session_id:
+            return
+        await self.stop()
+
+        self.client = cdp.cdp_client
+        self.session_id = cdp.session_id
+        if id(self.client) not in self._registered:
+            # cdp_use keeps one handler per event: keep calling the one
+            # browser_use registered (its recording watchdog) as well
+            handlers = getattr(getattr(self.client, "_event_registry", None), "_handlers", {})
+            previous = handlers.get("Page.screencastFrame")
+            self.client.register.Page.screencastFrame(lambda event, session_id=None: self._on_frame(event, session_id, previous))
+            self._registered.add(id(self.client))
+
+        await self.client.send.Page.startScreencast(
+            params={
+                "format": "jpeg",
+                "quality": JPEG_QUALITY,
+                "maxWidth": MAX_WIDTH,
+                "maxHeight": MAX_HEIGHT,
+            },
+            session_id=self.session_id,
+        )
+
+    async def stop(self):
+        if self.client is None:
+            return
+        try:
+            await self.client.send.Page.stopScreencast(session_id=self.session_id)
+        except Exception:
+            pass
+        self.client = None
+        self.session_id = None
+
+    def _on_frame(self, event, session_id=None, previous=None):
+        if previous is not None:
+            result = previous(event, session_id)
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result)
+        if session_id != self.session_id:
+            return
+        self.hub.publish_frame(event["data"])
+        # Chrome sends the next frame only after this ack (built-in backpressure)
+        asyncio.get_running_loop().create_task(
+            self.client.send.Page.screencastFrameAck(
+                params={"sessionId": event["sessionId"]},
+                session_id=session_id,
+            )
+        )
+
+
+# =========================
+# HITL gate
+# =========================
+class HitlGate:
+    """
+    finagent-2's on_step_start gate for one dashboard run: check the page
+    through the DOM index, and on a sensitive page that isn't approved
+    yet pause the agent until a viewer resumes.
+    """
+
+    def __init__(self, hub: Hub):
+        self.hub = hub
+        self.run_id = uuid.uuid4().hex[:12]
+        self.watcher = SensitivityWatcher()
+        self.resume_event = asyncio.Event()
+        self.paused = False
+
+    async def on_step_start(self, agent: Agent):
+        cdp = await agent.browser_session.get_or_create_cdp_session()
+        await self.watcher.attach(cdp)
+        await self.watcher.track(agent.browser_session)
+        sensitive, reason, sig = await self.watcher.check()
+        if not sensitive:
+            approvals.left(self.run_id)
+            return
+
+        url = self.watcher.matched_url or await agent.browser_session.get_current_page_url()
+        session_id = str(getattr(agent.browser_session, "id", self.run_id))
+        approval = (self.run_id, session_id, url, self.watcher.fingerprint(sig), sig, self.watcher.scope(sig))
+        if approvals.is_approved(*approval):
+            return
+
+        self.paused = True
+        self.hub.publish_text("HITL_STATUS:PAUSED")
+        self.hub.publish_text(f"Human needed ({reason}) at {url}: do this step in the browser, then press Resume.")
+        agent.pause()
+        await self.resume_event.wait()
+        self.resume_event.clear()
+        approvals.approve(*approval)
+        self.paused = False
+        self.hub.publish_text("HITL_STATUS:RESUMED")
+        agent.resume()
+
+    def resume(self) -> bool:
+        if not self.paused:
+            return False
+        self.resume_event.set()
+        return True
+
+    def close(self):
+        approvals.end_run(self.run_id)
+        self.watcher.close()
+        self.paused = False
+
+
+# =========================
+# Agent runner
+# =========================
+class AgentRunner:
+    def __init__(self, hub: Hub):
+        self.hub = hub
+        self.task: Optional[asyncio.Task] = None
+        self.gate: Optional[HitlGate] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    @property
+    def paused(self) -> bool:
+        return self.running and self.gate is not None and self.gate.paused
+
+    def resume(self) -> bool:
+        return self.running and self.gate is not None and self.gate.resume()
+
+    def start(self, command: str):
+        self.task = asyncio.create_task(self._run(command))
+
+    async def _run(self, command: str):
+        screencast = Screencast(self.hub)
+        gate = self.gate = HitlGate(self.hub)
+        browser = Browser(headless=os.getenv("HEADLESS", "0") == "1", keep_alive=True)
+        self.hub.publish_text("HITL_STATUS:RUNNING")
+        self.hub.publish_text(f"Starting task: {command}")
+
+        try:
+            await browser.start()
+            page = await browser.must_get_current_page()
+            await page.goto(START_URL)
+
+            await screencast.follow(browser)
+            self.hub.publish_text("STREAM:START")
+
+            async def on_step_end(agent: Agent):
+                self.hub.publish_text(f"Step {agent.state.n_steps} done")
+                await screencast.follow(browser)
+
+            agent = Agent(
+                task=f"{BASE_RULES.strip()}\n\nTask:\n{command}",
+                browser=browser,
+                llm=ChatBrowserUse(),
+                directly_open_url=False,
+            )
+            history = await agent.run(on_step_start=gate.on_step_start, on_step_end=on_step_end, max_steps=25)
+            self.hub.publish_text(f"Finished: {history.final_result() or 'no result'}")
+        except Exception as e:
+            self.hub.publish_text(f"Error: {e}")
+        finally:
+            gate.close()
+            await screencast.stop()
+            self.hub.clear_frame()
+            self.hub.publish_text("STREAM:STOP")
+            self.hub.publish_text("HITL_STATUS:IDLE")
+            try:
+                await browser.kill()
+            except Exception:
+                pass
+
+
+runner = AgentRunner(hub)
+
+# =========================
+# FastAPI
+# =========================
+app = FastAPI()
+
+
+@app.websocket("/ws")
+async def ws_endpoint(ws: WebSocket):
+    await ws.accept()
+    fps = float(ws.query_params.get("fps", DEFAULT_FPS))
+    viewer = Viewer(ws, fps)
+    hub.add(viewer)
+    sender = asyncio.create_task(viewer.run(hub))
+
+    viewer.push_text("Connected to FinAgent Command Center")
+    viewer.push_text("HITL_STATUS:RUNNING" if runner.running else "HITL_STATUS:IDLE")
+    if runner.paused:
+        viewer.push_text("HITL_STATUS:PAUSED")
+
+    try:
+        while True:
+            command = (await ws.receive_text()).strip()
+            if not command:
+                continue
+            if command == "HITL:RESUME":
+                if not runner.resume():
+                    viewer.push_text("Nothing is waiting for a human.")
+                continue
+            if runner.running:
+                viewer.push_text("Agent is busy, wait for the current task to finish.")
+                continue
+            runner.start(command)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.remove(viewer)
+        sender.cancel()
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "viewers": len(hub.viewers),
+        "frame_version": hub.frame_version,
+        "running": runner.running,
+        "paused": runner.paused,
+        "per_viewer": [
+            {"fps_cap": round(1 / v.min_interval, 2), "sent": v.frames_sent, "dropped": v.frames_dropped}
+            for v in hub.viewers
+        ],
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=8000)
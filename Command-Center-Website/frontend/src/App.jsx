@@ -9,6 +9,7 @@ const App = () => {
   const [isConnected, setIsConnected] = useState(false)
   const [screenImage, setScreenImage] = useState(null)
   const [isRunning, setIsRunning] = useState(false)
+  const [isPaused, setIsPaused] = useState(false)
   const logsEndRef = useRef(null)
   const ws = useRef(null)
 
@@ -25,6 +26,7 @@ const App = () => {
       socket.onclose = () => {
         setIsConnected(false)
         setIsRunning(false)
+        setIsPaused(false)
         // Removed the repetitive "Disconnected" log here to reduce noise.
         // The top-right status indicator is enough.
         setTimeout(connect, 3000)
@@ -39,8 +41,9 @@ const App = () => {
         else if (data.startsWith('HITL_STATUS:')) {
           const status = data.split(':')[1]
           if (status === 'RUNNING') setIsRunning(true)
-          if (status === 'IDLE') setIsRunning(false)
-          if (status === 'PAUSED') setIsRunning(true)
+          if (status === 'IDLE') { setIsRunning(false); setIsPaused(false) }
+          if (status === 'PAUSED') { setIsRunning(true); setIsPaused(true) }
+          if (status === 'RESUMED') setIsPaused(false)
         }
         else if (data === 'STREAM:START') {
           // Screen stays ready
@@ -81,6 +84,12 @@ const App = () => {
     setInput('')
   }
 
+  // The human finished the sensitive step in the agent's browser window
+  const handleResume = () => {
+    if (!isConnected || !isPaused) return;
+    ws.current.send('HITL:RESUME')
+  }
+
   const handleKeyDown = (e) => {
     if (e.key === 'Enter' && !e.shiftKey) {
       e.preventDefault()
@@ -184,12 +193,22 @@ const App = () => {
             value={input}
             onChange={e => setInput(e.target.value)}
             onKeyDown={handleKeyDown}
-            placeholder={isRunning ? "Agent is working..." : "Type your command..."}
+            placeholder={isPaused ? "Waiting for you: finish the step in the browser, then Resume" : isRunning ? "Agent is working..." : "Type your command..."}
             disabled={!isConnected || isRunning}
             className="flex-1 bg-transparent border-none focus:ring-0 text-zinc-800 placeholder:text-zinc-400 text-sm font-medium py-2 px-2 disabled:opacity-50 outline-none"
             autoFocus
           />
 
+          {isPaused && (
+            <button
+              onClick={handleResume}
+              className="bg-orange-600 text-white px-4 py-2 rounded-lg hover:bg-orange-500 transition-colors flex items-center gap-2 text-xs font-bold uppercase tracking-wide"
+            >
+              Resume
+              <Play className="w-3 h-3 fill-current" />
+            </button>
+          )}
+
           <button
             onClick={handleSend}
             disabled={!isConnected || isRunning || !input.trim()}
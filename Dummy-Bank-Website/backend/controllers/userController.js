@@ -23,6 +23,13 @@ const searchUsers = async (req, res) => {
   res.json(users);
 };
 
+// @desc    All other users (name + UPI id), for clients that keep a local directory
+// @route   GET /api/users/directory
+const getDirectory = async (req, res) => {
+  const users = await User.find({ _id: { $ne: req.user.id } }).select('name upiId');
+  res.json(users);
+};
+
 // @desc    Add a contact
 // @route   POST /api/users/add-contact
 const addContact = async (req, res) => {
@@ -49,6 +56,7 @@ const getContacts = async (req, res) => {
 
 module.exports = {
   searchUsers,
+  getDirectory,
   addContact,
   getContacts
 };
@@ -1,9 +1,10 @@
 const express = require('express');
 const router = express.Router();
-const { searchUsers, addContact, getContacts } = require('../controllers/userController');
+const { searchUsers, getDirectory, addContact, getContacts } = require('../controllers/userController');
 const { protect } = require('../middleware/authMiddleware');
 
 router.get('/search', protect, searchUsers);
+router.get('/directory', protect, getDirectory);
 router.post('/add-contact', protect, addContact);
 router.get('/contacts', protect, getContacts);
 
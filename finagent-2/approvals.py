@@ -0,0 +1,103 @@
+"""
+Human approvals for sensitive pages.
+
+When a human resumes a paused run, the page they approved is remembered
+under (scope, URL pattern, DOM fingerprint, rule key) so the gate
+doesn't pause again for the same thing. The rule's "scope" (see
+sensitive_rules.json) decides how long an approval lasts:
+
+  once     (PIN, OTP, confirm)  Covers one continuous visit of one run.
+           The first step that lands anywhere else ends it, so coming
+           back to a PIN screen (a second payment) pauses again.
+  session  (password entry)     Covers the browser session, across runs
+           and across leaving/returning, until the TTL runs out.
+
+The scope passed in is the page's (SensitivityWatcher.scope), not the
+rule's: a type="password" PIN box, or a login field on a page that also
+hits a once rule, is "once" even though the password rule is "session".
+
+Both lookups are a single dict access. Session approvals live in an LRU
+bounded by max_entries; "once" approvals hold one slot per active run.
+"""
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+Key = Tuple[str, str, str, str]
+
+_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-f-]{36})$", re.IGNORECASE)
+
+
+def url_pattern(url: str) -> str:
+    """Host + path with ids collapsed; query and fragment dropped."""
+    parts = urlsplit(url or "")
+    path = "/".join(":id" if _ID_SEGMENT.match(seg) else seg for seg in parts.path.split("/"))
+    return f"{parts.netloc}{path or '/'}"
+
+
+class ApprovalCache:
+    def __init__(
+        self,
+        ttl: float = float(os.getenv("HITL_APPROVAL_TTL", "900")),
+        max_entries: int = int(os.getenv("HITL_APPROVAL_MAX", "4096")),
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # session-scoped: key -> expires_at, least recently used first
+        self._session: "OrderedDict[Key, float]" = OrderedDict()
+        # single-use: run_id -> (key, expires_at) for the visit in progress
+        self._visits: Dict[str, Tuple[Key, float]] = {}
+
+    @staticmethod
+    def key(scope_id: str, url: str, fingerprint: str, rule_key: str) -> Key:
+        return (scope_id, url_pattern(url), fingerprint, rule_key)
+
+    def is_approved(self, run_id: str, session_id: str, url: str, fingerprint: str, rule_key: str, scope: str) -> bool:
+        now = time.time()
+
+        visit = self._visits.get(run_id)
+        if visit is not None:
+            key, expires = visit
+            if key == self.key(run_id, url, fingerprint, rule_key) and expires >= now:
+                return True
+            # Somewhere else now: the single-use approval is spent
+            del self._visits[run_id]
+
+        if scope != "session":
+            return False
+        key = self.key(session_id, url, fingerprint, rule_key)
+        expires = self._session.get(key)
+        if expires is None:
+            return False
+        if expires < now:
+            del self._session[key]
+            return False
+        self._session.move_to_end(key)
+        return True
+
+    def approve(self, run_id: str, session_id: str, url: str, fingerprint: str, rule_key: str, scope: str):
+        expires = time.time() + self.ttl
+        if scope == "session":
+            key = self.key(session_id, url, fingerprint, rule_key)
+            self._session[key] = expires
+            self._session.move_to_end(key)
+            while len(self._session) > self.max_entries:
+                self._session.popitem(last=False)
+        else:
+            self._visits[run_id] = (self.key(run_id, url, fingerprint, rule_key), expires)
+
+    def left(self, run_id: str):
+        """The run is on a non-sensitive page: any single-use approval is spent."""
+        self._visits.pop(run_id, None)
+
+    def end_run(self, run_id: str):
+        self._visits.pop(run_id, None)
+
+    def stats(self) -> dict:
+        return {"session": len(self._session), "visits": len(self._visits)}
+
+
+approvals = ApprovalCache()
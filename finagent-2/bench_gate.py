@@ -0,0 +1,149 @@
+"""
+Offline benchmark of the on_step_start HITL gate.
+
+    python bench_gate.py                 # 50 runs over dashboard -> transfer -> PIN
+    python bench_gate.py -n 200 --encoder pillow
+
+Serves the static Dummy Bank snapshot (../finagent/mock_bank, or
+HITL_MOCK_BANK) locally, opens it in one headless browser and calls the
+real make_step_hook() gate once per page, as the agent would before each
+step. Each run is a fresh RunState, so the first-step full scan is
+included; the PIN page pauses and is resumed immediately.
+
+Reports p50/p95/p99 per gate sub-operation (tracing spans), gate calls
+per second, and peak RSS of this process and the browser.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+MOCK_DIR = Path(os.getenv("HITL_MOCK_BANK", Path(__file__).resolve().parent.parent / "finagent" / "mock_bank"))
+PAGES = ["index.html", "transfer.html", "confirmation.html"]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class GateAgent:
+    """The slice of Agent the gate touches."""
+
+    def __init__(self, browser):
+        self.browser_session = browser
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+
+def pct(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def browser_rss() -> int:
+    try:
+        import psutil
+    except ImportError:
+        return 0
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+async def bench(args, base: str):
+    from browser_use import Browser
+    from runs import registry
+    from test import make_step_hook
+    from tracing import tracer
+
+    browser = Browser(headless=not args.headed, keep_alive=True)
+    await browser.start()
+    agent = GateAgent(browser)
+    page = await browser.must_get_current_page()
+
+    calls, samples, browser_peak = [], {}, 0
+    t_start = time.perf_counter()
+    try:
+        for _ in range(args.runs):
+            run = registry.create()
+            hook = make_step_hook(run)
+
+            async def human():
+                while not run.paused:
+                    await asyncio.sleep(0.001)
+                run.resume_event.set()
+
+            for name in PAGES:
+                await page.goto(f"{base}/{name}")
+                resolver = asyncio.create_task(human())
+                t0 = time.perf_counter()
+                await hook(agent)
+                calls.append(time.perf_counter() - t0)
+                resolver.cancel()
+
+            registry.finish(run.run_id)
+            for span, seconds in (tracer.run_summary(run.run_id) or {"spans": {}})["spans"].items():
+                samples.setdefault(span, []).append(seconds)
+            browser_peak = max(browser_peak, browser_rss())
+    finally:
+        await browser.kill()
+
+    elapsed = time.perf_counter() - t_start
+    print(f"\n{args.runs} runs x {len(PAGES)} pages, {len(calls)} gate calls")
+    print(f"{'span':>18} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [("gate call", calls)] + sorted(samples.items())
+    for name, values in rows:
+        values = sorted(values)
+        print(
+            f"{name:>18} {len(values):>5} "
+            f"{pct(values, 50) * 1000:>9.2f} {pct(values, 95) * 1000:>9.2f} {pct(values, 99) * 1000:>9.2f}"
+        )
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak if sys.platform == "darwin" else peak * 1024
+    print(f"\ngate calls/sec    {len(calls) / sum(calls):.1f}  (wall incl. navigation {elapsed:.2f}s)")
+    print(f"peak RSS python   {peak / 2**20:.1f} MiB")
+    print(f"peak RSS browser  {browser_peak / 2**20:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the on_step_start gate.")
+    parser.add_argument("-n", "--runs", type=int, default=50)
+    parser.add_argument("--encoder", choices=["browser", "pillow"], help="screenshot encoder (HITL_SHOT_ENCODER)")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--trace", action="store_true", help="also write spans to traces.jsonl")
+    args = parser.parse_args()
+
+    if args.encoder:
+        os.environ["HITL_SHOT_ENCODER"] = args.encoder
+    if not args.trace:
+        os.environ["HITL_TRACE_FILE"] = ""
+
+    handler = functools.partial(_QuietHandler, directory=str(MOCK_DIR))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(bench(args, f"http://127.0.0.1:{server.server_address[1]}"))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: RuleEngine vs. the old chained-`in` looks_sensitive, and
+a single-pass alternation regex over the same needles for comparison.
+
+    python bench_rules.py            # 10 KB, 1 MB, 10 MB pages
+    python bench_rules.py --repeat 20
+"""
+import argparse
+import random
+import re
+import time
+from typing import Tuple
+
+from rules import default_engine
+
+CHUNK = 64 * 1024
+
+
+def legacy_looks_sensitive(url: str, page_html: str) -> Tuple[bool, str, str]:
+    # Previous implementation, kept here only for comparison.
+    h = (page_html or "").lower()
+    if 'type="password"' in h:
+        return True, "PASSWORD_ENTRY", "password"
+    if "one-time-code" in h or "enter otp" in h:
+        return True, "OTP_ENTRY", "otp"
+    if "upi pin" in h or "cvv" in h:
+        return True, "PAYMENT_SECRET", "pin"
+    if "confirm payment" in h or "pay now" in h or "place order" in h:
+        return True, "PAYMENT_CONFIRM", "confirm"
+    return False, "", ""
+
+
+def make_page(size: int, sensitive_tail: str = "") -> str:
+    rnd = random.Random(size)
+    words = ["balance", "account", "transfer", "history", "Hello", "Settings", "recharge", "gold"]
+    parts, n = ["<html><body>"], 12
+    while n < size:
+        w = rnd.choice(words)
+        frag = f'<div class="row"><span data-id="{rnd.randint(0, 99999)}">{w}</span></div>'
+        parts.append(frag)
+        n += len(frag)
+    parts.append(sensitive_tail + "</body></html>")
+    return "".join(parts)
+
+
+def chunks(text: str):
+    for i in range(0, len(text), CHUNK):
+        yield text[i:i + CHUNK]
+
+
+def bench(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = default_engine()
+    needles = sorted((n for _, n in engine._needles), key=len, reverse=True)
+    one_pass = re.compile("|".join(re.escape(n) for n in needles))
+    cases = [
+        ("10KB", 10 * 1024),
+        ("1MB", 1024 * 1024),
+        ("10MB", 10 * 1024 * 1024),
+    ]
+    tails = [
+        ("clean", ""),
+        ("confirm", "<button>Pay Now</button>"),
+    ]
+
+    print(f"{'page':>6} {'case':>8} {'legacy ms':>10} {'engine ms':>10} {'chunked ms':>11} {'regex ms':>9}")
+    for label, size in cases:
+        for tail_label, tail in tails:
+            page = make_page(size, tail)
+            assert legacy_looks_sensitive("", page) == engine.match(page) == engine.scan(chunks(page))
+
+            legacy = bench(lambda: legacy_looks_sensitive("", page), args.repeat)
+            single = bench(lambda: engine.match(page), args.repeat)
+            chunked = bench(lambda: engine.scan(chunks(page)), args.repeat)
+            regex = bench(lambda: one_pass.search(page.lower()), args.repeat)
+            print(f"{label:>6} {tail_label:>8} {legacy:>10.2f} {single:>10.2f} {chunked:>11.2f} {regex:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
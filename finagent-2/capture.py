@@ -0,0 +1,109 @@
+"""
+Screenshot capture pipeline for paused pages.
+
+Everything stays in memory (CDP base64 -> bytes, no temp files) and all
+CPU work runs in a small thread pool so the event loop keeps serving
+other runs.
+
+Two encoders:
+  "browser" (default)  Chrome downsizes via the capture clip scale and
+                       encodes JPEG/WebP itself; we only base64-decode.
+  "pillow"             Capture a lossless PNG, then resize + encode with
+                       Pillow in the thread pool (finer control, more CPU).
+
+Defaults (1024px wide, JPEG q=60) keep a typical banking page well under
+100 KB. Tune with HITL_SHOT_MAX_WIDTH / HITL_SHOT_FORMAT / HITL_SHOT_QUALITY
+/ HITL_SHOT_ENCODER.
+"""
+import asyncio
+import base64
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+MIME = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="capture")
+
+
+class CaptureConfig:
+    def __init__(
+        self,
+        max_width: int = int(os.getenv("HITL_SHOT_MAX_WIDTH", "1024")),
+        fmt: str = os.getenv("HITL_SHOT_FORMAT", "jpeg"),
+        quality: int = int(os.getenv("HITL_SHOT_QUALITY", "60")),
+        encoder: str = os.getenv("HITL_SHOT_ENCODER", "browser"),
+    ):
+        if fmt not in MIME:
+            raise ValueError(f"Unsupported screenshot format: {fmt}")
+        self.max_width = max_width
+        self.fmt = fmt
+        self.quality = quality
+        self.encoder = encoder
+
+    @property
+    def mime(self) -> str:
+        return MIME[self.fmt]
+
+
+default_config = CaptureConfig()
+
+
+def _pillow_encode(png: bytes, config: CaptureConfig) -> bytes:
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(png))
+    if img.width > config.max_width:
+        height = round(img.height * config.max_width / img.width)
+        img = img.resize((config.max_width, height), Image.BILINEAR)
+    if config.fmt == "jpeg" and img.mode != "RGB":
+        img = img.convert("RGB")
+
+    out = io.BytesIO()
+    img.save(out, format=config.fmt.upper(), quality=config.quality)
+    return out.getvalue()
+
+
+async def _viewport_clip(client, session_id: str, max_width: int) -> Optional[dict]:
+    metrics = await client.send.Page.getLayoutMetrics(session_id=session_id)
+    vp = metrics.get("cssVisualViewport") or metrics.get("visualViewport")
+    if not vp:
+        return None
+    width, height = vp["clientWidth"], vp["clientHeight"]
+    return {
+        "x": vp.get("pageX", 0),
+        "y": vp.get("pageY", 0),
+        "width": width,
+        "height": height,
+        "scale": min(1.0, max_width / width) if width else 1.0,
+    }
+
+
+async def capture(cdp_session, config: CaptureConfig = default_config) -> Tuple[bytes, str]:
+    """
+    Capture the visible viewport of cdp_session.
+    Returns (image_bytes, mime_type).
+    """
+    client, session_id = cdp_session.cdp_client, cdp_session.session_id
+    loop = asyncio.get_running_loop()
+
+    if config.encoder == "pillow":
+        result = await client.send.Page.captureScreenshot(
+            params={"format": "png", "optimizeForSpeed": True},
+            session_id=session_id,
+        )
+        png = await loop.run_in_executor(_executor, base64.b64decode, result["data"])
+        data = await loop.run_in_executor(_executor, _pillow_encode, png, config)
+        return data, config.mime
+
+    params = {"format": config.fmt, "optimizeForSpeed": True}
+    if config.fmt != "png":
+        params["quality"] = config.quality
+    clip = await _viewport_clip(client, session_id, config.max_width)
+    if clip:
+        params["clip"] = clip
+
+    result = await client.send.Page.captureScreenshot(params=params, session_id=session_id)
+    data = await loop.run_in_executor(_executor, base64.b64decode, result["data"])
+    return data, config.mime
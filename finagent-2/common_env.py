@@ -0,0 +1,14 @@
+"""
+This app's settings for the modules shared with finagent/ (see
+finagent_common): HITL_* variables, files next to this code.
+"""
+import sys
+from pathlib import Path
+
+_HERE = Path(__file__).resolve().parent
+if str(_HERE.parent) not in sys.path:
+    sys.path.append(str(_HERE.parent))
+
+from finagent_common import Env  # noqa: E402
+
+env = Env("HITL", home=_HERE)
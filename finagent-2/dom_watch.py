@@ -0,0 +1,444 @@
+"""
+Incremental sensitive-page detection.
+
+Rather than dumping the whole outerHTML on every agent step, we subscribe
+to CDP DOM mutation events and keep a live index of the nodes that make a
+page "sensitive" (password / OTP / PIN inputs, confirm-payment buttons).
+The per-step check is then a lookup over a handful of counters.
+
+A full scan (DOM.getDocument, no outerHTML) only happens after a
+navigation (including a client-side route change), a document reset,
+or an event about a node the index doesn't know. The last one matters
+because the CDP session is shared: browser_use calls DOM.getDocument
+on it every step, which makes Chrome drop its node-id bindings and hand
+out fresh ids, so events after that name nodes we've never seen. Every
+tab and out-of-process iframe has its own index, so a PIN field in a
+payment-gateway popup or iframe is seen too.
+"""
+import asyncio
+import hashlib
+import inspect
+import weakref
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from rules import RuleEngine, default_engine
+
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+
+# Attributes that identify a sensitive element across reloads
+_FINGERPRINT_ATTRS = ("id", "name", "type", "autocomplete")
+
+
+def _attr_dict(flat: List[str]) -> Dict[str, str]:
+    # CDP sends attributes as [name1, value1, name2, value2, ...]
+    return {flat[i].lower(): flat[i + 1] for i in range(0, len(flat) - 1, 2)}
+
+
+def _child_nodes(node: dict) -> Iterable[dict]:
+    yield from node.get("children", ())
+    yield from node.get("shadowRoots", ())
+    if "contentDocument" in node:
+        yield node["contentDocument"]
+
+
+# =========================
+# Live index
+# =========================
+class DomIndex:
+    """Mirror of node ids -> sensitive hits for a single CDP document."""
+
+    def __init__(self, engine: Optional[RuleEngine] = None):
+        self.engine = engine or default_engine()
+        self.reset()
+
+    def reset(self):
+        self.nodes: Set[int] = set()
+        self.children: Dict[int, List[int]] = {}
+        self.attrs: Dict[int, Dict[str, str]] = {}
+        self.hits: Dict[int, frozenset] = {}
+        self.counts: Counter = Counter()
+
+    def _set_hits(self, node_id: int, keys: frozenset):
+        for k in self.hits.pop(node_id, ()):
+            self.counts[k] -= 1
+        if keys:
+            self.hits[node_id] = keys
+            for k in keys:
+                self.counts[k] += 1
+
+    def add_node(self, node: dict):
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            node_id = n["nodeId"]
+            node_type = n.get("nodeType")
+            self.nodes.add(node_id)
+
+            if node_type == ELEMENT_NODE:
+                attrs = _attr_dict(n.get("attributes", []))
+                self.attrs[node_id] = attrs
+                self._set_hits(node_id, self.engine.attr_keys(attrs))
+            elif node_type == TEXT_NODE:
+                self._set_hits(node_id, self.engine.keys(n.get("nodeValue", "")))
+
+            kids = list(_child_nodes(n))
+            if kids:
+                self.children[node_id] = [k["nodeId"] for k in kids]
+                stack.extend(kids)
+
+    def remove_node(self, node_id: int):
+        stack = [node_id]
+        while stack:
+            nid = stack.pop()
+            self.nodes.discard(nid)
+            self._set_hits(nid, frozenset())
+            self.attrs.pop(nid, None)
+            stack.extend(self.children.pop(nid, ()))
+
+    def insert_child(self, parent_id: int, node: dict):
+        self.children.setdefault(parent_id, []).append(node["nodeId"])
+        self.add_node(node)
+
+    def remove_child(self, parent_id: int, node_id: int):
+        siblings = self.children.get(parent_id)
+        if siblings and node_id in siblings:
+            siblings.remove(node_id)
+        self.remove_node(node_id)
+
+    def set_children(self, parent_id: int, nodes: List[dict]):
+        for old in self.children.pop(parent_id, ()):
+            self.remove_node(old)
+        self.children[parent_id] = [n["nodeId"] for n in nodes]
+        for n in nodes:
+            self.add_node(n)
+
+    def set_attribute(self, node_id: int, name: str, value: Optional[str]):
+        attrs = self.attrs.setdefault(node_id, {})
+        if value is None:
+            attrs.pop(name.lower(), None)
+        else:
+            attrs[name.lower()] = value
+        self._set_hits(node_id, self.engine.attr_keys(attrs))
+
+    def set_text(self, node_id: int, text: str):
+        self._set_hits(node_id, self.engine.keys(text))
+
+    def fingerprint(self, key: str) -> str:
+        """
+        Structural hash of the nodes hitting rule `key`: their id/name/type
+        attributes, not node ids, so it survives a reload of the same page.
+        Only sensitive nodes are visited, which is a handful per page.
+        """
+        parts = []
+        for node_id, keys in self.hits.items():
+            if key in keys:
+                attrs = self.attrs.get(node_id)
+                if attrs is None:
+                    parts.append("#text")
+                else:
+                    parts.append("|".join(attrs.get(a, "") for a in _FINGERPRINT_ATTRS))
+        return hashlib.sha1("\n".join(sorted(parts)).encode()).hexdigest()[:16]
+
+    def has_once_hits(self) -> bool:
+        return any(self.counts[k] > 0 for k in self.engine.once_keys)
+
+    def scope(self, key: str) -> str:
+        """
+        Approval scope for the nodes hitting rule `key`: the narrowest of
+        theirs. The PIN box is type="password" like the login field, but
+        short, numeric and next to "Confirm Payment", so it stays "once".
+        """
+        if self.has_once_hits():
+            return "once"
+        for node_id, keys in self.hits.items():
+            if key in keys and self.engine.element_scope(keys, self.attrs.get(node_id)) != "session":
+                return "once"
+        return self.engine.scope_for(key)
+
+    def match(self) -> Tuple[bool, str, str]:
+        for sig in self.engine.ordered_keys:
+            if self.counts[sig] > 0:
+                return True, self.engine.reason_for(sig), sig
+        return False, "", ""
+
+
+# =========================
+# CDP wiring
+# =========================
+class _Target:
+    """One CDP target (tab or out-of-process iframe) and its DOM index."""
+
+    __slots__ = ("session_id", "target_id", "kind", "url", "index", "dirty")
+
+    def __init__(self, session_id: str, target_id: Optional[str], kind: str, url: str, engine: RuleEngine):
+        self.session_id = session_id
+        self.target_id = target_id
+        self.kind = kind
+        self.url = url
+        self.index = DomIndex(engine)
+        self.dirty = True
+
+
+class _EventRouter:
+    """
+    The watchers' DOM.* / Page.* handlers on one CDP client. cdp_use keeps
+    a single handler per method (registering replaces it), so they are
+    registered once per client and each event goes to the watcher that
+    owns its session. A handler someone else had registered before us
+    (browser_use) still gets every event.
+    """
+
+    METHODS = {
+        "DOM.documentUpdated": "_on_document_updated",
+        "DOM.setChildNodes": "_on_set_child_nodes",
+        "DOM.childNodeInserted": "_on_child_inserted",
+        "DOM.childNodeRemoved": "_on_child_removed",
+        "DOM.attributeModified": "_on_attribute_modified",
+        "DOM.attributeRemoved": "_on_attribute_removed",
+        "DOM.characterDataModified": "_on_character_data",
+        "Page.frameNavigated": "_on_frame_navigated",
+        "Page.navigatedWithinDocument": "_on_navigated_within_document",
+    }
+
+    _routers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def for_client(cls, client) -> "_EventRouter":
+        router = cls._routers.get(client)
+        if router is None:
+            router = cls._routers[client] = cls(client)
+        return router
+
+    def __init__(self, client):
+        # session_id -> watcher
+        self.owners: Dict[str, "SensitivityWatcher"] = {}
+        handlers = getattr(getattr(client, "_event_registry", None), "_handlers", {})
+        for method, name in self.METHODS.items():
+            domain, event = method.split(".")
+            register = getattr(getattr(client.register, domain), event)
+            register(self._handler(name, handlers.get(method)))
+
+    def _handler(self, name: str, previous):
+        def handle(event, session_id=None):
+            if previous is not None:
+                result = previous(event, session_id)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            watcher = self.owners.get(session_id)
+            if watcher is not None:
+                getattr(watcher, name)(event, session_id)
+
+        return handle
+
+    def release(self, watcher: "SensitivityWatcher"):
+        for session_id in [s for s, w in self.owners.items() if w is watcher]:
+            del self.owners[session_id]
+
+
+class SensitivityWatcher:
+    """
+    Keeps one DomIndex per CDP target in sync: every tab, plus cross-origin
+    iframes that run in their own target (same-origin iframes are already
+    inside their parent's document via pierce).
+
+    Usage (per step):
+        await watcher.attach(cdp_session)          # focused tab
+        await watcher.track(browser_session)       # + other tabs / OOPIFs
+        sensitive, reason, sig = await watcher.check()
+
+    check() only rescans targets whose document was replaced, or whose
+    node ids went stale, since the last step (mutations are applied
+    incrementally), and rescans them concurrently, so a step costs the
+    same with one tab or ten.
+
+    Several watchers (one per run) can share a CDP client: events reach
+    them through that client's _EventRouter. close() when the run ends.
+    """
+
+    TRACKED_KINDS = ("page", "tab", "iframe")
+
+    def __init__(self, engine: Optional[RuleEngine] = None):
+        self.engine = engine or default_engine()
+        self.client = None
+        self.targets: Dict[str, _Target] = {}  # session_id -> target
+        self.full_scans = 0
+        self.matched: Optional[_Target] = None
+
+    async def attach(self, cdp_session, target_id: Optional[str] = None, kind: str = "page", url: str = ""):
+        if cdp_session.session_id in self.targets:
+            return
+
+        client = cdp_session.cdp_client
+        self.client = client
+        _EventRouter.for_client(client).owners[cdp_session.session_id] = self
+
+        self.targets[cdp_session.session_id] = _Target(
+            cdp_session.session_id, target_id or getattr(cdp_session, "target_id", None), kind, url, self.engine
+        )
+        await client.send.DOM.enable(session_id=cdp_session.session_id)
+        await client.send.Page.enable(session_id=cdp_session.session_id)
+
+    def _forget(self, session_id: str):
+        self.targets.pop(session_id, None)
+        owners = _EventRouter.for_client(self.client).owners
+        if owners.get(session_id) is self:
+            del owners[session_id]
+
+    def close(self):
+        """Stop receiving events (the run is over); the indexes are dropped."""
+        if self.client is not None:
+            _EventRouter.for_client(self.client).release(self)
+        self.targets.clear()
+        self.matched = None
+
+    async def track(self, browser_session):
+        """Attach to targets that appeared since the last step, forget closed ones."""
+        manager = getattr(browser_session, "session_manager", None)
+        if manager is None:
+            return
+        live = {
+            tid: t for tid, t in manager.get_all_targets().items() if t.target_type in self.TRACKED_KINDS
+        }
+
+        known = {}
+        for session_id, t in list(self.targets.items()):
+            if t.target_id is not None and t.target_id not in live:
+                self._forget(session_id)
+            else:
+                known[t.target_id] = t
+                if t.target_id in live:
+                    t.url = live[t.target_id].url
+
+        new = [t for tid, t in live.items() if tid not in known]
+        if new:
+            await asyncio.gather(*(self._attach_target(browser_session, t) for t in new))
+
+    async def _attach_target(self, browser_session, target):
+        try:
+            cdp = await browser_session.get_or_create_cdp_session(target.target_id, focus=False)
+            await self.attach(cdp, target.target_id, target.target_type, target.url)
+        except Exception:
+            pass  # target went away or has no session (e.g. OOPIFs disabled); retried next step
+
+    async def check(self) -> Tuple[bool, str, str]:
+        dirty = [t for t in self.targets.values() if t.dirty]
+        if dirty:
+            results = await asyncio.gather(*(self._scan(t) for t in dirty), return_exceptions=True)
+            for t, result in zip(dirty, results):
+                if isinstance(result, Exception):
+                    self._forget(t.session_id)  # detached mid-step
+
+        for sig in self.engine.ordered_keys:
+            for t in self.targets.values():
+                if t.index.counts[sig] > 0:
+                    self.matched = t
+                    return True, self.engine.reason_for(sig), sig
+        self.matched = None
+        return False, "", ""
+
+    def fingerprint(self, key: str) -> str:
+        """Fingerprint of the target that matched in the last check()."""
+        if self.matched is None:
+            return ""
+        return self.matched.index.fingerprint(key)
+
+    def scope(self, key: str) -> str:
+        """
+        Approval scope for the last check(): "session" only when no
+        once-scoped rule hits in any target and every element hitting
+        `key` is a plain login field.
+        """
+        if self.matched is None:
+            return self.engine.scope_for(key)
+        if any(t.index.has_once_hits() for t in self.targets.values()):
+            return "once"
+        return self.matched.index.scope(key)
+
+    @property
+    def matched_url(self) -> str:
+        return self.matched.url if self.matched else ""
+
+    async def _scan(self, target: _Target):
+        doc = await self.client.send.DOM.getDocument(
+            params={"depth": -1, "pierce": True},
+            session_id=target.session_id,
+        )
+        target.index.reset()
+        target.index.add_node(doc["root"])
+        target.dirty = False
+        self.full_scans += 1
+
+    async def full_scan(self):
+        for t in self.targets.values():
+            t.dirty = True
+        await self.check()
+
+    def invalidate(self, session_id: Optional[str] = None):
+        """
+        Rescan at the next check(): one target, or all of them. Call after
+        anything of ours runs DOM.getDocument on a shared session.
+        """
+        for t in self.targets.values():
+            if session_id is None or t.session_id == session_id:
+                t.dirty = True
+
+    # ---- event handlers (called from the CDP receive loop) ----
+    def _live(self, session_id, *node_ids) -> Optional[_Target]:
+        t = self.targets.get(session_id)
+        if t is None or t.dirty:
+            return None
+        if not all(n in t.index.nodes for n in node_ids):
+            # Node ids were rebound by someone else's getDocument
+            t.dirty = True
+            return None
+        return t
+
+    def _on_document_updated(self, event, session_id=None):
+        t = self.targets.get(session_id)
+        if t is not None:
+            t.dirty = True
+
+    def _on_frame_navigated(self, event, session_id=None):
+        t = self.targets.get(session_id)
+        if t is not None and not event["frame"].get("parentId"):
+            t.dirty = True
+            t.url = event["frame"].get("url", t.url)
+
+    def _on_navigated_within_document(self, event, session_id=None):
+        # pushState / hash change: the SPA swaps the page without a new document
+        t = self.targets.get(session_id)
+        if t is not None:
+            t.dirty = True
+            t.url = event.get("url", t.url)
+
+    def _on_set_child_nodes(self, event, session_id=None):
+        t = self._live(session_id, event["parentId"])
+        if t:
+            t.index.set_children(event["parentId"], event["nodes"])
+
+    def _on_child_inserted(self, event, session_id=None):
+        t = self._live(session_id, event["parentNodeId"])
+        if t:
+            t.index.insert_child(event["parentNodeId"], event["node"])
+
+    def _on_child_removed(self, event, session_id=None):
+        t = self._live(session_id, event["parentNodeId"], event["nodeId"])
+        if t:
+            t.index.remove_child(event["parentNodeId"], event["nodeId"])
+
+    def _on_attribute_modified(self, event, session_id=None):
+        t = self._live(session_id, event["nodeId"])
+        if t:
+            t.index.set_attribute(event["nodeId"], event["name"], event["value"])
+
+    def _on_attribute_removed(self, event, session_id=None):
+        t = self._live(session_id, event["nodeId"])
+        if t:
+            t.index.set_attribute(event["nodeId"], event["name"], None)
+
+    def _on_character_data(self, event, session_id=None):
+        t = self._live(session_id, event["nodeId"])
+        if t:
+            t.index.set_text(event["nodeId"], event["characterData"])
@@ -0,0 +1,168 @@
+"""
+Sensitive-page rule engine.
+
+Rules live in a JSON file (sensitive_rules.json by default, override with
+HITL_RULES_PATH) and are compiled once into a flat needle table. Matching
+is the same as the hand-written checks it replaced: the page is lowercased
+once and each needle is an `in` test, in priority order. That is one pass
+per needle, but each pass is CPython's C substring search; a single-pass
+alternative (one alternation regex, or Aho-Corasick in Python) is slower,
+see bench_rules.py. The engine is about configurable rules, not speed.
+
+Rule format:
+    {"key": "otp", "reason": "OTP_ENTRY",
+     "patterns": ["one-time-code", "enter otp"],
+     "attrs": {"type": "password"},          # optional, exact attribute match
+     "scope": "once"}                         # approval scope, see approvals.py
+
+Rules are listed in priority order: when several match, the first wins.
+Once a rule has matched, only higher-priority needles are searched for.
+
+A rule's scope is an upper bound: an element hitting a "session" rule
+only gets session scope when it hits no "once" rule as well and doesn't
+look like a short numeric secret (a PIN box is type="password" too).
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("sensitive_rules.json")
+
+# Longest maxlength still read as a PIN / OTP box rather than a password
+PIN_MAX_LENGTH = 8
+
+_NUMERIC_PATTERN = re.compile(r"\\d|0-9")
+
+
+def pin_like(attrs: Dict[str, str]) -> bool:
+    """Input attributes of a short numeric secret (PIN, OTP), whatever its type."""
+    maxlength = attrs.get("maxlength", "").strip()
+    if maxlength.isdigit() and int(maxlength) <= PIN_MAX_LENGTH:
+        return True
+    if attrs.get("inputmode", "").lower() in ("numeric", "tel", "decimal"):
+        return True
+    if attrs.get("autocomplete", "").lower() == "one-time-code":
+        return True
+    return bool(_NUMERIC_PATTERN.search(attrs.get("pattern", "")))
+
+
+class Rule:
+    def __init__(self, key: str, reason: str, patterns: List[str], attrs: Dict[str, str] = None, scope: str = "once"):
+        if scope not in ("once", "session"):
+            raise ValueError(f"Rule {key!r}: scope must be 'once' or 'session'")
+        self.key = key
+        self.reason = reason
+        self.patterns = patterns
+        self.attrs = {k.lower(): v.lower() for k, v in (attrs or {}).items()}
+        self.scope = scope
+
+
+class RuleEngine:
+    def __init__(self, rules: List[Rule]):
+        if not rules:
+            raise ValueError("RuleEngine needs at least one rule")
+
+        self.rules = rules
+        self._priority = {r.key: i for i, r in enumerate(rules)}
+
+        # (priority, needle) sorted by priority, needles pre-lowercased
+        self._needles = [
+            (i, p.lower()) for i, r in enumerate(rules) for p in r.patterns
+        ]
+
+        # Overlap kept between chunks so a needle split across two chunks
+        # is still seen.
+        self._overlap = max((len(n) for _, n in self._needles), default=1) - 1
+
+    @classmethod
+    def from_file(cls, path=None) -> "RuleEngine":
+        path = Path(path or os.getenv("HITL_RULES_PATH") or DEFAULT_RULES_PATH)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls([Rule(**r) for r in data["rules"]])
+
+    # ---- matching ----
+    def scan(self, chunks: Iterable[str]) -> Tuple[bool, str, str]:
+        """
+        Same checks as match() over text that arrives in pieces: each chunk
+        (plus an overlap, for needles split across two) is lowercased and
+        searched on its own. Returns (is_sensitive, reason, signature_key).
+        """
+        best = len(self.rules)
+        tail = ""
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buf = (tail + chunk).lower()
+            for prio, needle in self._needles:
+                if prio >= best:
+                    break
+                if needle in buf:
+                    best = prio
+                    break
+            if best == 0:
+                break
+            tail = (tail + chunk)[-self._overlap:] if self._overlap else ""
+
+        if best == len(self.rules):
+            return False, "", ""
+        rule = self.rules[best]
+        return True, rule.reason, rule.key
+
+    def match(self, text: str) -> Tuple[bool, str, str]:
+        h = text.lower()
+        for prio, needle in self._needles:
+            if needle in h:
+                rule = self.rules[prio]
+                return True, rule.reason, rule.key
+        return False, "", ""
+
+    def keys(self, text: str) -> frozenset:
+        """All rule keys whose patterns occur in text (meant for short strings)."""
+        if not text:
+            return frozenset()
+        t = text.lower()
+        return frozenset(self.rules[prio].key for prio, needle in self._needles if needle in t)
+
+    def attr_keys(self, attrs: Dict[str, str]) -> frozenset:
+        """Rule keys hit by an element's attributes (exact attr rules + patterns in values)."""
+        keys = set()
+        for rule in self.rules:
+            if rule.attrs and all(attrs.get(k, "").lower() == v for k, v in rule.attrs.items()):
+                keys.add(rule.key)
+        for value in attrs.values():
+            keys |= self.keys(value)
+        return frozenset(keys)
+
+    def reason_for(self, key: str) -> str:
+        return self.rules[self._priority[key]].reason
+
+    def scope_for(self, key: str) -> str:
+        return self.rules[self._priority[key]].scope
+
+    @property
+    def once_keys(self) -> List[str]:
+        return [r.key for r in self.rules if r.scope != "session"]
+
+    def element_scope(self, keys: Iterable[str], attrs: Dict[str, str] = None) -> str:
+        """Approval scope for one element hitting `keys` (attrs None for text nodes)."""
+        if any(self.scope_for(k) != "session" for k in keys):
+            return "once"
+        if attrs is not None and pin_like(attrs):
+            return "once"
+        return "session"
+
+    @property
+    def ordered_keys(self) -> List[str]:
+        return [r.key for r in self.rules]
+
+
+_default_engine = None
+
+
+def default_engine() -> RuleEngine:
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RuleEngine.from_file()
+    return _default_engine
@@ -0,0 +1,142 @@
+"""
+Per-run HITL state.
+
+One supervisor process can watch many agents: every run gets its own
+pause state, resume event, screenshot and event stream, looked up by
+run_id. Finished runs are kept for a while so the dashboard can still
+show them, then evicted (LRU on count + TTL on age) together with
+their screenshot bytes.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from approvals import approvals
+from dom_watch import SensitivityWatcher
+
+
+class HitlEvents:
+    """
+    Fan-out of state snapshots to event-stream subscribers.
+    Each subscriber only needs the latest snapshot, so a full queue
+    drops its oldest entry instead of blocking the agent.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self.subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        q = asyncio.Queue(maxsize=self.maxsize)
+        self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self.subscribers.discard(q)
+
+    def publish(self, snapshot: dict):
+        for q in self.subscribers:
+            if q.full():
+                q.get_nowait()
+            q.put_nowait(snapshot)
+
+
+class RunState:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.paused = False
+        self.reason = ""
+        self.url = ""
+        self.html_hint = ""
+        self.screenshot = b""
+        self.screenshot_mime = "image/jpeg"
+        self.screenshot_version = 0
+        self.finished = False
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+        self.resume_event = asyncio.Event()
+        self.events = HitlEvents()
+        self.sensitivity = SensitivityWatcher()
+
+    def public(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "paused": self.paused,
+            "reason": self.reason,
+            "url": self.url,
+            "screenshot_version": self.screenshot_version,
+            "finished": self.finished,
+        }
+
+    def set_screenshot(self, data: bytes, mime: str = "image/jpeg"):
+        self.screenshot = data
+        self.screenshot_mime = mime
+        self.screenshot_version += 1
+
+    def publish(self):
+        self.events.publish(self.public())
+
+
+class RunRegistry:
+    def __init__(self, max_finished: int = 200, finished_ttl: float = 3600):
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self.active: Dict[str, RunState] = {}
+        # run_id -> RunState, oldest first
+        self.finished: "OrderedDict[str, RunState]" = OrderedDict()
+
+    def create(self, run_id: Optional[str] = None) -> RunState:
+        run = RunState(run_id or uuid.uuid4().hex[:12])
+        self.active[run.run_id] = run
+        self.evict()
+        return run
+
+    def get(self, run_id: str) -> Optional[RunState]:
+        run = self.active.get(run_id)
+        if run is not None:
+            return run
+        run = self.finished.get(run_id)
+        if run is not None:
+            self.finished.move_to_end(run_id)
+        return run
+
+    def latest(self) -> Optional[RunState]:
+        """Most recently started active run (for the legacy /hitl/* routes)."""
+        if self.active:
+            return next(reversed(self.active.values()))
+        if self.finished:
+            return next(reversed(self.finished.values()))
+        return None
+
+    def finish(self, run_id: str):
+        run = self.active.pop(run_id, None)
+        if run is None:
+            return
+        run.finished = True
+        run.paused = False
+        run.finished_at = time.time()
+        run.resume_event.set()
+        run.publish()
+        approvals.end_run(run_id)
+        run.sensitivity.close()
+        self.finished[run_id] = run
+        self.evict()
+
+    def evict(self):
+        cutoff = time.time() - self.finished_ttl
+        while self.finished:
+            run_id, run = next(iter(self.finished.items()))
+            if len(self.finished) > self.max_finished or run.finished_at < cutoff:
+                del self.finished[run_id]
+            else:
+                break
+
+    def list(self) -> List[dict]:
+        self.evict()
+        return [r.public() for r in self.active.values()] + [r.public() for r in self.finished.values()]
+
+
+registry = RunRegistry()
@@ -0,0 +1,12 @@
+"""
+Session vault for this app (finagent_common.session_vault): Dummy Bank
+logins at HITL_BANK_URL, stored in HITL_VAULT_DIR.
+"""
+import os
+
+from common_env import env
+from finagent_common.session_vault import SessionVault
+
+BANK_URL = os.getenv("HITL_BANK_URL", "http://localhost:3001")
+
+vault = SessionVault.from_env(env, BANK_URL)
@@ -333,36 +333,27 @@
 
 
 import asyncio
-import base64
-from pathlib import Path
+import json
 from typing import Tuple
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse, Response, JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, JSONResponse, StreamingResponse
 import uvicorn
 
 from browser_use import Browser, ChatBrowserUse
 from browser_use.agent.service import Agent
-from browser_use.browser.events import ScreenshotEvent
 
-load_dotenv()
-
-# =========================
-# HiTL shared state
-# =========================
-resume_event = asyncio.Event()
-
-hitl_state = {
-    "paused": False,
-    "reason": "",
-    "url": "",
-    "last_screenshot_bytes": b"",
-    "last_html_hint": "",
-}
+from approvals import approvals
+from capture import capture
+from llm_cache import CachedLLM, decision_cache
+from progress import ProgressMonitor, policy_for
+from rules import default_engine
+from runs import RunState, registry
+from session_vault import BANK_URL, vault
+from tracing import tracer
 
-# Prevent infinite pause loops
-last_pause_signature = None
+load_dotenv()
 
 # =========================
 # STRICT Sensitive detectors
@@ -371,26 +362,10 @@ def looks_sensitive(url: str, page_html: str) -> Tuple[bool, str, str]:
     """
     Returns:
       (is_sensitive, reason, signature_key)
-    """
-    h = (page_html or "").lower()
-
-    # Password fields
-    if 'type="password"' in h:
-        return True, "PASSWORD_ENTRY", "password"
-
-    # OTP fields
-    if "one-time-code" in h or "enter otp" in h:
-        return True, "OTP_ENTRY", "otp"
-
-    # UPI PIN / CVV
-    if "upi pin" in h or "cvv" in h:
-        return True, "PAYMENT_SECRET", "pin"
-
-    # FINAL irreversible actions only
-    if "confirm payment" in h or "pay now" in h or "place order" in h:
-        return True, "PAYMENT_CONFIRM", "confirm"
 
-    return False, "", ""
+    Rules come from sensitive_rules.json (see rules.py).
+    """
+    return default_engine().match(page_html or "")
 
 # =========================
 # Browser helpers
@@ -404,30 +379,19 @@ async def get_page_html(agent: Agent) -> str:
     )
     return html_result.get("outerHTML", "")
 
-async def take_screenshot_bytes(agent: Agent) -> bytes:
-    ev = agent.browser_session.event_bus.dispatch(ScreenshotEvent(full_page=False))
-    await ev
-    result = await ev.event_result(raise_if_any=True, raise_if_none=True)
-
-    if isinstance(result, str):
-        p = Path(result)
-        if p.exists():
-            return p.read_bytes()
-        try:
-            return base64.b64decode(result, validate=True)
-        except Exception:
-            return b""
-
-    return b""
+async def take_screenshot(agent: Agent) -> Tuple[bytes, str]:
+    """Downscaled JPEG/WebP of the viewport, in memory (see capture.py)."""
+    cdp = await agent.browser_session.get_or_create_cdp_session()
+    return await capture(cdp)
 
 # =========================
 # On-screen Resume overlay
 # =========================
-async def inject_resume_overlay(agent: Agent, reason: str, server_base: str = "http://127.0.0.1:8000"):
+async def inject_resume_overlay(agent: Agent, run_id: str, reason: str, server_base: str = "http://127.0.0.1:8000"):
     page = await agent.browser_session.must_get_current_page()
 
     await page.evaluate(
-        """({ reason, serverBase }) => {
+        """({ runId, reason, serverBase }) => {
             const id = "__hitl_resume_overlay__";
             document.getElementById(id)?.remove();
 
@@ -455,10 +419,10 @@ async def inject_resume_overlay(agent: Agent, reason: str, server_base: str = "h
             document.body.appendChild(wrap);
 
             document.getElementById("__hitl_resume_btn__").onclick = async () => {
-              await fetch(serverBase + "/hitl/resume", { method: "POST" });
+              await fetch(serverBase + "/hitl/" + runId + "/resume", { method: "POST" });
             };
         }""",
-        {"reason": reason, "serverBase": server_base},
+        {"runId": run_id, "reason": reason, "serverBase": server_base},
     )
 
 async def remove_resume_overlay(agent: Agent):
@@ -468,45 +432,62 @@ async def remove_resume_overlay(agent: Agent):
     )
 
 # =========================
-# Browser-Use hook (FIXED)
+# Browser-Use hook (per run)
 # =========================
-async def on_step_start(agent: Agent):
-    global last_pause_signature
-
-    state = await agent.browser_session.get_browser_state_summary()
-    url = getattr(state, "url", "") or ""
-
-    page_html = await get_page_html(agent)
-    sensitive, reason, sig = looks_sensitive(url, page_html)
-
-    if not sensitive:
-        return
-
-    signature = f"{url}:{sig}"
-    if signature == last_pause_signature:
-        return  # already approved
-
-    last_pause_signature = signature
-
-    hitl_state.update({
-        "paused": True,
-        "reason": reason,
-        "url": url,
-        "last_html_hint": page_html[:4000],
-    })
-
-    hitl_state["last_screenshot_bytes"] = await take_screenshot_bytes(agent)
-
-    await inject_resume_overlay(agent, reason)
-
-    agent.pause()
-    await resume_event.wait()
-    resume_event.clear()
-
-    await remove_resume_overlay(agent)
-
-    hitl_state["paused"] = False
-    agent.resume()
+def make_step_hook(run: RunState):
+    async def on_step_start(agent: Agent):
+        with tracer.span("on_step_start", run_id=run.run_id):
+            await _gate(agent)
+
+    async def _gate(agent: Agent):
+        with tracer.span("sensitivity_check"):
+            cdp = await agent.browser_session.get_or_create_cdp_session()
+            await run.sensitivity.attach(cdp)
+            await run.sensitivity.track(agent.browser_session)
+            sensitive, reason, sig = await run.sensitivity.check()
+
+        if not sensitive:
+            approvals.left(run.run_id)
+            return
+
+        # The hit may be in another tab or a cross-origin iframe
+        url = run.sensitivity.matched_url or await agent.browser_session.get_current_page_url()
+        session_id = str(getattr(agent.browser_session, "id", run.run_id))
+        approval = (run.run_id, session_id, url, run.sensitivity.fingerprint(sig), sig, run.sensitivity.scope(sig))
+        if approvals.is_approved(*approval):
+            return
+
+        # Full HTML only on the (rare) pause path, for the dashboard hint.
+        # Its getDocument rebinds the node ids the watcher indexed.
+        with tracer.span("html_fetch"):
+            page_html = await get_page_html(agent)
+        run.sensitivity.invalidate(cdp.session_id)
+
+        run.paused = True
+        run.reason = reason
+        run.url = url
+        run.html_hint = page_html[:4000]
+        with tracer.span("screenshot"):
+            run.set_screenshot(*await take_screenshot(agent))
+        run.publish()
+
+        with tracer.span("overlay"):
+            await inject_resume_overlay(agent, run.run_id, reason)
+
+        agent.pause()
+        with tracer.span("human_wait", kind="human", reason=reason):
+            await run.resume_event.wait()
+        run.resume_event.clear()
+        approvals.approve(*approval)
+
+        with tracer.span("overlay"):
+            await remove_resume_overlay(agent)
+
+        run.paused = False
+        run.publish()
+        agent.resume()
+
+    return on_step_start
 
 # =========================
 # FastAPI Dashboard
@@ -526,55 +507,161 @@ def home():
 <button onclick="resume()">Resume</button>
 <img id="img" width="420"/>
 <script>
-async function poll(){
-  const j = await (await fetch("/hitl/status")).json();
+// ?run=<id> watches one run; without it, the latest run
+const run = new URLSearchParams(location.search).get("run");
+const base = run ? "/hitl/" + run : "/hitl";
+let shotVersion = 0;
+function render(j){
   s.innerText = j.paused ? "PAUSED" : "RUNNING";
   r.innerText = j.reason || "-";
   u.innerText = j.url || "-";
-  if(j.paused) img.src="/hitl/screenshot?"+Date.now();
+  // Fetch a frame only when it actually changed
+  if(j.screenshot_version && j.screenshot_version !== shotVersion){
+    shotVersion = j.screenshot_version;
+    img.src = base + "/screenshot?v=" + shotVersion;
+  }
 }
 async function resume(){
-  await fetch("/hitl/resume",{method:"POST"});
+  await fetch(base + "/resume",{method:"POST"});
 }
-setInterval(poll,1000); poll();
+new EventSource(base + "/events").onmessage = (e) => render(JSON.parse(e.data));
 </script>
 </body>
 </html>
 """
 
+def get_run(run_id: str = None) -> RunState:
+    run = registry.get(run_id) if run_id else registry.latest()
+    if run is None:
+        raise HTTPException(status_code=404, detail="Unknown run")
+    return run
+
+@app.get("/hitl/runs")
+async def runs():
+    return registry.list()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    cache = decision_cache.stats()
+    lines = [
+        "# TYPE hitl_llm_cache_lookups_total counter",
+        f'hitl_llm_cache_lookups_total{{result="hit"}} {cache["hits"]}',
+        f'hitl_llm_cache_lookups_total{{result="miss"}} {cache["misses"]}',
+        f'hitl_llm_cache_lookups_total{{result="bypassed"}} {cache["bypassed"]}',
+        "# TYPE hitl_llm_cache_bytes gauge",
+        f"hitl_llm_cache_bytes {cache['bytes']}",
+    ]
+    body = tracer.prometheus() + "\n".join(lines) + "\n"
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/hitl/{run_id}/timing")
+async def run_timing(run_id: str):
+    get_run(run_id)
+    return tracer.run_summary(run_id) or {}
+
+@app.get("/hitl/{run_id}/status")
+async def run_status(run_id: str):
+    return get_run(run_id).public()
+
+@app.get("/hitl/{run_id}/events")
+async def run_events(run_id: str, request: Request):
+    run = get_run(run_id)
+    q = run.events.subscribe()
+
+    async def stream():
+        try:
+            yield f"data: {json.dumps(run.public())}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    snapshot = await asyncio.wait_for(q.get(), timeout=15)
+                    yield f"data: {json.dumps(snapshot)}\n\n"
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            run.events.unsubscribe(q)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+@app.get("/hitl/{run_id}/screenshot")
+async def run_screenshot(run_id: str, request: Request):
+    run = get_run(run_id)
+    if not run.screenshot:
+        return Response(status_code=204)
+
+    etag = f'"{run.run_id}-{run.screenshot_version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(run.screenshot, media_type=run.screenshot_mime, headers=headers)
+
+@app.post("/hitl/{run_id}/resume")
+async def run_resume(run_id: str):
+    get_run(run_id).resume_event.set()
+    return {"ok": True}
+
+# Legacy single-agent routes -> latest run
 @app.get("/hitl/status")
-def status():
-    return hitl_state
+async def status():
+    return get_run().public()
+
+@app.get("/hitl/events")
+async def events(request: Request):
+    return await run_events(get_run().run_id, request)
 
 @app.get("/hitl/screenshot")
-def screenshot():
-    if not hitl_state["last_screenshot_bytes"]:
-        return Response(status_code=204)
-    return Response(hitl_state["last_screenshot_bytes"], media_type="image/png")
+async def screenshot(request: Request):
+    return await run_screenshot(get_run().run_id, request)
 
 @app.post("/hitl/resume")
-def resume():
-    resume_event.set()
-    return {"ok": True}
+async def resume():
+    return await run_resume(get_run().run_id)
 
 # =========================
 # Run server + agent together
 # =========================
 async def run_agent():
-    browser = Browser(headless=False)
-    await browser.start()
-
-    page = await browser.must_get_current_page()
-    await page.goto("http://localhost:3001/login")
-
-    agent = Agent(
-        task="Pay to vansh 500 INR using UPI.",
-        browser=browser,
-        llm=ChatBrowserUse(),
-        directly_open_url=False,
-    )
-
-    await agent.run(on_step_start=on_step_start, max_steps=25)
+    run = registry.create()
+
+    with tracer.span("run", run_id=run.run_id):
+        with tracer.span("browser_launch"):
+            browser = Browser(headless=False)
+            await browser.start()
+
+            # A saved login (session_vault.py) starts us on the dashboard
+            if await vault.restore(browser, None):
+                print("🔓 Saved login restored; skipping /login.")
+            else:
+                page = await browser.must_get_current_page()
+                await page.goto(f"{BANK_URL}/login")
+
+        # Steps on pages seen in earlier runs come from the decision cache
+        llm = CachedLLM(ChatBrowserUse())
+        agent = Agent(
+            task="Pay to vansh 500 INR using UPI.",
+            browser=browser,
+            llm=llm,
+            directly_open_url=False,
+        )
+        llm.watch(agent)
+
+        monitor = ProgressMonitor(policy_for("TRANSFER"))
+        try:
+            await agent.run(
+                on_step_start=make_step_hook(run),
+                on_step_end=monitor.on_step_end,
+                max_steps=monitor.policy.hard,
+            )
+            if monitor.stop_reason:
+                run.reason = f"STOPPED: {monitor.stop_reason}"
+                print(f"🛑 {run.reason}")
+            # The human logged in during this run: keep it for the next one
+            await vault.capture(browser, None)
+        finally:
+            registry.finish(run.run_id)
 
 async def run_server():
     await uvicorn.Server(
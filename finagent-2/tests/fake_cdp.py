@@ -0,0 +1,70 @@
+"""
+Just enough of a cdp_use client for the DOM watcher: send.X.y() records
+the call and answers DOM.getDocument from `documents`, register.X.y()
+stores one handler per method (as cdp_use's EventRegistry does, in
+_event_registry._handlers), emit() plays an event.
+"""
+import itertools
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+
+class _Domains:
+    def __init__(self, call, prefix: str = ""):
+        self._call = call
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        if self._prefix:
+            method = f"{self._prefix}.{name}"
+            return lambda *args, **kwargs: self._call(method, *args, **kwargs)
+        return _Domains(self._call, name)
+
+
+class FakeClient:
+    def __init__(self):
+        self.handlers: Dict[str, object] = {}
+        self._event_registry = SimpleNamespace(_handlers=self.handlers)
+        self.documents: Dict[str, dict] = {}
+        self.calls: List[tuple] = []
+        self.send = _Domains(self._send)
+        self.register = _Domains(self._register)
+
+    async def _send(self, method, params=None, session_id=None):
+        self.calls.append((method, session_id))
+        if method == "DOM.getDocument":
+            return {"root": self.documents[session_id]}
+        return {}
+
+    def _register(self, method, callback):
+        self.handlers[method] = callback
+
+    def emit(self, method: str, event: dict, session_id: str):
+        handler = self.handlers.get(method)
+        if handler is not None:
+            handler(event, session_id)
+
+
+class FakeSession:
+    def __init__(self, client: FakeClient, session_id: str, target_id: Optional[str] = None):
+        self.cdp_client = client
+        self.session_id = session_id
+        self.target_id = target_id or session_id
+
+
+class Page:
+    """Builds CDP node trees with fresh node ids, like Chrome after a rebind."""
+
+    def __init__(self, start: int = 1):
+        self._ids = itertools.count(start)
+
+    def element(self, tag: str, attrs: Optional[dict] = None, *children) -> dict:
+        flat = [x for kv in (attrs or {}).items() for x in kv]
+        return {"nodeId": next(self._ids), "nodeType": 1, "nodeName": tag.upper(), "attributes": flat,
+                "children": list(children)}
+
+    def text(self, value: str) -> dict:
+        return {"nodeId": next(self._ids), "nodeType": 3, "nodeValue": value}
+
+    def document(self, *children) -> dict:
+        return {"nodeId": next(self._ids), "nodeType": 9, "children": [self.element("body", None, *children)]}
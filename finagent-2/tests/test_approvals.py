@@ -0,0 +1,93 @@
+import asyncio
+
+from approvals import ApprovalCache
+from dom_watch import SensitivityWatcher
+from fake_cdp import FakeClient, FakeSession, Page
+from rules import default_engine
+
+BANK = "http://localhost:3001"
+
+
+def login_page(page: Page) -> dict:
+    return page.document(
+        page.element("input", {"type": "email", "name": "email"}),
+        page.element("input", {"type": "password", "name": "password", "autocomplete": "current-password"}),
+        page.element("button", None, page.text("Sign in")),
+    )
+
+
+def dashboard_page(page: Page) -> dict:
+    return page.document(page.element("h1", None, page.text("Hello, Vansh")), page.element("button", None, page.text("Pay")))
+
+
+def pin_page(page: Page, with_confirm: bool = True) -> dict:
+    # Confirmation.jsx: the PIN box is a bare type="password" input
+    nodes = [page.element("input", {"type": "password", "maxlength": "4", "placeholder": "••••"})]
+    if with_confirm:
+        nodes.append(page.element("button", None, page.text("Confirm Payment")))
+    return page.document(*nodes)
+
+
+class Gate:
+    """The approval half of test.py's on_step_start gate, over a fake CDP session."""
+
+    def __init__(self):
+        self.client = FakeClient()
+        self.session = FakeSession(self.client, "s1")
+        self.watcher = SensitivityWatcher(default_engine())
+        self.approvals = ApprovalCache()
+        self.page = Page()
+
+    async def visit(self, path: str, document: dict):
+        """None on a plain page, else whether the gate paused for the human."""
+        self.client.documents["s1"] = document
+        await self.watcher.attach(self.session)
+        self.client.emit("DOM.documentUpdated", {}, "s1")
+        sensitive, _reason, sig = await self.watcher.check()
+        if not sensitive:
+            self.approvals.left("run-1")
+            return None
+        approval = ("run-1", "browser-1", BANK + path, self.watcher.fingerprint(sig), sig, self.watcher.scope(sig))
+        if self.approvals.is_approved(*approval):
+            return False
+        self.approvals.approve(*approval)
+        return True
+
+
+def test_pin_screen_pauses_for_every_payment_in_one_session():
+    async def scenario():
+        gate = Gate()
+        assert await gate.visit("/login", login_page(gate.page)) is True
+        assert gate.watcher.scope("password") == "session"
+
+        assert await gate.visit("/", dashboard_page(gate.page)) is None
+        assert await gate.visit("/confirmation", pin_page(gate.page)) is True
+        assert gate.watcher.scope("password") == "once"
+
+        # Second payment, same browser session
+        assert await gate.visit("/", dashboard_page(gate.page)) is None
+        assert await gate.visit("/confirmation", pin_page(gate.page)) is True
+
+        # The login approval is still session-wide
+        assert await gate.visit("/login", login_page(gate.page)) is False
+
+    asyncio.run(scenario())
+
+
+def test_short_numeric_password_field_is_once_without_confirm_text():
+    async def scenario():
+        gate = Gate()
+        assert await gate.visit("/confirmation", pin_page(gate.page, with_confirm=False)) is True
+        assert gate.watcher.scope("password") == "once"
+        assert await gate.visit("/", dashboard_page(gate.page)) is None
+        assert await gate.visit("/confirmation", pin_page(gate.page, with_confirm=False)) is True
+
+    asyncio.run(scenario())
+
+
+def test_element_scope():
+    engine = default_engine()
+    assert engine.element_scope({"password"}, {"type": "password", "name": "password"}) == "session"
+    assert engine.element_scope({"password", "pin"}, {"type": "password"}) == "once"
+    assert engine.element_scope({"password"}, {"type": "password", "inputmode": "numeric"}) == "once"
+    assert engine.element_scope({"password"}, {"type": "password", "pattern": "\\d{4}"}) == "once"
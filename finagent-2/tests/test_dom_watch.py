@@ -0,0 +1,113 @@
+import asyncio
+
+from dom_watch import SensitivityWatcher
+from fake_cdp import FakeClient, FakeSession, Page
+from rules import default_engine
+
+
+def login(page: Page):
+    body_children = [
+        page.element("input", {"type": "password", "name": "password"}),
+        page.element("button", None, page.text("Sign in")),
+    ]
+    return page.document(*body_children)
+
+
+def dashboard(page: Page):
+    return page.document(page.element("button", None, page.text("Pay")))
+
+
+async def watching(document):
+    client = FakeClient()
+    client.documents["s1"] = document
+    watcher = SensitivityWatcher(default_engine())
+    await watcher.attach(FakeSession(client, "s1"))
+    await watcher.check()
+    return client, watcher
+
+
+def test_rebound_node_ids_trigger_a_rescan():
+    async def scenario():
+        page = Page()
+        client, watcher = await watching(login(page))
+        assert watcher.matched is not None
+        scans = watcher.full_scans
+
+        # browser_use's per-step DOM.getDocument(depth=-1, pierce=True):
+        # Chrome rebinds, so the same nodes now have ids we never saw
+        rebound = login(page)
+        body = rebound["children"][0]
+        password = body["children"][0]
+
+        # ...then the SPA swaps the login form for the dashboard
+        client.documents["s1"] = dashboard(page)
+        client.emit("DOM.childNodeRemoved", {"parentNodeId": body["nodeId"], "nodeId": password["nodeId"]}, "s1")
+
+        assert await watcher.check() == (False, "", "")
+        assert watcher.full_scans == scans + 1
+
+    asyncio.run(scenario())
+
+
+def test_client_side_route_change_rescans():
+    async def scenario():
+        page = Page()
+        client, watcher = await watching(login(page))
+
+        client.documents["s1"] = dashboard(page)
+        client.emit("Page.navigatedWithinDocument", {"frameId": "f1", "url": "http://localhost:3001/"}, "s1")
+
+        assert await watcher.check() == (False, "", "")
+        assert watcher.targets["s1"].url == "http://localhost:3001/"
+
+    asyncio.run(scenario())
+
+
+def test_mutations_on_known_nodes_stay_incremental():
+    async def scenario():
+        page = Page()
+        client, watcher = await watching(dashboard(page))
+        body = client.documents["s1"]["children"][0]
+        scans = watcher.full_scans
+
+        pin = page.element("input", {"type": "password", "maxlength": "4"})
+        client.emit("DOM.childNodeInserted", {"parentNodeId": body["nodeId"], "previousNodeId": 0, "node": pin}, "s1")
+        assert (await watcher.check())[2] == "password"
+
+        client.emit("DOM.childNodeRemoved", {"parentNodeId": body["nodeId"], "nodeId": pin["nodeId"]}, "s1")
+        assert await watcher.check() == (False, "", "")
+        assert watcher.full_scans == scans
+
+    asyncio.run(scenario())
+
+
+def test_watchers_sharing_a_client_each_get_their_events():
+    async def scenario():
+        page = Page()
+        client = FakeClient()
+        earlier = []
+        client.register.DOM.childNodeInserted(lambda event, session_id=None: earlier.append(session_id))
+
+        client.documents["tab-a"] = dashboard(page)
+        client.documents["tab-b"] = dashboard(page)
+        first, second = SensitivityWatcher(default_engine()), SensitivityWatcher(default_engine())
+        await first.attach(FakeSession(client, "tab-a"))
+        await second.attach(FakeSession(client, "tab-b"))
+        await first.check()
+        await second.check()
+
+        body = client.documents["tab-a"]["children"][0]
+        pin = page.element("input", {"type": "password", "maxlength": "4"})
+        client.emit("DOM.childNodeInserted", {"parentNodeId": body["nodeId"], "previousNodeId": 0, "node": pin}, "tab-a")
+
+        # The second watcher didn't take the first one's handlers over
+        assert (await first.check())[2] == "password"
+        assert await second.check() == (False, "", "")
+        # ...nor the handler that was there before either of them
+        assert earlier == ["tab-a"]
+
+        first.close()
+        client.emit("DOM.documentUpdated", {}, "tab-a")
+        assert first.targets == {}
+
+    asyncio.run(scenario())
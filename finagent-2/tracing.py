@@ -0,0 +1,8 @@
+"""
+Span tracing for this app (finagent_common.tracing), written to
+HITL_TRACE_FILE and rendered with hitl_* metric names.
+"""
+from common_env import env
+from finagent_common.tracing import Tracer
+
+tracer = Tracer.from_env(env)
@@ -85,37 +85,9 @@
 #     asyncio.run(main())
 
 # agent.py
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-if not os.getenv("BROWSER_USE_API_KEY"):
-    raise RuntimeError("BROWSER_USE_API_KEY not found. Check .env file.")
-
-# agent.py
-import asyncio
-from workflow import build_graph
-from state import AgentState
-
-async def main():
-    print("\n🤖 FinAgent — Human-in-the-Loop Mode")
-    print("Agent will NEVER act at auth or PIN without consent.\n")
-
-    user_command = input("> ")
-
-    state: AgentState = {
-        "user_command": user_command,
-        "browser": None,
-        "auth_required": False,
-        "auth_choice": None,
-        "logged_in": False,
-        "awaiting_pin": False,
-        "task_completed": False,
-    }
-
-    graph = build_graph()
-    await graph.ainvoke(state)
+# `python agent.py` still opens the interactive loop; the real entry
+# point (with run / parse / batch / serve subcommands) is cli.py.
+from cli import main
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main(["chat"])
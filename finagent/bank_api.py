@@ -0,0 +1,147 @@
+# bank_api.py
+"""
+Direct-API fast path for the Dummy Bank.
+
+Instead of letting the LLM click Pay -> search -> amount -> proceed, we
+resolve the recipient and check the balance over the backend's HTTP API
+(reusing the human's session token) and then put the browser straight
+onto the Confirmation screen. The PIN is still typed by the human in the
+browser; POST /transactions/transfer is never called from here.
+
+Only plain TRANSFERs take this path. Anything that isn't unambiguous
+(no/multiple recipient matches, low balance, API down, expired token)
+raises FastPathUnavailable and the caller falls back to the UI agent.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING, Optional
+
+from prompt_templates import DEFAULT_URL
+
+if TYPE_CHECKING:
+    import httpx
+    from browser_use import Browser
+
+API_BASE = os.getenv("DUMMY_BANK_API", "http://localhost:5000/api")
+API_TIMEOUT = float(os.getenv("DUMMY_BANK_API_TIMEOUT", "5"))
+
+# Per-task default; a task can still ask for "ui" or "api" explicitly
+DEFAULT_MODE = os.getenv("FINAGENT_PAY_MODE", "ui")
+
+
+class FastPathUnavailable(RuntimeError):
+    """The API can't prepare this payment safely; use the UI flow."""
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def client() -> httpx.AsyncClient:
+    # One pooled client for the whole process (keep-alive to the backend)
+    import httpx
+
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=API_BASE,
+            timeout=API_TIMEOUT,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def session_token(browser: Browser) -> str:
+    """JWT the frontend keeps in localStorage after the human logs in."""
+    page = await browser.must_get_current_page()
+    token = await page.evaluate("() => localStorage.getItem('token')")
+    if not token:
+        raise FastPathUnavailable("Not logged in (no token in the browser)")
+    return token
+
+
+async def api_get(path: str, token: str, **params) -> dict:
+    import httpx
+
+    try:
+        res = await client().get(path, params=params, headers={"Authorization": f"Bearer {token}"})
+    except httpx.HTTPError as e:
+        raise FastPathUnavailable(f"Bank API unreachable: {e}")
+    if res.status_code != 200:
+        raise FastPathUnavailable(f"GET {path} -> {res.status_code}")
+    return res.json()
+
+
+async def whoami(token: str) -> Optional[dict]:
+    """The account token belongs to (GET /auth/me); None when the API can't say."""
+    try:
+        return await api_get("/auth/me", token)
+    except FastPathUnavailable:
+        return None
+
+
+async def resolve_recipient(token: str, name: str) -> dict:
+    """
+    Exactly one {name, upiId} whose full name or UPI id is name, else
+    FastPathUnavailable. Nobody sees a search result on this path, so a
+    partial, phonetic or typo match goes through the UI search instead.
+    """
+    from recipients import directory, normalise_name
+
+    known = None if directory.stale else directory.resolve(name, exact=True)
+    if known is not None:
+        return {"name": known["name"], "upiId": known["upiId"]}
+
+    matches = await api_get("/users/search", token, q=name)
+    wanted = normalise_name(name)
+
+    exact = [u for u in matches if wanted in (normalise_name(u["name"]), u["upiId"].lower())]
+    if len(exact) == 1:
+        return exact[0]
+    raise FastPathUnavailable(f"{len(exact)} accounts are exactly {name!r} ({len(matches)} partial matches)")
+
+
+async def prepare_transfer(browser: Browser, name: str, amount: str) -> dict:
+    token = await session_token(browser)
+    recipient = await resolve_recipient(token, name)
+
+    me = await api_get("/auth/me", token)
+    if float(amount) > me.get("balance", 0):
+        raise FastPathUnavailable("Insufficient balance")
+    return {"recipient": recipient, "amount": float(amount), "note": "", "category": "TRANSFER"}
+
+
+async def open_confirmation(browser: Browser, confirmation: dict):
+    """
+    Show the Confirmation (PIN) screen for a prepared transfer.
+    The SPA reads it from router location state, so push that state and
+    let react-router pick it up via popstate, same as an in-app navigate().
+    """
+    page = await browser.must_get_current_page()
+    url = await browser.get_current_page_url()
+    if not url.startswith(DEFAULT_URL):
+        await page.goto(DEFAULT_URL)
+
+    state = json.dumps(confirmation)
+    await page.evaluate(
+        f"""() => {{
+            const idx = (window.history.state && window.history.state.idx || 0) + 1;
+            window.history.pushState({{ usr: {state}, key: 'finagent', idx }}, '', '/confirmation');
+            window.dispatchEvent(new PopStateEvent('popstate', {{ state: window.history.state }}));
+        }}"""
+    )
+
+
+async def pay_via_api(browser: Browser, name: str, amount: str):
+    """Raises FastPathUnavailable when the UI flow should be used instead."""
+    confirmation = await prepare_transfer(browser, name, amount)
+    await open_confirmation(browser, confirmation)
+    print(f"⚡ Recipient {confirmation['recipient']['upiId']} resolved via API; PIN screen open.")
@@ -0,0 +1,172 @@
+# batch.py
+"""
+Batch payouts through one logged-in browser session.
+
+    python batch.py payouts.csv --out payouts.results.jsonl
+
+Input is CSV (header: recipient,amount,category[,mobile,consumer_number])
+or JSONL with the same keys. The human logs in once; every row then runs
+the payment flow up to the PIN screen and waits for the human to enter
+the PIN and press ENTER, exactly like a single run.
+
+Each row is appended (and fsynced) to the results file, which doubles
+as the checkpoint: rerunning the same command skips rows that already
+have a result and carries on from there. A row that had started but has
+no result (crash mid-payment) is marked "interrupted" and NOT retried,
+since the money may already have moved; check it by hand.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Set, Tuple
+
+import bank_api
+from browser_actions import open_site_only, wait_for_dashboard_and_pay
+from browser_pool import pool
+from hitl import ConsoleInput, checkpoints, resolve_from_console
+from intent import IntentError, make_intent
+from prompt_templates import DEFAULT_URL
+from tracing import tracer
+
+
+def read_rows(path: Path) -> Iterator[Dict[str, str]]:
+    if path.suffix.lower() == ".jsonl":
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with path.open(newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+
+def read_progress(out_path: Path) -> Tuple[Set[int], Set[int]]:
+    """(rows with a final result, rows started but never finished)"""
+    finished, started = set(), set()
+    if not out_path.exists():
+        return finished, started
+    with out_path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                (started if rec["status"] == "started" else finished).add(rec["row"])
+            except (ValueError, KeyError):
+                continue  # torn last line after a crash
+    return finished, started - finished
+
+
+class ResultWriter:
+    def __init__(self, path: Path):
+        self.f = path.open("a", encoding="utf-8")
+
+    def write(self, record: dict):
+        self.f.write(json.dumps(record) + "\n")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+async def run_batch(in_path: Path, out_path: Path, mode: str = bank_api.DEFAULT_MODE):
+    rows = list(read_rows(in_path))
+    finished, interrupted = read_progress(out_path)
+    writer = ResultWriter(out_path)
+
+    for i in sorted(interrupted):
+        print(f"⚠️  Row {i} was interrupted mid-payment; not retrying, check it manually.")
+        writer.write({"row": i, "status": "interrupted"})
+    done = finished | interrupted
+    todo = [(i, r) for i, r in enumerate(rows) if i not in done]
+    run_id = f"batch-{in_path.stem}"
+
+    print(f"\n📦 {len(rows)} rows, {len(done)} already handled, {len(todo)} to go.")
+    if not todo:
+        writer.close()
+        return
+
+    console = ConsoleInput()
+    console.start()
+    resolver = asyncio.create_task(resolve_from_console(console))
+    browser = await pool.acquire(run_id)
+
+    try:
+        await open_site_only(browser)
+        print("\n🔐 Please log in MANUALLY in the browser.")
+        print("👉 After login, press ENTER here.")
+        await checkpoints.wait(run_id, "login")
+
+        for i, row in todo:
+            started = time.time()
+            record = {"row": i, **{k: row.get(k) for k in ("recipient", "amount", "category")}}
+
+            try:
+                intent = make_intent(
+                    row.get("category"),
+                    row.get("amount"),
+                    row.get("recipient"),
+                    row.get("mobile"),
+                    row.get("consumer_number"),
+                    source=json.dumps(row),
+                )
+            except IntentError as e:
+                writer.write({**record, "status": "rejected", "error": str(e)})
+                continue
+
+            writer.write({"row": i, "status": "started"})
+            try:
+                with tracer.span("row", run_id=run_id, row=i, category=intent["category"]):
+                    page = await browser.must_get_current_page()
+                    await page.goto(DEFAULT_URL)
+
+                    print(f"\n💸 Row {i}: {intent['category']} {intent['amount']} {intent['recipient'] or ''}")
+                    try:
+                        if mode != "api" or intent["category"] != "TRANSFER":
+                            raise bank_api.FastPathUnavailable("UI mode")
+                        await bank_api.pay_via_api(browser, intent["recipient"], intent["amount"])
+                    except bank_api.FastPathUnavailable:
+                        await wait_for_dashboard_and_pay(
+                            browser,
+                            name=intent["recipient"],
+                            amount=intent["amount"],
+                            category=intent["category"],
+                            mobile=intent["mobile"],
+                            consumer_number=intent["consumer_number"],
+                        )
+
+                    # PIN stays human: one gate per payment
+                    print("🛑 PIN screen reached. Enter PIN in the browser, then press ENTER here.")
+                    await checkpoints.wait(run_id, f"pin:{i}")
+                writer.write({**record, "status": "done", "seconds": round(time.time() - started, 2)})
+            except Exception as e:
+                writer.write({**record, "status": "failed", "error": str(e), "seconds": round(time.time() - started, 2)})
+    finally:
+        resolver.cancel()
+        writer.close()
+        await pool.release(browser)
+        await pool.close()
+        await bank_api.close()
+        tracer.close()
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run a file of payouts through one session.")
+    parser.add_argument("input", type=Path, help="CSV or JSONL of recipient,amount,category rows")
+    parser.add_argument("--out", type=Path, help="results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("--mode", choices=["ui", "api"], default=os.getenv("FINAGENT_PAY_MODE", "ui"),
+                        help="api: resolve transfers over the bank API, browser only for the PIN")
+    args = parser.parse_args()
+
+    out = args.out or args.input.with_suffix(".results.jsonl")
+    asyncio.run(run_batch(args.input, out, args.mode))
+
+
+if __name__ == "__main__":
+    main()
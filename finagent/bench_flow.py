@@ -0,0 +1,285 @@
+# bench_flow.py
+"""
+Offline end-to-end benchmark of the payment graph.
+
+    python bench_flow.py                  # 20 runs, warm browser, replay on
+    python bench_flow.py -n 50 --cold     # fresh browser per run
+    python bench_flow.py --no-replay      # LLM path every run
+    python bench_flow.py --no-replay --no-llm-cache   # and every step asks the model
+
+Serves the static Dummy Bank snapshot in mock_bank/ on a local port,
+swaps ChatBrowserUse for a scripted model that reads element indices out
+of the browser state, and answers every human checkpoint after
+--human-delay seconds. No network or API key needed (a headless
+Chromium is).
+
+Reports p50/p95/p99 per phase (from the tracing spans), agent steps per
+second of machine time, and memory high-water marks for this process
+and for the browser processes it spawned.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+MOCK_DIR = Path(__file__).with_name("mock_bank")
+
+
+# =========================
+# Mock bank
+# =========================
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_mock_bank(port: int = 0) -> ThreadingHTTPServer:
+    handler = functools.partial(_QuietHandler, directory=str(MOCK_DIR))
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# =========================
+# Scripted LLM
+# =========================
+_ELEMENT_RE = re.compile(r"\[(\d+)\]<(\w+)([^\n]*)")
+
+
+class ScriptedLLM:
+    """
+    Stand-in for ChatBrowserUse. Looks at which mock page the browser
+    state shows (by element id) and returns the action a good model
+    would, so the graph runs the same steps every time.
+    """
+
+    model = "scripted"
+    _verified_api_keys = True
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    @property
+    def provider(self) -> str:
+        return "bench"
+
+    @property
+    def name(self) -> str:
+        return self.model
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    @staticmethod
+    def _elements(text: str) -> dict:
+        found = {}
+        for index, _tag, attrs in _ELEMENT_RE.findall(text):
+            m = re.search(r"\bid=([\w-]+)", attrs)
+            if m:
+                found[m.group(1)] = int(index)
+        return found
+
+    def _decide(self, task: str, state: str) -> list:
+        el = self._elements(state)
+        if "pin" in el:
+            return [{"done": {"text": "PIN screen reached", "success": True}}]
+        if "ONLY open the page" in task:
+            if "pay" in el:
+                return [{"done": {"text": "Site open", "success": True}}]
+            return [{"navigate": {"url": os.environ["DUMMY_BANK_URL"]}}]
+        if "proceed" in el:
+            recipient = re.search(r"^- recipient: (.*)$", task, re.MULTILINE)
+            amount = re.search(r"^- amount: (.*)$", task, re.MULTILINE)
+            return [
+                {"input": {"index": el["recipient"], "text": recipient.group(1) if recipient else ""}},
+                {"input": {"index": el["amount"], "text": amount.group(1) if amount else ""}},
+                {"click": {"index": el["proceed"]}},
+            ]
+        if "pay" in el:
+            return [{"click": {"index": el["pay"]}}]
+        return [{"navigate": {"url": os.environ["DUMMY_BANK_URL"]}}]
+
+    async def ainvoke(self, messages, output_format=None):
+        from browser_use.llm.views import ChatInvokeCompletion
+
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        # The task may sit in the system prompt or in the state message
+        task = "\n".join(m.text for m in messages)
+        state = messages[-1].text
+        out = {
+            "evaluation_previous_goal": "",
+            "memory": "",
+            "next_goal": "",
+            "action": self._decide(task, state),
+        }
+        completion = output_format.model_validate(out) if output_format else str(out)
+        return ChatInvokeCompletion(completion=completion, usage=None)
+
+
+# =========================
+# Memory high-water marks
+# =========================
+class MemoryWatch:
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.browser_peak = 0
+
+    async def run(self):
+        try:
+            import psutil
+        except ImportError:
+            return
+        me = psutil.Process()
+        while True:
+            rss = 0
+            for child in me.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.browser_peak = max(self.browser_peak, rss)
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    def self_peak() -> int:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def auto_human(checkpoints, delay: float):
+    while True:
+        for run_id, name in checkpoints.pending():
+            await asyncio.sleep(delay)
+            checkpoints.resolve(run_id, name)
+        await asyncio.sleep(0.01)
+
+
+def pct(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+# =========================
+# Bench
+# =========================
+async def bench(args):
+    # Imported late: DUMMY_BANK_URL / FINAGENT_* must be set first
+    import browser_actions
+    from browser_pool import pool
+    from hitl import checkpoints
+    from llm_cache import decision_cache
+    from replay_cache import replay_cache
+    from state import new_state
+    from tracing import tracer
+    from workflow import build_graph
+
+    llm = ScriptedLLM(args.llm_latency)
+    browser_actions.llm = llm
+    pool.headless = not args.headed
+    if args.cold:
+        pool.max_idle = 0
+
+    if args.no_llm_cache:
+        decision_cache.root = None
+
+    graph = build_graph()
+    watch = MemoryWatch()
+    tasks = [asyncio.create_task(auto_human(checkpoints, args.human_delay)), asyncio.create_task(watch.run())]
+
+    summaries, walls, failures = [], [], 0
+    try:
+        for i in range(args.runs):
+            if args.no_replay:
+                replay_cache.root = Path(tempfile.mkdtemp(prefix="bench-replay-"))
+            run_id = f"bench-{uuid.uuid4().hex[:8]}"
+            state = new_state(f"Pay {args.recipient} {args.amount}", run_id=run_id)
+
+            t0 = time.perf_counter()
+            try:
+                with tracer.span("run", run_id=run_id):
+                    await graph.ainvoke(state)
+            except Exception as e:
+                failures += 1
+                print(f"run {i}: failed: {e}")
+            finally:
+                await pool.release_run(run_id)
+            walls.append(time.perf_counter() - t0)
+            summaries.append(tracer.run_summary(run_id))
+    finally:
+        for t in tasks:
+            t.cancel()
+        await pool.close()
+
+    phases = {}
+    for s in summaries:
+        for name, seconds in s["spans"].items():
+            phases.setdefault(name, []).append(seconds)
+
+    print(f"\n{args.runs} runs, {failures} failed, {llm.calls} LLM calls")
+    print(f"decision cache    {decision_cache.stats()}")
+    print(f"{'phase':>18} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, values in sorted(phases.items(), key=lambda kv: -statistics.median(kv[1])):
+        values = sorted(values)
+        print(
+            f"{name:>18} {len(values):>4} "
+            f"{pct(values, 50) * 1000:>9.1f} {pct(values, 95) * 1000:>9.1f} {pct(values, 99) * 1000:>9.1f}"
+        )
+
+    machine = sum(s["machine_s"] for s in summaries)
+    print(f"\nwall total        {sum(walls):.2f}s  (human {sum(s['human_s'] for s in summaries):.2f}s)")
+    steps = llm.calls + decision_cache.hits
+    print(f"steps/sec         {steps / machine if machine else 0:.2f}  (per second of machine time)")
+    print(f"peak RSS python   {MemoryWatch.self_peak() / 2**20:.1f} MiB")
+    print(f"peak RSS browser  {watch.browser_peak / 2**20:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the payment graph.")
+    parser.add_argument("-n", "--runs", type=int, default=20)
+    parser.add_argument("--cold", action="store_true", help="launch a fresh browser for every run")
+    parser.add_argument("--no-replay", action="store_true", help="empty replay cache per run (LLM path only)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="don't answer agent steps from the decision cache")
+    parser.add_argument("--human-delay", type=float, default=0.0, help="seconds before each checkpoint is answered")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--recipient", default="vansh")
+    parser.add_argument("--amount", default="500")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--trace", action="store_true", help="also write spans to traces.jsonl")
+    args = parser.parse_args()
+
+    server = serve_mock_bank()
+    os.environ["DUMMY_BANK_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("BROWSER_USE_API_KEY", "offline-bench")
+    os.environ.setdefault("FINAGENT_REPLAY_DIR", tempfile.mkdtemp(prefix="bench-replay-"))
+    os.environ.setdefault("FINAGENT_LLM_CACHE_DIR", tempfile.mkdtemp(prefix="bench-llm-"))
+    # The mock bank's logins and recipients must not end up in (or come
+    # from) the real vault and directory
+    os.environ.setdefault("FINAGENT_VAULT_DIR", tempfile.mkdtemp(prefix="bench-vault-"))
+    os.environ.setdefault("FINAGENT_RECIPIENTS_FILE", os.path.join(tempfile.mkdtemp(prefix="bench-recipients-"), "recipients.json"))
+    if not args.trace:
+        os.environ["FINAGENT_TRACE_FILE"] = ""
+
+    try:
+        asyncio.run(bench(args))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -82,55 +82,129 @@
 
 
 # browser_actions.py
+# browser_use is imported inside the functions: it pulls in the whole
+# browser/LLM stack, which commands like `cli.py parse` never need.
+from __future__ import annotations
+
 import os
-from dotenv import load_dotenv
-from browser_use import Agent
-from prompt_templates import BASE_RULES, DEFAULT_URL
+from typing import TYPE_CHECKING
+
+from llm_cache import CachedLLM
+from progress import ProgressMonitor, policy_for
+from prompt_templates import DEFAULT_URL, TEMPLATES, render_task
+from recipients import directory
+from replay_cache import Untemplatable, normalise_intent, page_fingerprint, replay_cache
+from tracing import tracer
+
+if TYPE_CHECKING:
+    from browser_use import Agent, Browser
+
+# Chat model for every agent below; None = browser_use default (ChatBrowserUse).
+# bench_flow.py swaps in a scripted model.
+llm = None
+
 
-load_dotenv()
+def require_api_key():
+    if llm is None and not os.getenv("BROWSER_USE_API_KEY"):
+        raise RuntimeError("BROWSER_USE_API_KEY not set")
 
-if not os.getenv("BROWSER_USE_API_KEY"):
-    raise RuntimeError("BROWSER_USE_API_KEY not set")
 
+def _agent(task: str, browser: Browser) -> Agent:
+    from browser_use import Agent, ChatBrowserUse
 
-async def open_site_only():
+    require_api_key()
+    # Steps on pages seen before are answered from the decision cache
+    cached = CachedLLM(llm or ChatBrowserUse())
+    agent = Agent(task=task, browser=browser, llm=cached)
+    cached.watch(agent)
+    return agent
+
+
+async def open_site_only(browser: Browser):
     """
     PHASE 1
     Opens site and ENDS.
     Human logs in manually.
+    Skipped when the warm session is already on the site.
     """
-    agent = Agent(
-        task=f"""
-Open {DEFAULT_URL}.
-
-Rules:
-- ONLY open the page
-- Do NOT log in
-- Do NOT sign up
-- End immediately
-"""
-    )
-    await agent.run()
-
-
-async def wait_for_dashboard_and_pay(name: str, amount: str):
+    url = await browser.get_current_page_url()
+    if url.startswith(DEFAULT_URL):
+        return
+
+    agent = _agent(task=TEMPLATES["OPEN"].render(), browser=browser)
+    monitor = ProgressMonitor(policy_for("OPEN"))
+    await agent.run(max_steps=monitor.policy.hard, on_step_end=monitor.on_step_end)
+    monitor.raise_if_stopped()
+
+
+async def wait_for_dashboard_and_pay(
+    browser: Browser,
+    name: str,
+    amount: str,
+    category: str = "TRANSFER",
+    mobile: str = None,
+    consumer_number: str = None,
+):
     """
     PHASE 2
     Assumes user already logged in.
+    Replays a recorded trajectory for this recipient when the dashboard
+    looks the same as last time; otherwise (or if replay fails) the LLM drives.
     """
-    agent = Agent(
-        task=f"""
-{BASE_RULES}
-
-You are already logged in.
-
-Steps:
-1. Confirm dashboard is visible (Hello / Balance / Pay)
-2. Click Pay / Send Money
-3. Select recipient "{name}"
-4. Enter amount "{amount}"
-5. Proceed UNTIL PIN screen
-6. STOP immediately when PIN appears
-"""
+    intent = normalise_intent(category, recipient=name or "", mobile=mobile or "", consumer=consumer_number or "")
+    # Everything the actions may type; replay_cache refuses runs where one
+    # of these is left in as a literal
+    params = {
+        k: v
+        for k, v in {"amount": amount, "recipient": name, "mobile": mobile, "consumer": consumer_number}.items()
+        if v
+    }
+    with tracer.span("page_fingerprint"):
+        fingerprint = await page_fingerprint(browser)
+
+    upi_id = None
+    if category == "TRANSFER" and name:
+        with tracer.span("recipient_lookup"):
+            # Only an exact hit: the agent would search by this id blindly
+            known = await directory.lookup(browser, name, exact=True)
+        upi_id = known and known["upiId"]
+
+    task, template = render_task(
+        category,
+        recipient=name,
+        upi_id=upi_id,
+        amount=amount,
+        mobile=mobile or "as already saved",
+        consumer_number=consumer_number or "as already saved",
     )
-    await agent.run()
+    tokens = template.check_budget(task)
+    agent = _agent(task=task, browser=browser)
+
+    cached = replay_cache.load(intent, fingerprint, params)
+    if cached is not None:
+        from browser_use.agent.views import AgentHistoryList
+
+        try:
+            history = AgentHistoryList.load_from_dict(cached, agent.AgentOutput)
+            with tracer.span("replay"):
+                await agent.rerun_history(
+                    history,
+                    max_retries=1,
+                    skip_failures=False,
+                    delay_between_actions=0.2,
+                )
+            print("⚡ Replayed cached payment flow.")
+            return
+        except Exception as e:
+            print(f"↩️  Cached flow no longer matches ({e}); using the LLM.")
+            replay_cache.invalidate(intent, fingerprint)
+
+    monitor = ProgressMonitor(policy_for(category))
+    with tracer.span("llm_agent", category=category, prompt=template.id, prompt_tokens=tokens):
+        history = await agent.run(max_steps=monitor.policy.hard, on_step_end=monitor.on_step_end)
+    monitor.raise_if_stopped()
+    if history.is_done() and not any(history.errors()):
+        try:
+            replay_cache.store(intent, fingerprint, history.model_dump(), params)
+        except Untemplatable as e:
+            print(f"📼 Not caching this flow for replay ({e}).")
@@ -0,0 +1,114 @@
+# browser_pool.py
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional
+
+if TYPE_CHECKING:
+    from browser_use import Browser
+
+
+class BrowserPool:
+    """
+    Keeps browsers warm between workflow phases and user commands.
+
+    acquire() hands out an idle browser if one is still alive,
+    otherwise launches a new one. release() parks it for the next run
+    (up to max_idle), so the human's login survives across commands.
+    Browsers never released (failed runs) are still killed by close().
+    """
+
+    def __init__(self, max_idle: int = 1, headless: bool = False, isolated: bool = False):
+        self.max_idle = max_idle
+        self.headless = headless
+        # isolated=True gives every browser its own temp profile, so many
+        # can run side by side (the default profile dir can't be shared).
+        self.isolated = isolated
+        self._idle: List[Browser] = []
+        # keyed by run_id, else id(): browser sessions are pydantic models, not hashable
+        self._leased: Dict[Hashable, Browser] = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, run_id: Optional[str] = None) -> Browser:
+        async with self._lock:
+            while self._idle:
+                browser = self._idle.pop()
+                if await self._alive(browser):
+                    self._leased[run_id or id(browser)] = browser
+                    return browser
+                await self._close(browser)
+
+        from browser_use import Browser
+
+        if self.isolated:
+            browser = Browser(headless=self.headless, keep_alive=True, user_data_dir=None)
+        else:
+            browser = Browser(headless=self.headless, keep_alive=True)
+        await browser.start()
+        self._leased[run_id or id(browser)] = browser
+        return browser
+
+    async def attach(self, run_id: str, cdp_url: Optional[str]) -> Optional[Browser]:
+        """
+        Lease run_id the browser already listening on cdp_url (e.g. one
+        left running by a process that died). None when it isn't reachable.
+        """
+        if not cdp_url:
+            return None
+        from browser_use import Browser
+
+        browser = Browser(cdp_url=cdp_url, keep_alive=True)
+        try:
+            await browser.start()
+        except Exception:
+            return None
+        if not await self._alive(browser):
+            return None
+        async with self._lock:
+            self._leased[run_id] = browser
+        return browser
+
+    def leased(self, run_id: str) -> Optional[Browser]:
+        return self._leased.get(run_id)
+
+    async def release(self, browser: Optional[Browser]):
+        if browser is None:
+            return
+        async with self._lock:
+            for key, leased in list(self._leased.items()):
+                if leased is browser:
+                    del self._leased[key]
+            if len(self._idle) < self.max_idle and await self._alive(browser):
+                self._idle.append(browser)
+                return
+        await self._close(browser)
+
+    async def release_run(self, run_id: str):
+        """Release whatever browser run_id still holds (e.g. after a failed run)."""
+        await self.release(self._leased.get(run_id))
+
+    async def close(self):
+        async with self._lock:
+            browsers = self._idle + list(self._leased.values())
+            self._idle, self._leased = [], {}
+        for browser in browsers:
+            await self._close(browser)
+
+    @staticmethod
+    async def _alive(browser: Browser) -> bool:
+        try:
+            await browser.get_current_page_url()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    async def _close(browser: Browser):
+        try:
+            await browser.kill()
+        except Exception:
+            pass
+
+
+# One pool per process
+pool = BrowserPool()
@@ -0,0 +1,113 @@
+# checkpointing.py
+"""
+Durable LangGraph checkpoints in local SQLite.
+
+Each finished node writes a checkpoint under thread_id = run_id, so a
+run whose process died (typically while parked at the PIN) can carry on
+from where it stopped instead of starting over at open_site:
+
+    python cli.py resume <run_id>
+
+The live Browser is never serialised: the serializer drops browser_use
+objects, and the state keeps what is needed to get a browser back
+(cdp_url, page_url). On resume we first re-attach to the still-running
+Chrome over CDP. If it's gone, a fresh browser opens at the saved URL
+and the run goes back through open_site (session vault login) and the
+pay step: the PIN screen itself can't be rebuilt from a URL.
+
+Checkpoints of finished runs are deleted. FINAGENT_CHECKPOINT_DB=""
+turns checkpointing off.
+
+The supervisor's workers all write to the same database, so it runs in
+WAL mode (readers don't block the writer) and a writer waits up to
+FINAGENT_CHECKPOINT_BUSY_MS for another process's write to finish
+instead of failing with "database is locked".
+
+Imported only by the commands that build a graph (LangGraph is heavy).
+"""
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+import aiosqlite
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from browser_pool import pool
+
+CHECKPOINT_DB = os.getenv("FINAGENT_CHECKPOINT_DB", str(Path(__file__).with_name(".checkpoints.sqlite")))
+BUSY_TIMEOUT_MS = int(os.getenv("FINAGENT_CHECKPOINT_BUSY_MS", "10000"))
+
+
+def _strip(obj):
+    # Live browser_use objects (the Browser in state["browser"]) become None
+    if type(obj).__module__.startswith("browser_use"):
+        return None
+    if type(obj) is dict:
+        return {k: _strip(v) for k, v in obj.items()}
+    if type(obj) in (list, tuple):
+        return type(obj)(_strip(v) for v in obj)
+    return obj
+
+
+class BrowserlessSerializer(JsonPlusSerializer):
+    def dumps_typed(self, obj):
+        return super().dumps_typed(_strip(obj))
+
+
+@asynccontextmanager
+async def open_checkpointer(path: str = CHECKPOINT_DB):
+    """AsyncSqliteSaver on path, or None when checkpointing is off."""
+    if not path:
+        yield None
+        return
+    async with aiosqlite.connect(path) as conn:
+        await conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        await conn.execute("PRAGMA journal_mode = WAL")
+        saver = AsyncSqliteSaver(conn, serde=BrowserlessSerializer())
+        await saver.setup()
+        yield saver
+
+
+def config_for(run_id: str) -> dict:
+    return {"configurable": {"thread_id": run_id}}
+
+
+async def forget(checkpointer: Optional[AsyncSqliteSaver], run_id: str):
+    if checkpointer is not None:
+        await checkpointer.adelete_thread(run_id)
+
+
+async def reattach(graph, run_id: str) -> bool:
+    """
+    Get run_id's checkpoint ready to continue: its browser leased to it
+    again (re-attached or new), and the graph rewound to after start when
+    the old page is lost. False when there is nothing left to run (no
+    checkpoint, or the run already finished).
+    """
+    config = config_for(run_id)
+    snapshot = await graph.aget_state(config)
+    if not snapshot.next:
+        return False
+    values, next_node = snapshot.values, snapshot.next[0]
+    if next_node in ("__start__", "parse", "rejected", "start"):
+        # No browser yet (__start__: only the input was saved, parse
+        # hasn't run); the start node will launch one
+        return True
+
+    if await pool.attach(run_id, values.get("cdp_url")) is not None:
+        print(f"🔌 Re-attached to the run's browser at {values['cdp_url']}.")
+        return True
+
+    browser = await pool.acquire(run_id)
+    if next_node in ("open_site", "done"):
+        return True
+    print("🆕 The run's browser is gone; opening a new one.")
+    if next_node != "pin" and values.get("page_url"):
+        page = await browser.must_get_current_page()
+        await page.goto(values["page_url"])
+    # Continue as if start just finished: open_site restores the saved
+    # login (or the human logs in again), then the pay step runs again
+    await graph.aupdate_state(config, {"cdp_url": browser.cdp_url}, as_node="start")
+    return True
@@ -0,0 +1,295 @@
+# cli.py
+"""
+FinAgent command line.
+
+    python cli.py chat                         # interactive loop (same as agent.py)
+    python cli.py run "Pay vansh 500"          # one command, then exit
+    python cli.py parse "Pay vansh 500"        # intent only, no browser
+    python cli.py batch payouts.csv            # see batch.py
+    python cli.py serve --port 8100            # HTTP service (server.py)
+    python cli.py supervise --workers 4        # same API over N worker processes
+    python cli.py resume 3f9c2a1b7d4e          # continue an interrupted run
+    python cli.py check-startup                # import-time budget
+    python cli.py prompts                      # prompt token counts vs budget
+    python cli.py logout                       # drop the saved login (session vault)
+
+Only argparse and the stdlib load at startup; browser_use, LangGraph,
+FastAPI etc. are imported by the subcommand that needs them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+IMPORT_BUDGET = float(os.getenv("FINAGENT_IMPORT_BUDGET", "0.3"))
+
+# What a browserless code path imports, and what it must not drag in
+_LIGHT_MODULES = ("cli", "workflow", "state", "intent", "batch", "browser_actions", "hitl")
+_HEAVY_MODULES = ("browser_use", "langgraph", "fastapi", "httpx")
+
+
+def _require_key():
+    if not os.getenv("BROWSER_USE_API_KEY"):
+        sys.exit("BROWSER_USE_API_KEY not found. Check .env file.")
+
+
+async def _run_one(graph, checkpointer, run_id: str, state, console):
+    """Run (state) or resume (state None) run_id through the graph."""
+    from browser_pool import pool
+    from checkpointing import config_for, forget
+    from hitl import resolve_from_console
+    from tracing import tracer
+
+    # ENTER on the console releases whichever checkpoint is waiting
+    resolver = asyncio.create_task(resolve_from_console(console))
+    try:
+        with tracer.span("run", run_id=run_id):
+            await graph.ainvoke(state, config_for(run_id))
+        print(f"⏱️  {tracer.run_summary(run_id)}")
+        await forget(checkpointer, run_id)
+    except Exception as e:
+        print(f"\n❌ Run failed: {e}")
+        if checkpointer is not None:
+            print(f"👉 Resume with: python cli.py resume {run_id}")
+    finally:
+        resolver.cancel()
+        await pool.release_run(run_id)
+
+
+async def _session(commands, mode: str, resume: str = None):
+    """Run the given commands (or resume one run), or read commands from the console."""
+    from browser_pool import pool
+    from checkpointing import open_checkpointer, reattach
+    from hitl import ConsoleInput
+    from state import new_state
+    from tracing import tracer
+    from workflow import build_graph
+
+    console = ConsoleInput()
+    console.start()
+
+    async def run(command):
+        run_id = uuid.uuid4().hex[:12]
+        print(f"🆔 Run {run_id}")
+        await _run_one(graph, checkpointer, run_id, new_state(command, run_id=run_id, pay_mode=mode), console)
+
+    async with open_checkpointer() as checkpointer:
+        graph = build_graph(checkpointer)
+        try:
+            if resume is not None:
+                if checkpointer is None:
+                    sys.exit("Checkpointing is off (FINAGENT_CHECKPOINT_DB is empty).")
+                if not await reattach(graph, resume):
+                    print(f"Nothing to resume for run {resume}.")
+                    return
+                await _run_one(graph, checkpointer, resume, None, console)
+                return
+
+            if commands is not None:
+                for command in commands:
+                    await run(command)
+                return
+
+            while True:
+                user_command = await console.readline("> ")
+
+                if user_command is None or user_command.strip().lower() in ["exit", "quit"]:
+                    break
+                user_command = user_command.strip()
+                if not user_command:
+                    continue
+                await run(user_command)
+        finally:
+            await pool.close()
+            tracer.close()
+
+
+def cmd_chat(args):
+    _require_key()
+    print("\n🤖 FinAgent — Human-in-the-Loop Mode")
+    print("Agent will NEVER act at auth or PIN without consent.")
+    print("Type 'exit' to quit.\n")
+    asyncio.run(_session(None, args.mode))
+
+
+def cmd_run(args):
+    _require_key()
+    asyncio.run(_session([args.command], args.mode))
+
+
+def cmd_resume(args):
+    _require_key()
+    # mode, user etc. come back with the checkpointed state
+    asyncio.run(_session(None, None, resume=args.run_id))
+
+
+def cmd_parse(args):
+    from intent import IntentError, parse_intent
+
+    try:
+        intent = asyncio.run(parse_intent(args.command, use_llm=args.llm))
+    except IntentError as e:
+        sys.exit(f"⛔ {e}")
+    print(json.dumps(intent, indent=2))
+
+
+def cmd_batch(args):
+    _require_key()
+    from batch import run_batch
+
+    out = args.out or args.input.with_suffix(".results.jsonl")
+    asyncio.run(run_batch(args.input, out, args.mode))
+
+
+def cmd_serve(args):
+    import uvicorn
+
+    uvicorn.run("server:app", host=args.host, port=args.port)
+
+
+def cmd_supervise(args):
+    import uvicorn
+
+    # Read by supervisor.py at import (and by the spawned workers)
+    os.environ["FINAGENT_WORKERS"] = str(args.workers)
+    os.environ["FINAGENT_WORKER_CONCURRENCY"] = str(args.per_worker)
+    uvicorn.run("supervisor:app", host=args.host, port=args.port)
+
+
+def measure_startup(repeat: int = 3):
+    """
+    Import the browserless modules in a fresh interpreter, repeat times.
+    Returns (best seconds, heavy dependencies that got loaded).
+    """
+    probe = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {', '.join(_LIGHT_MODULES)}\n"
+        "print(time.perf_counter() - t)\n"
+        f"print(','.join(m for m in {_HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    cwd = Path(__file__).resolve().parent
+    best, heavy = float("inf"), []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", probe], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        best = min(best, float(out[0]))
+        heavy = out[1].split(",") if len(out) > 1 and out[1] else []
+    return best, heavy
+
+
+def cmd_check_startup(args):
+    """Fail if the browserless imports take longer than the budget or load a heavy dependency."""
+    best, heavy = measure_startup(args.repeat)
+
+    print(f"import {', '.join(_LIGHT_MODULES)}: {best * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    failed = False
+    if heavy:
+        print(f"❌ eagerly imported: {', '.join(heavy)}")
+        failed = True
+    if best > args.budget:
+        print("❌ over budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ ok")
+
+
+def cmd_prompts(args):
+    from prompt_templates import PROMPT_TOKEN_BUDGET, SAMPLE_VALUES, TEMPLATES, count_tokens
+
+    budget = args.budget or PROMPT_TOKEN_BUDGET
+    print(f"{'category':<10} {'template':<18} {'digest':<9} {'prefix':>7} {'rendered':>9}")
+    over = False
+    for category, template in TEMPLATES.items():
+        rendered = count_tokens(template.render(**{p: SAMPLE_VALUES[p] for p in template.params}))
+        over |= rendered > budget
+        flag = "  ❌" if rendered > budget else ""
+        print(f"{category:<10} {template.id:<18} {template.digest:<9} "
+              f"{count_tokens(template.prefix):>7} {rendered:>9}{flag}")
+    print(f"budget {budget} tokens")
+    if over:
+        sys.exit(1)
+
+
+def cmd_logout(args):
+    from session_vault import DEFAULT_USER, vault
+
+    vault.forget(args.user)
+    print(f"🔐 Saved login for {args.user or DEFAULT_USER!r} removed.")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="finagent", description="Human-in-the-loop banking agent.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    modes = {"choices": ["ui", "api"], "default": os.getenv("FINAGENT_PAY_MODE", "ui"),
+             "help": "api: resolve transfers over the bank API, browser only for the PIN"}
+
+    p = sub.add_parser("chat", help="interactive loop")
+    p.add_argument("--mode", **modes)
+    p.set_defaults(func=cmd_chat)
+
+    p = sub.add_parser("run", help="run one command and exit")
+    p.add_argument("command")
+    p.add_argument("--mode", **modes)
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("resume", help="continue a run from its last checkpoint")
+    p.add_argument("run_id")
+    p.set_defaults(func=cmd_resume)
+
+    p = sub.add_parser("parse", help="show the parsed intent (no browser)")
+    p.add_argument("command")
+    p.add_argument("--llm", action="store_true", help="fall back to the LLM parser")
+    p.set_defaults(func=cmd_parse)
+
+    p = sub.add_parser("batch", help="run a CSV/JSONL of payouts in one session")
+    p.add_argument("input", type=Path)
+    p.add_argument("--out", type=Path, help="results JSONL (default: <input>.results.jsonl)")
+    p.add_argument("--mode", **modes)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("serve", help="HTTP task service")
+    p.add_argument("--host", default=os.getenv("FINAGENT_HOST", "127.0.0.1"))
+    p.add_argument("--port", type=int, default=int(os.getenv("FINAGENT_PORT", "8100")))
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("supervise", help="HTTP task service sharded over worker processes")
+    p.add_argument("--workers", type=int, default=int(os.getenv("FINAGENT_WORKERS", str(os.cpu_count() or 1))))
+    p.add_argument("--per-worker", type=int, default=int(os.getenv("FINAGENT_WORKER_CONCURRENCY", "5")),
+                   help="concurrent runs per worker")
+    p.add_argument("--host", default=os.getenv("FINAGENT_HOST", "127.0.0.1"))
+    p.add_argument("--port", type=int, default=int(os.getenv("FINAGENT_PORT", "8100")))
+    p.set_defaults(func=cmd_supervise)
+
+    p = sub.add_parser("check-startup", help="fail if browserless imports exceed the time budget")
+    p.add_argument("--budget", type=float, default=IMPORT_BUDGET, help="seconds")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=cmd_check_startup)
+
+    p = sub.add_parser("prompts", help="token counts of the task prompt templates")
+    p.add_argument("--budget", type=int, default=None, help="tokens (default FINAGENT_PROMPT_BUDGET)")
+    p.set_defaults(func=cmd_prompts)
+
+    p = sub.add_parser("logout", help="forget the saved login for a user")
+    p.add_argument("--user", help="default: FINAGENT_USER")
+    p.set_defaults(func=cmd_logout)
+
+    return parser
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
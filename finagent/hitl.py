@@ -0,0 +1,129 @@
+# hitl.py
+"""
+Awaitable human-in-the-loop checkpoints.
+
+A graph node parks on a (run_id, name) checkpoint:
+
+    await checkpoints.wait(state["run_id"], "pin", timeout=600)
+
+and anything can release it without touching the event loop:
+
+    checkpoints.resolve(run_id, "pin")          # HTTP handler, test, ...
+    await resolve_from_console(console)         # CLI: ENTER resolves
+
+Other runs keep going while one waits.
+"""
+import asyncio
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from tracing import tracer
+
+HUMAN_TIMEOUT = float(os.getenv("FINAGENT_HUMAN_TIMEOUT", "600"))
+
+
+class HumanTimeout(Exception):
+    """Nobody resolved a checkpoint in time."""
+
+
+class Checkpoints:
+    def __init__(self):
+        # insertion order == waiting order
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def wait(self, run_id: str, name: str, timeout: Optional[float] = HUMAN_TIMEOUT) -> Any:
+        key = (run_id, name)
+        fut = self._pending.get(key)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._pending[key] = fut
+
+        try:
+            with tracer.span("human_wait", kind="human", run_id=run_id, checkpoint=name):
+                return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            raise HumanTimeout(f"No human response for '{name}' in run {run_id} after {timeout:.0f}s")
+        finally:
+            if self._pending.get(key) is fut:
+                del self._pending[key]
+
+    def resolve(self, run_id: str, name: str, value: Any = True) -> bool:
+        """Release a waiting checkpoint. False if nothing is waiting there."""
+        fut = self._pending.get((run_id, name))
+        if fut is None or fut.done():
+            return False
+        fut.set_result(value)
+        return True
+
+    def resolve_any(self, run_id: Optional[str] = None, value: Any = True) -> Optional[Tuple[str, str]]:
+        """Release the oldest waiting checkpoint (optionally of one run)."""
+        for key in self.pending(run_id):
+            if self.resolve(*key, value=value):
+                return key
+        return None
+
+    def cancel(self, run_id: str):
+        for key in self.pending(run_id):
+            fut = self._pending.get(key)
+            if fut is not None and not fut.done():
+                fut.cancel()
+
+    def pending(self, run_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        return [k for k in self._pending if run_id is None or k[0] == run_id]
+
+
+# One registry per process
+checkpoints = Checkpoints()
+
+
+class ConsoleInput:
+    """
+    One daemon thread reading stdin into an asyncio.Queue.
+
+    Every consumer (command prompt, checkpoint resolver) awaits lines from
+    the queue, so nothing ever calls input() on the event loop and a
+    cancelled reader can't swallow the next line.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._loop = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        for line in sys.stdin:
+            self._loop.call_soon_threadsafe(self.queue.put_nowait, line.rstrip("\n"))
+        self._loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    async def readline(self, prompt: str = "") -> Optional[str]:
+        """Next stdin line, or None on EOF."""
+        if prompt:
+            print(prompt, end="", flush=True)
+        return await self.queue.get()
+
+
+async def resolve_from_console(console: ConsoleInput, registry: Checkpoints = checkpoints):
+    """
+    CLI resolver: each line releases the oldest waiting checkpoint.
+    "<name>" or "<run_id> <name>" targets a specific one.
+    """
+    while True:
+        line = await console.readline()
+        if line is None:
+            return
+
+        parts = line.split()
+        if len(parts) == 2:
+            registry.resolve(parts[0], parts[1])
+        elif len(parts) == 1:
+            for run_id, name in registry.pending():
+                if name == parts[0]:
+                    registry.resolve(run_id, name)
+                    break
+        else:
+            registry.resolve_any()
@@ -0,0 +1,252 @@
+# intent.py
+"""
+Local intent parser: turns a free-text command into typed fields before
+any browser is started.
+
+    parse_command("Pay vansh 500 INR using UPI")
+    -> {"category": "TRANSFER", "recipient": "vansh", "amount": "500", "currency": "INR", ...}
+
+Rule/grammar based, no I/O. Commands the rules can't read raise
+IntentError; parse_intent() can optionally ask the LLM instead
+(FINAGENT_INTENT_LLM=1), with answers cached per normalised command.
+
+This decides how much money goes where, so anything ambiguous is
+rejected rather than guessed: more than one number that could be the
+amount, a signed amount, a number glued to letters ("5OO"), a
+recipient name with digits or a sign in it, or more than one recipient
+("rahul and vansh", "rahul, vansh").
+"""
+import os
+import re
+from collections import OrderedDict
+from typing import Literal, Optional, TypedDict
+
+Category = Literal["TRANSFER", "RECHARGE", "BILL", "GOLD"]
+
+
+class Intent(TypedDict):
+    category: Category
+    recipient: Optional[str]
+    amount: str
+    currency: str
+    mobile: Optional[str]
+    consumer_number: Optional[str]
+
+
+class IntentError(ValueError):
+    """Command can't be turned into a safe, complete task."""
+
+
+MAX_AMOUNT = 100000
+
+_CURRENCY = r"(?:₹|rs\.?|inr|rupees?)"
+# A whole token: nothing word-like (or a decimal point) glued on either
+# side, except a currency prefix such as "₹500" / "Rs.500"
+_AMOUNT_RE = re.compile(
+    rf"(?:{_CURRENCY}\s*)?(?:(?<=₹)|(?<=rs)|(?<=rs\.)|(?<=inr)|(?<![\w.]))"
+    rf"(\d{{1,3}}(?:,\d{{2,3}})+|\d+)(\.\d{{1,2}})?(?!\w|[.,]\d)(?:\s*{_CURRENCY}\b)?",
+    re.IGNORECASE,
+)
+_SIGN = "+-−"
+_MOBILE_RE = re.compile(r"(?<!\d)(?:\+?91[\s-]?)?([6-9]\d{9})(?!\d)")
+_CONSUMER_RE = re.compile(r"(?:consumer(?:\s*(?:no\.?|number|id))?|account\s*number)\s*[:#]?\s*(\d{6,16})", re.IGNORECASE)
+_UPI_RE = re.compile(r"[\w.-]+@[\w.-]+")
+
+_CATEGORY_WORDS = [
+    ("RECHARGE", re.compile(r"\b(recharge|top\s?-?up|prepaid)\b", re.I)),
+    ("BILL", re.compile(r"\b(electricity|bill|power)\b", re.I)),
+    ("GOLD", re.compile(r"\bgold\b", re.I)),
+    ("TRANSFER", re.compile(r"\b(pay|send|transfer|give)\b", re.I)),
+]
+
+# Words that are never part of a recipient name
+_FILLER = {
+    "pay", "send", "transfer", "give", "to", "please", "money", "amount", "of",
+    "rs", "rs.", "inr", "rupee", "rupees", "₹", "now", "the", "a", "an", "my", "me",
+}
+# Everything after one of these is a clause about *how*, not *who*
+_CLAUSE_BREAK = {"using", "via", "with", "through", "by", "for", "from", "on", "note"}
+# ... or *when* / politeness: they end the name ("vansh tomorrow")
+_TRAILING = {"now", "today", "tonight", "tomorrow", "later", "asap", "immediately", "please", "pls", "thanks"}
+# Joining two recipients: one payment never goes to several people
+_CONJUNCTIONS = {"and", "or", "&", "plus", "also"}
+
+
+def _find_amount(text: str) -> Optional[str]:
+    found = []
+    for m in _AMOUNT_RE.finditer(text):
+        digits = m.group(1).replace(",", "")
+        if len(digits) > 7:
+            continue  # phone / account numbers
+        before = text[:m.start()].rstrip()[-1:]
+        if before and before in _SIGN:
+            raise IntentError(f"Signed amount in: {text!r}")
+        found.append(digits + (m.group(2) or ""))
+    if not found:
+        return None
+    if len(found) > 1:
+        raise IntentError(f"More than one amount ({', '.join(found)}) in: {text!r}")
+    amount = found[0]
+    return amount[:-3] if amount.endswith(".00") else amount
+
+
+def _check_recipient(recipient: str, source: str):
+    if _UPI_RE.fullmatch(recipient):
+        return
+    if any(c.isdigit() for c in recipient) or any(w[0] in _SIGN for w in recipient.split()):
+        raise IntentError(f"Recipient {recipient!r} has digits or a sign in: {source!r}")
+    if "," in recipient or any(w.lower() in _CONJUNCTIONS for w in recipient.split()):
+        raise IntentError(f"More than one recipient ({recipient!r}) in: {source!r}; send one payment at a time")
+
+
+def _recipient(command: str, amount: Optional[str]) -> Optional[str]:
+    upi = _UPI_RE.search(command)
+    if upi:
+        return upi.group(0)
+
+    words = []
+    comma = False
+    for raw in command.split():
+        w = raw.strip(",.!?")
+        lw = w.lower()
+        if words and (lw in _CLAUSE_BREAK or lw in _TRAILING):
+            break
+        if words and lw in _CONJUNCTIONS:
+            raise IntentError(f"More than one recipient in: {command!r}; send one payment at a time")
+        if not w or lw in _FILLER or _AMOUNT_RE.fullmatch(w) or (amount and lw.replace(",", "") == amount):
+            continue
+        if comma:
+            # "rahul, vansh": a second name after a comma
+            raise IntentError(f"More than one recipient in: {command!r}; send one payment at a time")
+        words.append(w)
+        comma = raw.rstrip(".!?").endswith(",")
+    return " ".join(words) or None
+
+
+def parse_command(command: str) -> Intent:
+    text = " ".join((command or "").split())
+    if not text:
+        raise IntentError("Empty command")
+    # UPI ids may contain digits; they are never the amount
+    numbers = _UPI_RE.sub(" ", text)
+
+    category = next((c for c, rx in _CATEGORY_WORDS if rx.search(text)), None)
+    if category is None:
+        raise IntentError(f"Can't tell what to do from: {text!r}")
+
+    mobile = consumer = recipient = None
+
+    if category == "RECHARGE":
+        m = _MOBILE_RE.search(numbers)
+        mobile = m.group(1) if m else None
+    elif category == "BILL":
+        m = _CONSUMER_RE.search(numbers)
+        consumer = m.group(1) if m else None
+    if mobile or consumer:
+        # The whole match, so "+91" isn't read as a signed 91
+        numbers = numbers[:m.start()] + " " + numbers[m.end():]
+
+    amount = _find_amount(numbers)
+    if amount is None:
+        raise IntentError(f"No amount found in: {text!r}")
+
+    if category == "TRANSFER":
+        recipient = _recipient(text, amount)
+
+    return make_intent(category, amount, recipient, mobile, consumer, source=text)
+
+
+def make_intent(
+    category: str,
+    amount: str,
+    recipient: Optional[str] = None,
+    mobile: Optional[str] = None,
+    consumer_number: Optional[str] = None,
+    source: str = "",
+) -> Intent:
+    """Build an Intent from already-split fields, with the same safety checks."""
+    category = (category or "TRANSFER").strip().upper()
+    if category not in ("TRANSFER", "RECHARGE", "BILL", "GOLD"):
+        raise IntentError(f"Unknown category {category!r}")
+
+    amount = str(amount or "").replace(",", "").strip()
+    try:
+        value = float(amount)
+    except ValueError:
+        raise IntentError(f"Bad amount {amount!r} in: {source!r}")
+    if not 0 < value <= MAX_AMOUNT:
+        raise IntentError(f"Amount {amount} outside allowed range (0, {MAX_AMOUNT}]")
+
+    recipient = (recipient or "").strip() or None
+    if category == "TRANSFER":
+        if not recipient:
+            raise IntentError(f"No recipient found in: {source!r}")
+        _check_recipient(recipient, source)
+
+    return {
+        "category": category,
+        "recipient": recipient if category == "TRANSFER" else None,
+        "amount": amount,
+        "currency": "INR",
+        "mobile": mobile or None,
+        "consumer_number": consumer_number or None,
+    }
+
+
+# =========================
+# Optional LLM fallback
+# =========================
+USE_LLM = os.getenv("FINAGENT_INTENT_LLM") == "1"
+
+_llm_cache: "OrderedDict[str, Intent]" = OrderedDict()
+_LLM_CACHE_SIZE = 256
+
+
+async def _llm_parse(text: str) -> Intent:
+    from pydantic import BaseModel
+    from browser_use import ChatBrowserUse
+    from browser_use.llm.messages import SystemMessage, UserMessage
+
+    class ParsedIntent(BaseModel):
+        category: Category
+        recipient: Optional[str] = None
+        amount: str
+        mobile: Optional[str] = None
+        consumer_number: Optional[str] = None
+
+    result = await ChatBrowserUse().ainvoke(
+        [
+            SystemMessage(content="Extract a banking instruction. Amounts are INR digits only."),
+            UserMessage(content=text),
+        ],
+        output_format=ParsedIntent,
+    )
+    parsed = result.completion
+    # Same safety checks as the local parser
+    return make_intent(
+        parsed.category,
+        parsed.amount,
+        parsed.recipient,
+        parsed.mobile,
+        parsed.consumer_number,
+        source=text,
+    )
+
+
+async def parse_intent(command: str, use_llm: bool = USE_LLM) -> Intent:
+    try:
+        return parse_command(command)
+    except IntentError:
+        if not use_llm:
+            raise
+
+    key = " ".join(command.lower().split())
+    if key in _llm_cache:
+        _llm_cache.move_to_end(key)
+        return _llm_cache[key]
+
+    intent = await _llm_parse(command)
+    _llm_cache[key] = intent
+    if len(_llm_cache) > _LLM_CACHE_SIZE:
+        _llm_cache.popitem(last=False)
+    return intent
@@ -0,0 +1,16 @@
+# llm_cache.py
+"""
+Decision cache for this app (finagent_common.llm_cache), kept in
+FINAGENT_LLM_CACHE_DIR up to FINAGENT_LLM_CACHE_MB.
+"""
+from common_env import env
+from finagent_common.llm_cache import DecisionCache
+from finagent_common.llm_cache import CachedLLM as _CachedLLM
+from tracing import tracer
+
+decision_cache = DecisionCache.from_env(env)
+
+
+class CachedLLM(_CachedLLM):
+    def __init__(self, inner, cache: DecisionCache = decision_cache):
+        super().__init__(inner, cache, tracer)
@@ -0,0 +1,16 @@
+# progress.py
+"""
+Step budgets for this app (finagent_common.progress), with
+FINAGENT_STEP_POLICY overrides.
+"""
+from typing import Optional
+
+from common_env import env
+from finagent_common import progress as _progress
+from finagent_common.progress import AgentStuck, ProgressMonitor, StepPolicy  # noqa: F401
+
+POLICIES = _progress.load_policies(env)
+
+
+def policy_for(category: Optional[str]) -> StepPolicy:
+    return _progress.policy_for(category, POLICIES)
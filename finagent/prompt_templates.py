@@ -1,5 +1,35 @@
 # prompt_templates.py
-DEFAULT_URL = "http://localhost:5173"
+"""
+Versioned task prompts for the browser agents.
+
+Every payment prompt is laid out as
+
+    BASE_RULES        identical for every task
+    steps             fixed per task type and version
+    Parameters:       the only part that changes between runs
+
+so the long prefix is byte-identical from run to run and provider-side
+prompt caching can reuse it; recipient/amount etc. only ever appear in
+the trailing block. Constants such as the bank URL are filled in once
+when the template is compiled, at import.
+
+    task, template = render_task("TRANSFER", recipient="vansh", amount="500")
+
+Bump a template's version whenever its text changes; the llm_agent span
+records which one (and its token count) ran. `python cli.py prompts`
+prints token counts per template against FINAGENT_PROMPT_BUDGET.
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+DEFAULT_URL = os.getenv("DUMMY_BANK_URL", "http://localhost:5173")
+
+# Max tokens for a rendered task prompt (the agent's own system prompt and
+# page state come on top of this)
+PROMPT_TOKEN_BUDGET = int(os.getenv("FINAGENT_PROMPT_BUDGET", "300"))
 
 BASE_RULES = f"""
 You are a banking automation agent.
@@ -11,3 +41,130 @@ STRICT RULES:
 - NEVER proceed at PIN / OTP screens
 - Prefer safety over task completion
 """
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken when installed, else words + punctuation (close enough for budgets)."""
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return len(_TOKEN_RE.findall(text))
+
+
+class PromptTemplate:
+    def __init__(self, name: str, version: int, body: str, params: Tuple[str, ...] = (), rules: bool = True):
+        self.name = name
+        self.version = version
+        self.params = params
+        # Compiled once: the static prefix never changes for this version
+        self.prefix = ((BASE_RULES if rules else "") + body.format(url=DEFAULT_URL)).strip() + "\n"
+        self.digest = hashlib.sha1(self.prefix.encode()).hexdigest()[:8]
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    def render(self, **values: Optional[str]) -> str:
+        unknown = set(values) - set(self.params)
+        if unknown:
+            raise ValueError(f"{self.id} has no parameter(s) {sorted(unknown)}")
+        if not self.params:
+            return self.prefix
+        # Parameters left as None are dropped from the block
+        lines = [f"- {p}: {values[p]}" for p in self.params if values.get(p) is not None]
+        return f"{self.prefix}\nParameters:\n" + "\n".join(lines) + "\n"
+
+    def check_budget(self, text: str, budget: int = PROMPT_TOKEN_BUDGET) -> int:
+        """Token count of a rendered prompt; warns when it is over budget."""
+        tokens = count_tokens(text)
+        if tokens > budget:
+            print(f"⚠️  Prompt {self.id} is {tokens} tokens (budget {budget})")
+        return tokens
+
+
+TEMPLATES: Dict[str, PromptTemplate] = {
+    "OPEN": PromptTemplate("open_site", 1, """
+Open {url}.
+
+Rules:
+- ONLY open the page
+- Do NOT log in
+- Do NOT sign up
+- End immediately
+""", rules=False),
+    "TRANSFER": PromptTemplate("pay_transfer", 3, """
+You are already logged in. Use the values under Parameters.
+
+Steps:
+1. Confirm dashboard is visible (Hello / Balance / Pay)
+2. Click Pay / Send Money
+3. Select the recipient (search by upi_id when it is given)
+4. Enter the amount
+5. Proceed UNTIL PIN screen
+6. STOP immediately when PIN appears
+""", params=("recipient", "upi_id", "amount")),
+    "RECHARGE": PromptTemplate("pay_recharge", 2, """
+You are already logged in. Use the values under Parameters.
+
+Steps:
+1. Confirm dashboard is visible (Hello / Balance / Pay)
+2. Click Recharge
+3. Enter the mobile number
+4. Enter the amount
+5. Proceed UNTIL PIN screen
+6. STOP immediately when PIN appears
+""", params=("mobile", "amount")),
+    "BILL": PromptTemplate("pay_bill", 2, """
+You are already logged in. Use the values under Parameters.
+
+Steps:
+1. Confirm dashboard is visible (Hello / Balance / Pay)
+2. Click Electricity
+3. Use the consumer number
+4. Enter the amount
+5. Proceed UNTIL PIN screen
+6. STOP immediately when PIN appears
+""", params=("consumer_number", "amount")),
+    "GOLD": PromptTemplate("pay_gold", 2, """
+You are already logged in. Use the values under Parameters.
+
+Steps:
+1. Confirm dashboard is visible (Hello / Balance / Pay)
+2. Click Gold
+3. Enter the amount
+4. Proceed UNTIL PIN screen
+5. STOP immediately when PIN appears
+""", params=("amount",)),
+}
+
+
+# Typical parameter values, for token counts (cli.py prompts, tests)
+SAMPLE_VALUES = {
+    "recipient": "vansh",
+    "upi_id": "vansh4821@dummy",
+    "mobile": "9876543210",
+    "consumer_number": "1234567890",
+    "amount": "500",
+}
+
+
+def template_for(category: Optional[str]) -> PromptTemplate:
+    return TEMPLATES.get((category or "").upper(), TEMPLATES["TRANSFER"])
+
+
+def render_task(category: Optional[str], **values) -> Tuple[str, PromptTemplate]:
+    """Task text for category (unknown ones get the transfer flow), plus its template."""
+    template = template_for(category)
+    values = {k: v for k, v in values.items() if k in template.params}
+    return template.render(**values), template
@@ -0,0 +1,205 @@
+# recipients.py
+"""
+Local recipient directory: name -> UPI id before any browser step.
+
+The whole user list is pulled in one request (GET /users/directory,
+falling back to /users/contacts on backends without it) using the
+human's session token, kept in memory and persisted to disk, so later
+runs start warm. Lookups are dict hits on
+
+    UPI id  >  full name  >  single name token  >  phonetic (Soundex) token
+
+with a difflib pass over the names for typos. Only an unambiguous match
+resolves; several candidates resolve to nothing and the agent picks on
+the SearchUser page as before. Callers that act on the answer without a
+human seeing the search results (the API fast path, the upi_id prompt
+parameter) ask for exact=True: UPI id or full name only, never a token,
+phonetic or typo match.
+
+Each entry expires FINAGENT_RECIPIENTS_TTL seconds after it was fetched.
+Expired entries are ignored; the directory refreshes itself in bulk once
+it is older than the TTL, and a miss does one /users/search and merges
+what it finds.
+"""
+from __future__ import annotations
+
+import difflib
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from bank_api import FastPathUnavailable, api_get, session_token
+
+if TYPE_CHECKING:
+    from browser_use import Browser
+
+DIRECTORY_FILE = Path(os.getenv("FINAGENT_RECIPIENTS_FILE", Path(__file__).with_name(".recipients.json")))
+DIRECTORY_TTL = float(os.getenv("FINAGENT_RECIPIENTS_TTL", "3600"))
+
+_SOUNDEX = {c: str(d) for d, letters in enumerate(("aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r")) for c in letters}
+
+
+def normalise_name(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9@. ]", " ", name.lower()).split())
+
+
+def soundex(word: str) -> str:
+    """Classic 4-character Soundex ("vansh" -> "v520")."""
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    code, last = word[0], _SOUNDEX[word[0]]
+    for c in word[1:]:
+        digit = _SOUNDEX[c]
+        if digit != last and digit != "0":
+            code += digit
+        if c not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+class RecipientDirectory:
+    def __init__(self, path: Path = DIRECTORY_FILE, ttl: float = DIRECTORY_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.refreshed_at = 0.0
+        # upi id -> {"name", "upiId", "fetched_at"}
+        self.entries: Dict[str, dict] = {}
+        self._names: Dict[str, Set[str]] = defaultdict(set)
+        self._tokens: Dict[str, Set[str]] = defaultdict(set)
+        self._sounds: Dict[str, Set[str]] = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    # ---- index -----------------------------------------------------------
+
+    def _add(self, name: str, upi_id: str, fetched_at: float):
+        upi = upi_id.lower()
+        self.entries[upi] = {"name": name, "upiId": upi_id, "fetched_at": fetched_at}
+        full = normalise_name(name)
+        self._names[full].add(upi)
+        for token in full.split():
+            self._tokens[token].add(upi)
+            sound = soundex(token)
+            if sound:
+                self._sounds[sound].add(upi)
+
+    def _rebuild(self, entries: List[dict]):
+        self.entries.clear()
+        self._names.clear()
+        self._tokens.clear()
+        self._sounds.clear()
+        for e in entries:
+            self._add(e["name"], e["upiId"], e["fetched_at"])
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        self.refreshed_at = data.get("refreshed_at", 0.0)
+        self._rebuild(data.get("entries", []))
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"refreshed_at": self.refreshed_at, "entries": list(self.entries.values())}))
+        os.replace(tmp, self.path)
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.refreshed_at > self.ttl
+
+    # ---- lookup ----------------------------------------------------------
+
+    def _live(self, upis) -> List[dict]:
+        cutoff = time.time() - self.ttl
+        return [self.entries[u] for u in sorted(upis) if self.entries[u]["fetched_at"] >= cutoff]
+
+    def candidates(self, query: str, exact: bool = False) -> List[dict]:
+        """
+        Live entries for query, from the most to the least exact way of
+        matching; exact=True stops after the UPI id and full name.
+        """
+        q = normalise_name(query)
+        if not q:
+            return []
+        if q in self.entries:
+            return self._live([q])
+
+        tokens = q.split()
+        lookups = [
+            lambda: self._names.get(q, ()),
+            lambda: set.intersection(*(self._tokens.get(t, set()) for t in tokens)),
+            lambda: set.intersection(*(self._sounds.get(soundex(t), set()) for t in tokens)),
+            lambda: {u for n in difflib.get_close_matches(q, list(self._names), n=3, cutoff=0.8)
+                     for u in self._names[n]},
+        ]
+        for lookup in lookups[:1] if exact else lookups:
+            found = self._live(lookup())
+            if found:
+                return found
+        return []
+
+    def resolve(self, query: str, exact: bool = False) -> Optional[dict]:
+        found = self.candidates(query, exact)
+        if len(found) == 1:
+            self.hits += 1
+            return found[0]
+        self.misses += 1
+        return None
+
+    # ---- backend ---------------------------------------------------------
+
+    async def refresh(self, token: str):
+        """Replace the directory with the backend's full user list."""
+        try:
+            users = await api_get("/users/directory", token)
+        except FastPathUnavailable:
+            users = await api_get("/users/contacts", token)
+        now = time.time()
+        self.refreshed_at = now
+        self._rebuild([{"name": u["name"], "upiId": u["upiId"], "fetched_at": now} for u in users])
+        self._save()
+
+    async def _search(self, token: str, query: str):
+        now = time.time()
+        for u in await api_get("/users/search", token, q=query):
+            self._add(u["name"], u["upiId"], now)
+        self._save()
+
+    async def lookup(self, browser: Browser, query: str, exact: bool = False) -> Optional[dict]:
+        """
+        {name, upiId} for query, refreshing from the backend when the
+        directory is stale or doesn't know the name. None when it can't be
+        resolved unambiguously (or the backend isn't reachable).
+        """
+        found = None if self.stale else self.resolve(query, exact)
+        if found is not None:
+            return found
+        try:
+            token = await session_token(browser)
+            if self.stale:
+                await self.refresh(token)
+                found = self.resolve(query, exact)
+            if found is None and not self.candidates(query, exact):
+                await self._search(token, query)
+                found = self.resolve(query, exact)
+        except FastPathUnavailable as e:
+            print(f"📇 Recipient directory unavailable ({e}).")
+        return found
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "age_s": round(time.time() - self.refreshed_at, 1) if self.refreshed_at else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+directory = RecipientDirectory()
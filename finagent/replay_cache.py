@@ -0,0 +1,181 @@
+# replay_cache.py
+"""
+Recorded-trajectory cache for repeated banking flows.
+
+After a successful LLM-driven run we store its browser_use history,
+keyed by (normalised intent, page structure fingerprint). Values that
+change between runs (e.g. the amount) are swapped for placeholders, so
+"pay vansh 500" can replay the trajectory recorded for "pay vansh 200".
+
+Only action parameters that are exactly a value ("500") become a
+placeholder. When a value also shows up inside a longer string ("500
+INR", "₹500.00", "vansh gupta") the trajectory isn't stored at all:
+replaying it would type the old value. Likewise an entry whose
+placeholders can't all be filled is never replayed.
+
+Replays go through Agent.rerun_history, which re-locates every element
+it clicks; if one no longer matches, the replay raises, the entry is
+dropped and the caller falls back to the LLM.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from browser_use import Browser
+
+CACHE_DIR = Path(os.getenv("FINAGENT_REPLAY_DIR", Path(__file__).with_name(".replay_cache")))
+
+# Attributes that describe page structure; text and values are ignored
+_STRUCTURAL_ATTRS = ("id", "name", "type", "role", "href", "aria-label")
+
+_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_PLACEHOLDER_RE = re.compile(r"\{\{\w+\}\}")
+
+
+class Untemplatable(ValueError):
+    """A run's actions use a parameter in a way replay couldn't substitute."""
+
+
+async def page_fingerprint(browser: Browser) -> str:
+    """Hash of the current page's element skeleton (tags + structural attrs)."""
+    cdp = await browser.get_or_create_cdp_session()
+    doc = await cdp.cdp_client.send.DOM.getDocument(
+        params={"depth": -1}, session_id=cdp.session_id
+    )
+
+    h = hashlib.sha256()
+    stack = [doc["root"]]
+    while stack:
+        node = stack.pop()
+        if node.get("nodeType") == 1:
+            flat = node.get("attributes", [])
+            attrs = dict(zip(flat[::2], flat[1::2]))
+            h.update(node["nodeName"].encode())
+            for a in _STRUCTURAL_ATTRS:
+                if a in attrs:
+                    h.update(f"{a}={attrs[a]}".encode())
+            h.update(b";")
+        stack.extend(reversed(node.get("children", [])))
+    return h.hexdigest()[:16]
+
+
+def normalise_intent(intent: str, **keys: str) -> str:
+    parts = [intent.strip().lower()]
+    parts += [f"{k}={' '.join(str(v).lower().split())}" for k, v in sorted(keys.items())]
+    return "|".join(parts)
+
+
+def _swap(obj: Any, mapping: Dict[str, str]) -> Any:
+    if isinstance(obj, dict):
+        return {k: _swap(v, mapping) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_swap(v, mapping) for v in obj]
+    if isinstance(obj, str) and obj in mapping:
+        return mapping[obj]
+    return obj
+
+
+def _swap_actions(history: dict, mapping: Dict[str, str]) -> dict:
+    # Only action parameters are rewritten, never page state or outputs
+    out = dict(history)
+    out["history"] = []
+    for item in history.get("history", []):
+        item = dict(item)
+        model_output = item.get("model_output")
+        if model_output and "action" in model_output:
+            item["model_output"] = {**model_output, "action": _swap(model_output["action"], mapping)}
+        out["history"].append(item)
+    return out
+
+
+def _action_strings(history: dict) -> Iterator[str]:
+    # done's text is a report to the caller, never typed into the page
+    stack = [item["model_output"]["action"] for item in history.get("history", []) if item.get("model_output")]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            stack.extend(v for k, v in obj.items() if k != "done")
+        elif isinstance(obj, list):
+            stack.extend(obj)
+        elif isinstance(obj, str):
+            yield obj
+
+
+def _mentions(text: str, value: str) -> bool:
+    """Whether text still carries value in some form ("₹500.00" for 500)."""
+    try:
+        number = float(value.replace(",", ""))
+    except ValueError:
+        number = None
+    if number is not None:
+        return any(float(m.replace(",", "")) == number for m in _NUMBER_RE.findall(text))
+    return value.lower() in text.lower()
+
+
+def templatize(history: dict, params: Dict[str, str]) -> dict:
+    """
+    Replace literal param values in actions with {{name}} placeholders.
+    Untemplatable when a value is left anywhere in the actions.
+    """
+    out = _swap_actions(history, {str(v): f"{{{{{k}}}}}" for k, v in params.items()})
+    for text in _action_strings(out):
+        for name, value in params.items():
+            if _mentions(text, str(value)):
+                raise Untemplatable(f"{name} is part of the action value {text!r}")
+    return out
+
+
+def fill(history: dict, params: Dict[str, str]) -> dict:
+    return _swap_actions(history, {f"{{{{{k}}}}}": str(v) for k, v in params.items()})
+
+
+def unfilled(history: dict) -> List[str]:
+    """Placeholders still in the actions after fill()."""
+    return sorted({p for text in _action_strings(history) for p in _PLACEHOLDER_RE.findall(text)})
+
+
+class ReplayCache:
+    def __init__(self, root: Path = CACHE_DIR):
+        self.root = Path(root)
+
+    def _path(self, intent: str, fingerprint: str) -> Path:
+        key = hashlib.sha256(f"{intent}@{fingerprint}".encode()).hexdigest()[:24]
+        return self.root / f"{key}.json"
+
+    def load(self, intent: str, fingerprint: str, params: Dict[str, str]) -> Optional[dict]:
+        """The filled-in trajectory, or None when there is none or a placeholder has no value."""
+        path = self._path(intent, fingerprint)
+        if not path.exists():
+            return None
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        history = fill(entry["history"], params)
+        if unfilled(history):
+            return None
+        return history
+
+    def store(self, intent: str, fingerprint: str, history: dict, params: Dict[str, str]):
+        """Raises Untemplatable (and stores nothing) when the run can't be replayed safely."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "intent": intent,
+            "fingerprint": fingerprint,
+            "recorded_at": time.time(),
+            "history": templatize(history, params),
+        }
+        path = self._path(intent, fingerprint)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry), encoding="utf-8")
+        tmp.replace(path)
+
+    def invalidate(self, intent: str, fingerprint: str):
+        self._path(intent, fingerprint).unlink(missing_ok=True)
+
+
+replay_cache = ReplayCache()
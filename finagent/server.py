@@ -0,0 +1,278 @@
+# server.py
+"""
+Long-running FinAgent service.
+
+Accepts payment / recharge / bill commands over HTTP and runs each one as
+an independent graph invocation with its own browser. At most
+FINAGENT_MAX_CONCURRENCY runs execute at once; up to FINAGENT_QUEUE_DEPTH
+more wait in the queue, beyond that POST /tasks answers 429.
+
+Human steps (login, PIN) never block the loop: the run parks on a
+hitl checkpoint until POST /tasks/{id}/checkpoints/{name} (or /continue
+for whichever checkpoint the run is waiting on).
+
+Finished runs stay visible under /tasks for FINAGENT_FINISHED_TTL
+seconds, at most FINAGENT_KEEP_FINISHED of them (oldest evicted first).
+
+    uvicorn server:app --port 8100
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Literal, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+load_dotenv()
+
+import bank_api
+from browser_pool import pool
+from state import new_state
+from intent import IntentError, parse_intent
+from hitl import checkpoints
+from llm_cache import decision_cache
+from tracing import tracer
+from workflow import build_graph
+from checkpointing import config_for, forget, open_checkpointer, reattach
+
+MAX_CONCURRENCY = int(os.getenv("FINAGENT_MAX_CONCURRENCY", "20"))
+QUEUE_DEPTH = int(os.getenv("FINAGENT_QUEUE_DEPTH", "100"))
+KEEP_FINISHED = int(os.getenv("FINAGENT_KEEP_FINISHED", "500"))
+FINISHED_TTL = float(os.getenv("FINAGENT_FINISHED_TTL", "3600"))
+
+
+class TaskRequest(BaseModel):
+    command: str
+    # "api" resolves the recipient over the bank API and only opens the
+    # PIN screen in the browser; falls back to "ui" when that isn't safe
+    mode: Optional[Literal["ui", "api"]] = None
+    # whose saved login to reuse (session vault); defaults to FINAGENT_USER
+    user: Optional[str] = None
+
+
+class TaskManager:
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_depth: int,
+        checkpointer=None,
+        keep_finished: int = KEEP_FINISHED,
+        finished_ttl: float = FINISHED_TTL,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+        self.tasks: Dict[str, dict] = {}
+        self.keep_finished = keep_finished
+        self.finished_ttl = finished_ttl
+        # run_id -> finished_at, oldest first
+        self.finished: "OrderedDict[str, float]" = OrderedDict()
+        # Runs cut off by a restart can be finished with `cli.py resume <id>`
+        self.checkpointer = checkpointer
+        self.graph = build_graph(checkpointer)
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)
+        ]
+
+    async def stop(self):
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def submit(
+        self,
+        command: str,
+        mode: str = bank_api.DEFAULT_MODE,
+        user: Optional[str] = None,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+    ) -> dict:
+        """
+        Queue a run. run_id/resume are for the supervisor (supervisor.py):
+        resume=True continues run_id from its checkpoint instead of
+        starting over (when it has none left, it does start over).
+        """
+        run_id = run_id or uuid.uuid4().hex[:12]
+        record = {
+            "id": run_id,
+            "command": command,
+            "mode": mode,
+            "user": user,
+            "resume": resume,
+            "status": "queued",
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        try:
+            self.queue.put_nowait(run_id)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=429, detail="Task queue is full")
+        self.tasks[run_id] = record
+        self.evict()
+        return record
+
+    def evict(self):
+        """Drop finished runs beyond keep_finished or older than finished_ttl."""
+        cutoff = time.time() - self.finished_ttl
+        while self.finished:
+            run_id, finished_at = next(iter(self.finished.items()))
+            if len(self.finished) <= self.keep_finished and finished_at >= cutoff:
+                break
+            del self.finished[run_id]
+            self.tasks.pop(run_id, None)
+
+    def view(self, run_id: str) -> dict:
+        record = self.tasks.get(run_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Unknown task")
+        waiting = [name for _, name in checkpoints.pending(run_id)]
+        return {
+            **record,
+            "awaiting_human": waiting[0] if waiting else None,
+            "timing": tracer.run_summary(run_id),
+        }
+
+    async def _worker(self):
+        while True:
+            run_id = await self.queue.get()
+            try:
+                await self._run(run_id)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, run_id: str):
+        record = self.tasks[run_id]
+        record["status"] = "running"
+        record["started_at"] = time.time()
+
+        state = new_state(record["command"], run_id=run_id, pay_mode=record["mode"], user=record["user"])
+
+        try:
+            if record["resume"]:
+                if await reattach(self.graph, run_id):
+                    state = None  # the graph continues from the checkpoint
+                else:
+                    # Cut off before its first checkpoint: run it from the start
+                    print(f"↩️  Run {run_id} has no checkpoint to continue from; starting it over.")
+                    await forget(self.checkpointer, run_id)
+            with tracer.span("run", run_id=run_id, mode=record["mode"]):
+                await self.graph.ainvoke(state, config_for(run_id))
+            record["status"] = "done"
+            await forget(self.checkpointer, run_id)
+        except asyncio.CancelledError:
+            record["status"] = "cancelled"
+            raise
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = str(e)
+        finally:
+            record["finished_at"] = time.time()
+            self.finished[run_id] = record["finished_at"]
+            self.evict()
+            checkpoints.cancel(run_id)
+            await pool.release_run(run_id)
+
+
+manager: TaskManager = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global manager
+    pool.max_idle = MAX_CONCURRENCY
+    pool.isolated = True
+    async with open_checkpointer() as checkpointer:
+        manager = TaskManager(MAX_CONCURRENCY, QUEUE_DEPTH, checkpointer)
+        manager.start()
+        try:
+            yield
+        finally:
+            await manager.stop()
+            await pool.close()
+            await bank_api.close()
+            tracer.close()
+
+
+app = FastAPI(title="FinAgent", lifespan=lifespan)
+
+
+@app.post("/tasks", status_code=202)
+async def create_task(req: TaskRequest):
+    # Reject malformed commands up front, before they take a queue slot
+    try:
+        intent = await parse_intent(req.command)
+    except IntentError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    record = manager.submit(req.command.strip(), req.mode or bank_api.DEFAULT_MODE, req.user)
+    return {**record, "intent": intent}
+
+
+@app.get("/tasks")
+def list_tasks():
+    manager.evict()
+    return [manager.view(run_id) for run_id in manager.tasks]
+
+
+@app.get("/tasks/{run_id}")
+def get_task(run_id: str):
+    return manager.view(run_id)
+
+
+@app.post("/tasks/{run_id}/checkpoints/{name}")
+def resolve_checkpoint(run_id: str, name: str):
+    if not checkpoints.resolve(run_id, name):
+        raise HTTPException(status_code=404, detail="Nothing is waiting on that checkpoint")
+    return {"ok": True}
+
+
+@app.post("/tasks/{run_id}/continue")
+def continue_task(run_id: str):
+    key = checkpoints.resolve_any(run_id)
+    if key is None:
+        raise HTTPException(status_code=404, detail="Task is not waiting on a human")
+    return {"ok": True, "checkpoint": key[1]}
+
+
+def prometheus_text(spans, cache: dict) -> str:
+    """/metrics body: span histograms (a Tracer) plus decision cache stats."""
+    lines = [
+        "# TYPE finagent_llm_cache_lookups_total counter",
+        f'finagent_llm_cache_lookups_total{{result="hit"}} {cache["hits"]}',
+        f'finagent_llm_cache_lookups_total{{result="miss"}} {cache["misses"]}',
+        f'finagent_llm_cache_lookups_total{{result="bypassed"}} {cache["bypassed"]}',
+        "# TYPE finagent_llm_cache_bytes gauge",
+        f"finagent_llm_cache_bytes {cache['bytes']}",
+    ]
+    return spans.prometheus() + "\n".join(lines) + "\n"
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    body = prometheus_text(tracer, decision_cache.stats())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health")
+def health():
+    return {
+        "queued": manager.queue.qsize(),
+        "running": sum(1 for t in manager.tasks.values() if t["status"] == "running"),
+        "max_concurrency": MAX_CONCURRENCY,
+        "queue_depth": QUEUE_DEPTH,
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("FINAGENT_HOST", "127.0.0.1"), port=int(os.getenv("FINAGENT_PORT", "8100")))
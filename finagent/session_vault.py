@@ -0,0 +1,13 @@
+# session_vault.py
+"""
+Session vault for this app (finagent_common.session_vault): Dummy Bank
+logins at DEFAULT_URL, stored in FINAGENT_VAULT_DIR, checked against
+the backend's /auth/me before they are saved.
+"""
+from bank_api import whoami
+from common_env import env
+from finagent_common.session_vault import SessionVault, WrongAccount
+from prompt_templates import DEFAULT_URL
+
+vault = SessionVault.from_env(env, DEFAULT_URL, whoami=whoami)
+DEFAULT_USER = vault.default_user
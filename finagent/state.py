@@ -1,10 +1,27 @@
 # state.py
-from typing import TypedDict, Optional, Literal
-from browser_use import Agent
+from typing import Any, TypedDict, Optional, Literal
 
 class AgentState(TypedDict):
+    run_id: Optional[str]
     user_command: str
-    browser: Optional[Agent]
+    # whose saved login to use (session_vault.py); None = FINAGENT_USER
+    user: Optional[str]
+
+    # filled by the parse node (see intent.py)
+    category: Optional[Literal["TRANSFER", "RECHARGE", "BILL", "GOLD"]]
+    recipient: Optional[str]
+    amount: Optional[str]
+    currency: Optional[str]
+    mobile: Optional[str]
+    consumer_number: Optional[str]
+    intent_error: Optional[str]
+    pay_mode: Literal["ui", "api"]
+    # browser_use.Browser; left as Any so importing state (and
+    # LangGraph resolving these hints) doesn't load browser_use
+    browser: Optional[Any]
+    # not checkpointed with the browser: enough to get it back on resume
+    cdp_url: Optional[str]
+    page_url: Optional[str]
 
     auth_required: bool
     auth_choice: Optional[Literal["login", "signup", "manual"]]
@@ -12,3 +29,29 @@ class AgentState(TypedDict):
     logged_in: bool
     awaiting_pin: bool
     task_completed: bool
+
+
+def new_state(
+    user_command: str, run_id: Optional[str] = None, pay_mode: str = "ui", user: Optional[str] = None
+) -> AgentState:
+    return {
+        "run_id": run_id,
+        "user_command": user_command,
+        "user": user,
+        "category": None,
+        "recipient": None,
+        "amount": None,
+        "currency": None,
+        "mobile": None,
+        "consumer_number": None,
+        "intent_error": None,
+        "pay_mode": pay_mode,
+        "browser": None,
+        "cdp_url": None,
+        "page_url": None,
+        "auth_required": False,
+        "auth_choice": None,
+        "logged_in": False,
+        "awaiting_pin": False,
+        "task_completed": False,
+    }
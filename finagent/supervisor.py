@@ -0,0 +1,439 @@
+# supervisor.py
+"""
+Multi-process FinAgent service: a supervisor and N worker processes.
+
+    python cli.py supervise --workers 4 --port 8100
+
+One process only ever uses one core, and DOM serialisation, page
+scanning and JSON parsing of model output all compete for it. Here each
+worker is its own process running a TaskManager (server.py) with its own
+event loop, browser pool and checkpointer, so the browsers a worker
+launched are only ever driven by that worker.
+
+IPC is plain multiprocessing queues: one inbox per worker (submit,
+resolve a human checkpoint, stop) and one shared outbox back to the
+supervisor (snapshots of the worker's tasks, every REPORT_INTERVAL).
+
+  * New tasks go to the live worker with the fewest unfinished tasks.
+    Logins come from the session vault, so any worker can take any user.
+  * Human resume signals go to the worker that owns the run.
+  * A worker that dies is restarted. Its queued tasks are resubmitted,
+    and its running ones continue from their SQLite checkpoints
+    (checkpointing.py), re-attaching to their browsers over CDP.
+
+Files: the checkpoint database and the session vault are shared (SQLite
+in WAL mode with a busy timeout; the vault key is created here before
+any worker starts). Each worker gets its own trace file, LLM decision
+cache and recipient directory (traces.worker-N.jsonl, .llm_cache/worker-N,
+.recipients.worker-N.json), since those are written without locking.
+
+The HTTP API matches server.py (/tasks, /tasks/{id}/continue, /metrics,
+...), with tasks and metrics from every worker in one view, plus GET
+/workers for per-process status. Finished tasks are evicted as in
+server.py (FINAGENT_KEEP_FINISHED, FINAGENT_FINISHED_TTL).
+"""
+import asyncio
+import multiprocessing as mp
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+
+import bank_api
+from intent import IntentError, parse_intent
+from server import FINISHED_TTL, KEEP_FINISHED, TaskRequest, prometheus_text
+from tracing import Tracer, tracer
+
+WORKERS = int(os.getenv("FINAGENT_WORKERS", str(os.cpu_count() or 1)))
+WORKER_CONCURRENCY = int(os.getenv("FINAGENT_WORKER_CONCURRENCY", "5"))
+QUEUE_DEPTH = int(os.getenv("FINAGENT_QUEUE_DEPTH", "100"))
+REPORT_INTERVAL = float(os.getenv("FINAGENT_REPORT_INTERVAL", "0.5"))
+
+_FINAL = ("done", "failed", "cancelled")
+
+
+# =========================
+# Worker process
+# =========================
+def worker_main(index: int, inbox, outbox, concurrency: int, queue_depth: int):
+    asyncio.run(_worker(index, inbox, outbox, concurrency, queue_depth))
+
+
+async def _report(index: int, manager, outbox):
+    from llm_cache import decision_cache
+
+    # Unfinished tasks every time, finished ones once
+    reported_final = set()
+    while True:
+        manager.evict()
+        reported_final.intersection_update(manager.tasks)
+        views = []
+        for run_id, record in list(manager.tasks.items()):
+            if run_id in reported_final:
+                continue
+            if record["status"] in _FINAL:
+                reported_final.add(run_id)
+            views.append(manager.view(run_id))
+        outbox.put(("status", index, os.getpid(), views))
+        outbox.put(("metrics", index, tracer.export(), decision_cache.stats()))
+        await asyncio.sleep(REPORT_INTERVAL)
+
+
+async def _worker(index: int, inbox, outbox, concurrency: int, queue_depth: int):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    from browser_pool import pool
+    from checkpointing import open_checkpointer
+    from hitl import checkpoints
+    from server import TaskManager
+
+    pool.max_idle = concurrency
+    pool.isolated = True
+    async with open_checkpointer() as checkpointer:
+        manager = TaskManager(concurrency, queue_depth, checkpointer)
+        manager.start()
+        reporter = asyncio.create_task(_report(index, manager, outbox))
+        try:
+            while True:
+                msg = await asyncio.to_thread(inbox.get)
+                if msg[0] == "stop":
+                    break
+                if msg[0] == "submit":
+                    _, run_id, command, mode, user, resume = msg
+                    try:
+                        manager.submit(command, mode, user, run_id=run_id, resume=resume)
+                    except HTTPException as e:
+                        outbox.put(("rejected", index, run_id, e.detail))
+                elif msg[0] == "resolve":
+                    _, run_id, name = msg
+                    if name is None:
+                        checkpoints.resolve_any(run_id)
+                    else:
+                        checkpoints.resolve(run_id, name)
+        finally:
+            reporter.cancel()
+            await manager.stop()
+            await pool.close()
+            await bank_api.close()
+            tracer.close()
+
+
+def worker_files(index: int) -> Dict[str, str]:
+    """FINAGENT_* overrides that give worker index its own unlocked files."""
+    from llm_cache import decision_cache
+    from recipients import DIRECTORY_FILE
+
+    def numbered(path: Path) -> str:
+        return str(path.with_name(f"{path.stem}.worker-{index}{path.suffix}"))
+
+    files = {"FINAGENT_RECIPIENTS_FILE": numbered(DIRECTORY_FILE)}
+    if tracer.path:
+        files["FINAGENT_TRACE_FILE"] = numbered(Path(tracer.path))
+    if decision_cache.enabled:
+        files["FINAGENT_LLM_CACHE_DIR"] = str(decision_cache.root / f"worker-{index}")
+    return files
+
+
+@contextmanager
+def _environ(overrides: Dict[str, str]):
+    saved = {k: os.environ.get(k) for k in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+# =========================
+# Supervisor
+# =========================
+class Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[mp.Process] = None
+        self.inbox = None
+        self.pid: Optional[int] = None
+        self.restarts = 0
+        self.started_at: Optional[float] = None
+
+
+class Supervisor:
+    def __init__(
+        self,
+        workers: int = WORKERS,
+        concurrency: int = WORKER_CONCURRENCY,
+        queue_depth: int = QUEUE_DEPTH,
+        keep_finished: int = KEEP_FINISHED,
+        finished_ttl: float = FINISHED_TTL,
+    ):
+        # spawn: workers must not inherit the supervisor's event loop or threads
+        self.ctx = mp.get_context("spawn")
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.keep_finished = keep_finished
+        self.finished_ttl = finished_ttl
+        self.outbox = self.ctx.Queue()
+        self.workers: List[Worker] = [Worker(i) for i in range(workers)]
+        # run_id -> latest snapshot, plus the worker it belongs to
+        self.tasks: Dict[str, dict] = {}
+        # run_id -> when the supervisor saw it finish, oldest first
+        self.finished: "OrderedDict[str, float]" = OrderedDict()
+        # worker index -> (tracer.export(), decision_cache.stats()) last reported
+        self.metrics: Dict[int, Tuple[dict, dict]] = {}
+        self._loops: List[asyncio.Task] = []
+        self._stopping = False
+
+    def _spawn(self, worker: Worker):
+        worker.inbox = self.ctx.Queue()
+        worker.process = self.ctx.Process(
+            target=worker_main,
+            args=(worker.index, worker.inbox, self.outbox, self.concurrency, self.queue_depth),
+            name=f"finagent-worker-{worker.index}",
+            daemon=False,
+        )
+        # The child imports server (and with it tracing, llm_cache) before
+        # worker_main runs, so its files come from the environment it starts in
+        with _environ(worker_files(worker.index)):
+            worker.process.start()
+        worker.pid = worker.process.pid
+        worker.started_at = time.time()
+
+    def start(self):
+        from session_vault import vault
+
+        # Otherwise every worker races to generate vault.key on first login
+        vault.ensure_key()
+        for worker in self.workers:
+            self._spawn(worker)
+        self._loops = [asyncio.create_task(self._collect()), asyncio.create_task(self._monitor())]
+
+    async def stop(self):
+        self._stopping = True
+        for worker in self.workers:
+            worker.inbox.put(("stop",))
+        for worker in self.workers:
+            await asyncio.to_thread(worker.process.join, 10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self.outbox.put(("closed",))
+        for loop in self._loops:
+            loop.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+
+    # ---- routing ---------------------------------------------------------
+
+    def _load(self, worker: Worker) -> int:
+        return sum(1 for t in self.tasks.values() if t["worker"] == worker.index and t["status"] not in _FINAL)
+
+    def submit(self, command: str, mode: str, user: Optional[str]) -> dict:
+        live = [w for w in self.workers if w.process.is_alive()]
+        if not live:
+            raise HTTPException(status_code=503, detail="No worker is running")
+        worker = min(live, key=self._load)
+        if self._load(worker) >= self.concurrency + self.queue_depth:
+            raise HTTPException(status_code=429, detail="Task queue is full")
+
+        run_id = uuid.uuid4().hex[:12]
+        record = {
+            "id": run_id,
+            "command": command,
+            "mode": mode,
+            "user": user,
+            "status": "queued",
+            "error": None,
+            "created_at": time.time(),
+            "worker": worker.index,
+            "awaiting_human": None,
+        }
+        self.tasks[run_id] = record
+        worker.inbox.put(("submit", run_id, command, mode, user, False))
+        self.evict()
+        return record
+
+    def evict(self):
+        """Drop finished runs beyond keep_finished or older than finished_ttl."""
+        cutoff = time.time() - self.finished_ttl
+        while self.finished:
+            run_id, finished_at = next(iter(self.finished.items()))
+            if len(self.finished) <= self.keep_finished and finished_at >= cutoff:
+                break
+            del self.finished[run_id]
+            self.tasks.pop(run_id, None)
+
+    def _finished(self, record: dict):
+        if record["status"] in _FINAL and record["id"] not in self.finished:
+            self.finished[record["id"]] = time.time()
+
+    def view(self, run_id: str) -> dict:
+        record = self.tasks.get(run_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Unknown task")
+        return record
+
+    def resolve(self, run_id: str, name: Optional[str]) -> str:
+        """Forward a human resume to the run's worker; returns the checkpoint name."""
+        record = self.view(run_id)
+        waiting = record.get("awaiting_human")
+        if waiting is None or (name is not None and name != waiting):
+            raise HTTPException(status_code=404, detail="Nothing is waiting on that checkpoint")
+        self.workers[record["worker"]].inbox.put(("resolve", run_id, name))
+        # Until the worker's next report, don't let the same wait be resolved twice
+        record["awaiting_human"] = None
+        return waiting
+
+    # ---- background loops ------------------------------------------------
+
+    async def _collect(self):
+        while True:
+            msg = await asyncio.to_thread(self.outbox.get)
+            if msg[0] == "closed":
+                return
+            if msg[0] == "status":
+                _, index, _pid, views = msg
+                for view in views:
+                    record = self.tasks.get(view["id"])
+                    # A late report from a worker that has since been replaced
+                    if record is not None and record["worker"] == index:
+                        record.update(view)
+                        self._finished(record)
+                self.evict()
+            elif msg[0] == "metrics":
+                _, index, spans, cache = msg
+                self.metrics[index] = (spans, cache)
+            elif msg[0] == "rejected":
+                _, index, run_id, detail = msg
+                if run_id in self.tasks:
+                    self.tasks[run_id].update(status="failed", error=detail)
+                    self._finished(self.tasks[run_id])
+
+    async def _monitor(self):
+        while not self._stopping:
+            await asyncio.sleep(1)
+            for worker in self.workers:
+                if self._stopping or worker.process.is_alive():
+                    continue
+                print(f"💥 Worker {worker.index} (pid {worker.pid}) exited with {worker.process.exitcode}; restarting.")
+                worker.restarts += 1
+                self._spawn(worker)
+                for record in self.tasks.values():
+                    if record["worker"] != worker.index or record["status"] in _FINAL:
+                        continue
+                    # Started runs pick up from their last checkpoint
+                    resume = record["status"] != "queued"
+                    record.update(status="queued", awaiting_human=None)
+                    worker.inbox.put(("submit", record["id"], record["command"], record["mode"], record["user"], resume))
+
+    def prometheus(self) -> str:
+        """Every worker's span histograms and decision cache counters, summed."""
+        spans = Tracer(metric_prefix=tracer.metric_prefix)
+        spans.merge(tracer.export())
+        cache = {"hits": 0, "misses": 0, "bypassed": 0, "bytes": 0}
+        for exported, stats in self.metrics.values():
+            spans.merge(exported)
+            for k in cache:
+                cache[k] += stats[k]
+        return prometheus_text(spans, cache)
+
+    def worker_status(self) -> List[dict]:
+        out = []
+        for w in self.workers:
+            mine = [t for t in self.tasks.values() if t["worker"] == w.index]
+            out.append({
+                "index": w.index,
+                "pid": w.pid,
+                "alive": w.process.is_alive(),
+                "restarts": w.restarts,
+                "uptime_s": round(time.time() - w.started_at, 1),
+                "queued": sum(1 for t in mine if t["status"] == "queued"),
+                "running": sum(1 for t in mine if t["status"] == "running"),
+                "awaiting_human": sum(1 for t in mine if t.get("awaiting_human")),
+                "finished": sum(1 for t in mine if t["status"] in _FINAL),
+            })
+        return out
+
+
+# =========================
+# HTTP API (same routes as server.py)
+# =========================
+supervisor: Supervisor = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global supervisor
+    supervisor = Supervisor()
+    supervisor.start()
+    try:
+        yield
+    finally:
+        await supervisor.stop()
+
+
+app = FastAPI(title="FinAgent supervisor", lifespan=lifespan)
+
+
+@app.post("/tasks", status_code=202)
+async def create_task(req: TaskRequest):
+    try:
+        intent = await parse_intent(req.command)
+    except IntentError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    record = supervisor.submit(req.command.strip(), req.mode or bank_api.DEFAULT_MODE, req.user)
+    return {**record, "intent": intent}
+
+
+@app.get("/tasks")
+def list_tasks():
+    supervisor.evict()
+    return list(supervisor.tasks.values())
+
+
+@app.get("/tasks/{run_id}")
+def get_task(run_id: str):
+    return supervisor.view(run_id)
+
+
+@app.post("/tasks/{run_id}/checkpoints/{name}")
+def resolve_checkpoint(run_id: str, name: str):
+    supervisor.resolve(run_id, name)
+    return {"ok": True}
+
+
+@app.post("/tasks/{run_id}/continue")
+def continue_task(run_id: str):
+    return {"ok": True, "checkpoint": supervisor.resolve(run_id, None)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(supervisor.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/workers")
+def workers():
+    return supervisor.worker_status()
+
+
+@app.get("/health")
+def health():
+    status = supervisor.worker_status()
+    return {
+        "workers": len(status),
+        "alive": sum(1 for w in status if w["alive"]),
+        "queued": sum(w["queued"] for w in status),
+        "running": sum(w["running"] for w in status),
+        "awaiting_human": sum(w["awaiting_human"] for w in status),
+        "worker_concurrency": supervisor.concurrency,
+    }
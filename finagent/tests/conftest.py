@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The modules are run from finagent/ (python cli.py ...), not installed
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
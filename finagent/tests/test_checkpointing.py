@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("langgraph")
+
+from checkpointing import reattach  # noqa: E402
+
+
+class FakeGraph:
+    """Compiled-graph stand-in: one saved snapshot, records rewinds and runs."""
+
+    def __init__(self, next_nodes, values=None):
+        self.snapshot = SimpleNamespace(next=next_nodes, values=values or {})
+        self.updates = []
+        self.invoked = []
+
+    async def aget_state(self, config):
+        return self.snapshot
+
+    async def aupdate_state(self, config, values, as_node=None):
+        self.updates.append((values, as_node))
+
+    async def ainvoke(self, state, config):
+        self.invoked.append(state)
+
+
+def test_run_interrupted_before_parse_resumes_from_its_input():
+    graph = FakeGraph(("__start__",), {"user_command": "pay vansh 500"})
+
+    assert asyncio.run(reattach(graph, "r1")) is True
+    # Not rewound to after start: that would skip parse and pay with no intent
+    assert graph.updates == []
+
+
+def test_finished_or_missing_run_has_nothing_to_resume():
+    assert asyncio.run(reattach(FakeGraph(()), "r1")) is False
+
+
+def test_task_manager_starts_over_when_there_is_no_checkpoint():
+    pytest.importorskip("fastapi")
+    from server import TaskManager
+
+    async def main():
+        manager = TaskManager(1, 1)
+        manager.graph = FakeGraph(())
+        record = manager.submit("pay vansh 500", run_id="r1", resume=True)
+        await manager._run("r1")
+        return manager.graph, record
+
+    graph, record = asyncio.run(main())
+    assert record["status"] == "done"
+    assert graph.invoked[0]["user_command"] == "pay vansh 500"
@@ -0,0 +1,38 @@
+import pytest
+
+from intent import IntentError, parse_command
+
+
+@pytest.mark.parametrize("command, fields", [
+    ("Pay vansh 500 INR using UPI", {"category": "TRANSFER", "recipient": "vansh", "amount": "500"}),
+    ("send ₹1,500 to Rahul Sharma", {"recipient": "Rahul Sharma", "amount": "1500"}),
+    ("Pay Rs.250.50 to vansh", {"recipient": "vansh", "amount": "250.50"}),
+    ("pay vansh99@okaxis 300", {"recipient": "vansh99@okaxis", "amount": "300"}),
+    ("Pay vansh 500.", {"recipient": "vansh", "amount": "500"}),
+    ("send 500 to vansh tomorrow", {"recipient": "vansh", "amount": "500"}),
+    ("please pay Rahul Sharma 200 now please", {"recipient": "Rahul Sharma", "amount": "200"}),
+    ("Pay vansh, 500", {"recipient": "vansh", "amount": "500"}),
+    ("Recharge +91 9876543210 with 199", {"category": "RECHARGE", "mobile": "9876543210", "amount": "199"}),
+    ("Pay electricity bill consumer number 123456789 amount 820", {"category": "BILL", "consumer_number": "123456789", "amount": "820"}),
+])
+def test_parses(command, fields):
+    intent = parse_command(command)
+    assert {k: intent[k] for k in fields} == fields
+
+
+@pytest.mark.parametrize("command", [
+    "Pay vansh 5OO",              # letter O, not zero: no amount at all
+    "Pay 12 vansh 500",           # two candidate amounts
+    "pay rahul 2 times 500",
+    "Pay vansh -500",             # signed amount
+    "Pay vansh +500",
+    "Pay vansh2 500",             # digits in the name
+    "Pay vansh 500abc",
+    "Pay vansh 500 or 600",
+    "Pay rahul and vansh 500",    # two recipients
+    "send 500 to rahul & vansh",
+    "Pay rahul, vansh 500",
+])
+def test_rejects_instead_of_guessing(command):
+    with pytest.raises(IntentError):
+        parse_command(command)
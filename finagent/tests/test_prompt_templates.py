@@ -0,0 +1,24 @@
+import pytest
+
+from prompt_templates import PROMPT_TOKEN_BUDGET, SAMPLE_VALUES, TEMPLATES, count_tokens, render_task
+
+
+@pytest.mark.parametrize("category", sorted(TEMPLATES))
+def test_rendered_prompt_fits_the_token_budget(category):
+    template = TEMPLATES[category]
+    text = template.render(**{p: SAMPLE_VALUES[p] for p in template.params})
+    assert count_tokens(text) <= PROMPT_TOKEN_BUDGET
+
+
+@pytest.mark.parametrize("category", sorted(TEMPLATES))
+def test_values_only_change_the_trailing_block(category):
+    template = TEMPLATES[category]
+    first = template.render(**{p: SAMPLE_VALUES[p] for p in template.params})
+    second = template.render(**{p: "x" for p in template.params})
+    assert first.startswith(template.prefix) and second.startswith(template.prefix)
+
+
+def test_unknown_category_gets_the_transfer_flow():
+    text, template = render_task("LOTTERY", recipient="vansh", amount="500", mobile="9876543210")
+    assert template is TEMPLATES["TRANSFER"]
+    assert "- amount: 500" in text and "mobile" not in text
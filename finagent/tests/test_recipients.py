@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from recipients import RecipientDirectory
+
+
+@pytest.fixture
+def directory(tmp_path):
+    d = RecipientDirectory(path=tmp_path / "recipients.json")
+    d.refreshed_at = now = time.time()
+    for name, upi in [("Vansh Gupta", "vansh@dummy"), ("Rahul Sharma", "rahul@dummy")]:
+        d._add(name, upi, now)
+    return d
+
+
+def test_exact_only_takes_upi_id_or_full_name(directory):
+    assert directory.resolve("vansh gupta", exact=True)["upiId"] == "vansh@dummy"
+    assert directory.resolve("RAHUL@dummy", exact=True)["name"] == "Rahul Sharma"
+    for partial in ("vansh", "wansh gupta", "vansh gupt"):
+        assert directory.resolve(partial, exact=True) is None
+
+
+def test_fuzzy_matches_still_resolve_when_not_exact(directory):
+    assert directory.resolve("vansh")["upiId"] == "vansh@dummy"
+    assert directory.resolve("vansh gupt")["upiId"] == "vansh@dummy"
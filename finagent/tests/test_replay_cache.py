@@ -0,0 +1,46 @@
+import pytest
+
+from replay_cache import ReplayCache, Untemplatable
+
+
+def run_typing(*texts):
+    """A browser_use history dump whose steps type texts, then call done."""
+    steps = [{"model_output": {"action": [{"input_text": {"index": 7, "text": t}}]}} for t in texts]
+    steps.append({"model_output": {"action": [{"done": {"text": f"Typed {' '.join(texts)}", "success": True}}]}})
+    return {"history": steps}
+
+
+def typed(history):
+    return [a["input_text"]["text"] for item in history["history"] for a in item["model_output"]["action"] if "input_text" in a]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReplayCache(tmp_path)
+
+
+def test_exact_values_replay_with_the_new_amount(cache):
+    cache.store("transfer|recipient=vansh", "fp", run_typing("vansh", "500"), {"amount": "500", "recipient": "vansh"})
+
+    replay = cache.load("transfer|recipient=vansh", "fp", {"amount": "700", "recipient": "vansh"})
+    assert typed(replay) == ["vansh", "700"]
+
+
+@pytest.mark.parametrize("text", ["500 INR", "₹500", "500.00", "Rs. 500"])
+def test_amount_inside_a_longer_string_is_never_stored(cache, text):
+    with pytest.raises(Untemplatable):
+        cache.store("transfer|recipient=vansh", "fp", run_typing("vansh", text), {"amount": "500", "recipient": "vansh"})
+
+    # so "pay vansh 700" can't replay a payment of 500
+    assert cache.load("transfer|recipient=vansh", "fp", {"amount": "700", "recipient": "vansh"}) is None
+
+
+def test_recipient_inside_a_longer_string_is_never_stored(cache):
+    with pytest.raises(Untemplatable):
+        cache.store("transfer|recipient=vansh", "fp", run_typing("vansh gupta", "500"), {"amount": "500", "recipient": "vansh"})
+
+
+def test_unfilled_placeholder_is_not_replayed(cache):
+    cache.store("recharge|mobile=9876543210", "fp", run_typing("9876543210", "199"), {"amount": "199", "mobile": "9876543210"})
+
+    assert cache.load("recharge|mobile=9876543210", "fp", {"amount": "199"}) is None
@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import multiprocessing
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from session_vault import SessionVault, WrongAccount
+
+ORIGIN = "http://localhost:5173"
+
+
+def jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"e30.{payload}.sig"
+
+
+class FakeBrowser:
+    """Just enough of browser_use.Browser: one page with localStorage, cookies via CDP."""
+
+    def __init__(self, storage=None):
+        self.url = ORIGIN + "/dashboard"
+        self.storage = dict(storage or {})
+        self.cleared = []
+        page = SimpleNamespace(evaluate=self._evaluate, goto=self._goto)
+        storage_domain = SimpleNamespace(clearDataForOrigin=self._clear, setCookies=self._noop)
+        self.cdp = SimpleNamespace(cdp_client=SimpleNamespace(send=SimpleNamespace(Storage=storage_domain)), session_id="s1")
+        self._page = page
+
+    async def must_get_current_page(self):
+        return self._page
+
+    async def get_current_page_url(self):
+        return self.url
+
+    async def get_or_create_cdp_session(self):
+        return self.cdp
+
+    async def export_storage_state(self):
+        return {"cookies": []}
+
+    async def _evaluate(self, script):
+        assert "localStorage.getItem" in script
+        return json.dumps({k: self.storage.get(k) for k in ("token", "user")})
+
+    async def _goto(self, url):
+        self.url = url
+
+    async def _clear(self, params, session_id):
+        self.cleared.append(params["origin"])
+        self.storage.clear()
+
+    async def _noop(self, **kwargs):
+        pass
+
+
+def whoami_as(account):
+    async def whoami(token):
+        return account
+    return whoami
+
+
+@pytest.fixture
+def alice_browser():
+    return FakeBrowser({"token": jwt(time.time() + 3600), "user": json.dumps({"email": "alice@dummy"})})
+
+
+def test_restore_miss_logs_out_the_previous_user(tmp_path, alice_browser):
+    vault = SessionVault(tmp_path, ORIGIN)
+
+    assert asyncio.run(vault.restore(alice_browser, "bob@dummy")) is False
+    assert alice_browser.cleared == [ORIGIN]
+    assert alice_browser.storage == {}
+
+
+def test_restore_miss_on_a_logged_out_browser_leaves_it_alone(tmp_path):
+    browser = FakeBrowser()
+
+    assert asyncio.run(SessionVault(tmp_path, ORIGIN).restore(browser, "bob@dummy")) is False
+    assert browser.cleared == []
+
+
+def test_capture_refuses_someone_elses_login(tmp_path, alice_browser):
+    vault = SessionVault(tmp_path, ORIGIN, whoami=whoami_as({"email": "alice@dummy", "name": "Alice"}))
+
+    with pytest.raises(WrongAccount):
+        asyncio.run(vault.capture(alice_browser, "bob@dummy"))
+    assert not list(tmp_path.iterdir())
+
+
+def test_capture_needs_to_know_who_is_logged_in(tmp_path, alice_browser):
+    vault = SessionVault(tmp_path, ORIGIN, whoami=whoami_as(None))
+
+    assert asyncio.run(vault.capture(alice_browser, None)) is False
+    assert not list(tmp_path.iterdir())
+
+
+def _in_processes(n, target, *args):
+    """Run target(i, *args, results) in n forked processes; their results, in any order."""
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=target, args=(i, *args, results)) for i in range(n)]
+    for p in procs:
+        p.start()
+    out = [results.get(timeout=30) for _ in procs]
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+    return out
+
+
+def _key_worker(i, path, results):
+    try:
+        results.put(SessionVault(path, ORIGIN).ensure_key())
+    except Exception as e:
+        results.put(e)
+
+
+def test_racing_processes_agree_on_one_vault_key(tmp_path):
+    keys = _in_processes(8, _key_worker, tmp_path)
+
+    assert all(isinstance(k, bytes) for k in keys), keys
+    assert len(set(keys)) == 1 and len(base64.urlsafe_b64decode(keys[0])) == 32
+    assert [p.name for p in tmp_path.iterdir()] == ["vault.key"]
+
+
+def _save_worker(i, path, results):
+    vault = SessionVault(path, ORIGIN)
+    vault._cipher = SimpleNamespace(encrypt=lambda data: data)  # no cryptography needed
+    try:
+        for n in range(200):
+            vault.save("alice@dummy", {"writer": i, "n": n})
+        results.put(None)
+    except Exception as e:
+        results.put(e)
+
+
+def test_concurrent_saves_of_one_user_dont_clobber_each_other(tmp_path):
+    errors = _in_processes(2, _save_worker, tmp_path)
+
+    assert errors == [None, None]
+    [saved] = tmp_path.iterdir()
+    assert saved.suffix == ".vault"
+    assert json.loads(saved.read_bytes()) in ({"writer": 0, "n": 199}, {"writer": 1, "n": 199})
@@ -0,0 +1,7 @@
+from cli import IMPORT_BUDGET, measure_startup
+
+
+def test_browserless_imports_fit_the_budget():
+    best, heavy = measure_startup(repeat=3)
+    assert heavy == []
+    assert best <= IMPORT_BUDGET, f"{best * 1000:.1f} ms > {IMPORT_BUDGET * 1000:.0f} ms"
@@ -0,0 +1,19 @@
+from tracing import Tracer
+
+
+def test_merged_exports_add_up_across_processes():
+    workers = [Tracer(), Tracer()]
+    for i, worker in enumerate(workers):
+        for _ in range(i + 1):
+            with worker.span("pay"):
+                pass
+    with workers[1].span("human_wait", kind="human"):
+        pass
+
+    total = Tracer()
+    for worker in workers:
+        total.merge(worker.export())
+
+    assert total.histograms[("pay", "machine")].count == 3
+    assert total.histograms[("human_wait", "human")].count == 1
+    assert 'finagent_span_seconds_count{name="pay",kind="machine"} 3' in total.prometheus()
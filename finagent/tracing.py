@@ -0,0 +1,19 @@
+# tracing.py
+"""
+Span tracing for this app (finagent_common.tracing), written to
+FINAGENT_TRACE_FILE and rendered with finagent_* metric names.
+"""
+from common_env import env
+from finagent_common.tracing import Tracer
+
+tracer = Tracer.from_env(env)
+
+
+def traced(name: str, fn, kind: str = "machine"):
+    """Wrap an async graph node so each call is a span tagged with the run."""
+    async def node(state):
+        with tracer.span(name, kind=kind, run_id=state.get("run_id")):
+            return await fn(state)
+
+    node.__name__ = getattr(fn, "__name__", name)
+    return node
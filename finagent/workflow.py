@@ -106,34 +106,103 @@
 #     return graph.compile()
 
 # workflow.py
-from langgraph.graph import StateGraph
 from state import AgentState
 from browser_actions import open_site_only, wait_for_dashboard_and_pay
+from bank_api import FastPathUnavailable, pay_via_api
+from browser_pool import pool
+from hitl import checkpoints
+from intent import IntentError, parse_intent
+from session_vault import WrongAccount, vault
+from tracing import traced
+
+
+def _browser(state: AgentState):
+    # A resumed run's state comes from a checkpoint, which never holds the
+    # browser; checkpointing.reattach() has leased it to the run again
+    if state.get("browser") is None:
+        state["browser"] = pool.leased(state["run_id"])
+    return state["browser"]
+
+
+async def _remember_page(state: AgentState):
+    state["page_url"] = await _browser(state).get_current_page_url()
+
+
+async def parse_node(state: AgentState):
+    # Cheap local parse; bad commands never reach a browser
+    try:
+        state.update(await parse_intent(state["user_command"]))
+        state["intent_error"] = None
+    except IntentError as e:
+        state["intent_error"] = str(e)
+    return state
+
+
+async def rejected_node(state: AgentState):
+    print(f"\n⛔ Command rejected: {state['intent_error']}")
+    return state
+
+
+def route_after_parse(state: AgentState):
+    return "rejected" if state.get("intent_error") else "start"
 
 
 async def start_node(state: AgentState):
+    # Warm browser from the pool; every later node reuses it
+    state["browser"] = await pool.acquire(state.get("run_id"))
+    state["cdp_url"] = state["browser"].cdp_url
     return state
 
 
 async def open_site_node(state: AgentState):
     print("\n🌐 Opening Dummy Bank website...")
-    await open_site_only()
+    await open_site_only(_browser(state))
+    state["logged_in"] = await vault.restore(state["browser"], state.get("user"))
+    await _remember_page(state)
+    if state["logged_in"]:
+        print("🔓 Saved login restored; skipping manual login.")
     return state
 
 
+def route_after_open(state: AgentState):
+    return "pay" if state.get("logged_in") else "login"
+
+
 async def manual_login_node(state: AgentState):
     print("\n🔐 Please log in MANUALLY in the browser.")
     print("👉 After login, press ENTER here.")
-    input()
+    while True:
+        await checkpoints.wait(state["run_id"], "login")
+        try:
+            state["logged_in"] = await vault.capture(_browser(state), state.get("user"))
+            break
+        except WrongAccount as e:
+            # Paying from someone else's account is worse than asking again
+            print(f"⚠️  {e}. Log in as {state['user']} and press ENTER again.")
+            await vault.clear(_browser(state))
+    await _remember_page(state)
     return state
 
 
 async def payment_node(state: AgentState):
+    if state.get("pay_mode") == "api" and state["category"] == "TRANSFER":
+        try:
+            await pay_via_api(_browser(state), state["recipient"], state["amount"])
+            await _remember_page(state)
+            return state
+        except FastPathUnavailable as e:
+            print(f"↩️  API fast path unavailable ({e}); driving the UI.")
+
     print("\n💸 Initiating payment flow...")
     await wait_for_dashboard_and_pay(
+        _browser(state),
         name=state["recipient"],
-        amount=state["amount"]
+        amount=state["amount"],
+        category=state["category"],
+        mobile=state.get("mobile"),
+        consumer_number=state.get("consumer_number"),
     )
+    await _remember_page(state)
     return state
 
 
@@ -141,31 +210,43 @@ async def pin_node(state: AgentState):
     print("\n🛑 PIN screen reached.")
     print("👉 Enter PIN manually in browser.")
     print("👉 Press ENTER here after confirmation.")
-    input()
+    await checkpoints.wait(state["run_id"], "pin")
     return state
 
 
 async def done_node(state: AgentState):
     print("\n✅ Payment flow completed safely.")
+    # Park the browser (and the human's login) for the next command
+    await pool.release(_browser(state))
+    state["browser"] = None
     return state
 
 
-def build_graph():
+def build_graph(checkpointer=None):
+    # LangGraph is only needed once a graph is actually built
+    from langgraph.graph import END, StateGraph
+
     graph = StateGraph(AgentState)
 
-    graph.add_node("start", start_node)
-    graph.add_node("open_site", open_site_node)
-    graph.add_node("login", manual_login_node)
-    graph.add_node("pay", payment_node)
-    graph.add_node("pin", pin_node)
-    graph.add_node("done", done_node)
+    # Every node is a span; human waits inside login/pin are child spans
+    graph.add_node("parse", traced("parse", parse_node))
+    graph.add_node("rejected", traced("rejected", rejected_node))
+    graph.add_node("start", traced("start", start_node))
+    graph.add_node("open_site", traced("open_site", open_site_node))
+    graph.add_node("login", traced("login", manual_login_node))
+    graph.add_node("pay", traced("pay", payment_node))
+    graph.add_node("pin", traced("pin", pin_node))
+    graph.add_node("done", traced("done", done_node))
 
-    graph.set_entry_point("start")
+    graph.set_entry_point("parse")
 
+    graph.add_conditional_edges("parse", route_after_parse, ["start", "rejected"])
+    graph.add_edge("rejected", END)
     graph.add_edge("start", "open_site")
-    graph.add_edge("open_site", "login")
+    graph.add_conditional_edges("open_site", route_after_open, ["login", "pay"])
     graph.add_edge("login", "pay")
     graph.add_edge("pay", "pin")
     graph.add_edge("pin", "done")
 
-    return graph.compile()
+    # checkpointer: see checkpointing.py (None = in-memory only)
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,35 @@
+"""
+Modules shared by finagent/ and finagent-2/: span tracing, the LLM
+decision cache, step budgets and the session vault.
+
+Each app reads its settings from its own environment prefix (finagent:
+FINAGENT_*, finagent-2: HITL_*) and keeps its files next to its own
+code. An app configures them once, in a thin module of the same name:
+
+    # finagent-2/llm_cache.py
+    from common_env import env
+    from finagent_common.llm_cache import DecisionCache
+    decision_cache = DecisionCache.from_env(env)   # HITL_LLM_CACHE_DIR, ...
+"""
+import os
+from pathlib import Path
+from typing import Optional
+
+
+class Env:
+    """An app's view of the environment: `prefix`_NAME variables, files under `home`."""
+
+    def __init__(self, prefix: str, home: Path):
+        self.prefix = prefix
+        self.home = Path(home)
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return os.getenv(f"{self.prefix}_{name}", default)
+
+    def path(self, name: str, filename: str) -> str:
+        """`prefix`_NAME, defaulting to `filename` in the app's directory ("" turns it off)."""
+        return self.get(name, str(self.home / filename))
+
+    @property
+    def metric_prefix(self) -> str:
+        return self.prefix.lower()
@@ -0,0 +1,226 @@
+"""
+On-disk cache of agent decisions, wrapped around the chat model.
+
+    llm = CachedLLM(ChatBrowserUse(), decision_cache, tracer)
+    agent = Agent(task=task, browser=browser, llm=llm)
+    llm.watch(agent)
+
+Every agent step asks the model for the next actions given the task and
+the page. When the same task meets the same page after the same earlier
+steps as in a previous run (dashboard, Pay screen, ...), the recorded
+AgentOutput comes back from disk in milliseconds instead of seconds.
+
+The key is a sha256 over
+
+  * the model and its system prompt (a new action schema = new keys),
+  * the task (<user_request>: the rendered prompt template),
+  * the page (<browser_state>) minus per-session noise such as tab ids
+    and recent events; element indexes stay, actions refer to them,
+  * this agent's step chain: page + actions of every earlier step.
+
+The model's free-text history (memory, evaluation) is left out: it
+differs between runs even when the decisions don't.
+
+When a step ends in an error (including a ProgressMonitor nudge), the
+decision that led to it is evicted and that step goes to the model.
+Entries are JSON files in <PREFIX>_LLM_CACHE_DIR (default .llm_cache in
+the app's directory, empty = off), evicted least recently used first
+beyond <PREFIX>_LLM_CACHE_MB.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
+
+from finagent_common import Env
+from finagent_common.tracing import Tracer
+
+if TYPE_CHECKING:
+    from browser_use import Agent
+
+# Parts of <browser_state> that change between sessions, not between pages
+_NOISE = [
+    re.compile(r"^Current tab: \w+$", re.MULTILINE),
+    re.compile(r"^Tab \w{4}: ", re.MULTILINE),
+    re.compile(r"^Recent browser events: .*$", re.MULTILINE),
+]
+
+
+def _section(text: str, tag: str) -> str:
+    start = text.find(f"<{tag}>")
+    end = text.find(f"</{tag}>", start)
+    return text[start + len(tag) + 2:end] if start != -1 and end != -1 else ""
+
+
+def page_key(state_text: str) -> str:
+    page = _section(state_text, "browser_state")
+    for pattern in _NOISE:
+        page = pattern.sub("", page)
+    return hashlib.sha256(" ".join(page.split()).encode()).hexdigest()
+
+
+def _hash(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class DecisionCache:
+    def __init__(self, root: Optional[str], max_mb: float = 64):
+        self.root = Path(root) if root else None
+        self.max_bytes = int(max_mb * 2**20)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._sizes: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_env(cls, env: Env) -> "DecisionCache":
+        return cls(env.path("LLM_CACHE_DIR", ".llm_cache"), float(env.get("LLM_CACHE_MB", "64")))
+
+    @property
+    def enabled(self) -> bool:
+        return self.root is not None and self.max_bytes > 0
+
+    def _index(self) -> Dict[str, int]:
+        # Sizes of what's on disk, scanned once per process
+        if self._sizes is None:
+            self._sizes = {}
+            if self.root.exists():
+                for path in self.root.glob("*.json"):
+                    self._sizes[path.stem] = path.stat().st_size
+        return self._sizes
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self.root / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)  # mtime = last use, for LRU eviction
+        self.hits += 1
+        return entry["output"]
+
+    def put(self, key: str, output: dict, **meta):
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"output": output, "stored_at": time.time(), **meta})
+        path = self.root / f"{key}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(data, encoding="utf-8")
+        tmp.replace(path)
+
+        sizes = self._index()
+        sizes[key] = len(data.encode())
+        if sum(sizes.values()) > self.max_bytes:
+            self._evict_lru()
+
+    def _evict_lru(self):
+        sizes = self._index()
+        total = sum(sizes.values())
+        by_age = sorted(self.root.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        # Down to 90% so a full cache doesn't evict on every put
+        for path in by_age:
+            if total <= self.max_bytes * 0.9:
+                break
+            total -= sizes.pop(path.stem, 0)
+            path.unlink(missing_ok=True)
+
+    def evict(self, key: str):
+        (self.root / f"{key}.json").unlink(missing_ok=True)
+        self._index().pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(self._index()) if self.enabled else 0,
+            "bytes": sum(self._index().values()) if self.enabled else 0,
+        }
+
+
+class CachedLLM:
+    """
+    browser_use chat model that answers agent steps from a DecisionCache.
+    One per Agent: it tracks that agent's step chain.
+    """
+
+    def __init__(self, inner, cache: DecisionCache, tracer: Tracer):
+        self.inner = inner
+        self.cache = cache
+        self.tracer = tracer
+        self._agent: Optional[Agent] = None
+        self._chain = ""
+        self._last_key: Optional[str] = None
+
+    # ---- BaseChatModel protocol ------------------------------------------
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    @property
+    def provider(self) -> str:
+        return self.inner.provider
+
+    @property
+    def name(self) -> str:
+        return self.inner.name
+
+    @property
+    def model_name(self) -> str:
+        return self.inner.model
+
+    @property
+    def _verified_api_keys(self) -> bool:
+        return getattr(self.inner, "_verified_api_keys", False)
+
+    @_verified_api_keys.setter
+    def _verified_api_keys(self, value: bool):
+        self.inner._verified_api_keys = value
+
+    def watch(self, agent: Agent):
+        """Let the cache see step results, to drop decisions that failed."""
+        self._agent = agent
+
+    def _last_step_failed(self) -> bool:
+        results = self._agent.state.last_result if self._agent is not None else None
+        return any(r.error for r in results or [])
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        # Only agent steps (structured AgentOutput) are cached
+        if output_format is None or not self.cache.enabled:
+            return await self.inner.ainvoke(messages, output_format, **kwargs)
+
+        state = messages[-1].text
+        page = page_key(state)
+        key = _hash(self.model, messages[0].text, _section(state, "user_request"), page, self._chain)
+
+        output = None
+        if self._last_step_failed():
+            if self._last_key:
+                self.cache.evict(self._last_key)
+            self.cache.bypassed += 1
+        else:
+            output = self.cache.get(key)
+
+        if output is not None:
+            from browser_use.llm.views import ChatInvokeCompletion
+
+            with self.tracer.span("llm_cache_hit"):
+                response = ChatInvokeCompletion(completion=output_format.model_validate(output), usage=None)
+        else:
+            with self.tracer.span("llm_call", model=self.model):
+                response = await self.inner.ainvoke(messages, output_format, **kwargs)
+            output = response.completion.model_dump(mode="json", exclude_none=True)
+            self.cache.put(key, output, model=self.model)
+
+        self._chain = _hash(self._chain, page, json.dumps(output.get("action", []), sort_keys=True))
+        self._last_key = key
+        return response
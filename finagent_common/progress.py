@@ -0,0 +1,142 @@
+"""
+Step budgets and loop detection for browser_use agents.
+
+    monitor = ProgressMonitor(policy_for("TRANSFER"))
+    history = await agent.run(max_steps=monitor.policy.hard, on_step_end=monitor.on_step_end)
+    monitor.raise_if_stopped()
+
+After every step the monitor fingerprints (url, title) and the actions
+the model just took. A step makes progress if it reaches a page state
+we haven't seen, or tries something new on a known one. The agent is
+stuck when
+
+  * the same (page, actions) pair comes round max_repeats times (cycles,
+    including A-B-A-B), or
+  * max_stall steps in a row make no progress.
+
+The first time, the agent gets a hint to change approach; the second
+time it is stopped. Past the soft budget (policy.steps) any step without
+progress stops it; policy.hard is the max_steps handed to agent.run().
+
+Budgets per task category are DEFAULT_POLICIES, overridden per app by
+<PREFIX>_STEP_POLICY (see load_policies).
+"""
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from finagent_common import Env
+
+
+class StepPolicy:
+    def __init__(self, steps: int, hard: Optional[int] = None, max_repeats: int = 3, max_stall: int = 5):
+        self.steps = steps
+        self.hard = hard or steps
+        self.max_repeats = max_repeats
+        self.max_stall = max_stall
+
+    def public(self) -> dict:
+        return {"steps": self.steps, "hard": self.hard, "max_repeats": self.max_repeats, "max_stall": self.max_stall}
+
+
+# Per task category. OPEN is the "just open the site" agent.
+DEFAULT_POLICIES: Dict[str, StepPolicy] = {
+    "OPEN": StepPolicy(3, 5, max_repeats=2, max_stall=2),
+    "TRANSFER": StepPolicy(10, 18),
+    "RECHARGE": StepPolicy(10, 18),
+    "BILL": StepPolicy(10, 18),
+    "GOLD": StepPolicy(8, 14),
+    "DEFAULT": StepPolicy(25),
+}
+
+
+def load_policies(env: Env) -> Dict[str, StepPolicy]:
+    """DEFAULT_POLICIES with the app's <PREFIX>_STEP_POLICY overrides applied."""
+    # e.g. FINAGENT_STEP_POLICY='{"TRANSFER": {"steps": 14, "hard": 24}}'
+    policies = dict(DEFAULT_POLICIES)
+    raw = env.get("STEP_POLICY")
+    if not raw:
+        return policies
+    for category, fields in json.loads(raw).items():
+        base = policies.get(category.upper(), policies["DEFAULT"]).public()
+        policies[category.upper()] = StepPolicy(**{**base, **fields})
+    return policies
+
+
+def policy_for(category: Optional[str], policies: Dict[str, StepPolicy] = DEFAULT_POLICIES) -> StepPolicy:
+    return policies.get((category or "").upper(), policies["DEFAULT"])
+
+
+class AgentStuck(RuntimeError):
+    """The agent was stopped early for looping or not making progress."""
+
+
+def _key(*parts: str) -> str:
+    return hashlib.sha1("\x1f".join(parts).encode()).hexdigest()[:16]
+
+
+class ProgressMonitor:
+    def __init__(self, policy: StepPolicy):
+        self.policy = policy
+        self.steps = 0
+        self.stall = 0
+        self.replanned = False
+        self.stop_reason: Optional[str] = None
+        self._states: Set[str] = set()
+        self._pairs: Counter = Counter()
+
+    def observe(self, url: str, title: str, actions: List[str], failed: bool = False) -> Optional[str]:
+        """
+        Record one finished step. Returns None to carry on, "replan" to
+        nudge the agent, or "stop" (with stop_reason set).
+        """
+        self.steps += 1
+        state = _key(url, title)
+        pair = _key(state, *actions)
+        self._pairs[pair] += 1
+
+        progress = not failed and (state not in self._states or self._pairs[pair] == 1)
+        self._states.add(state)
+        self.stall = 0 if progress else self.stall + 1
+
+        problem = None
+        if self._pairs[pair] >= self.policy.max_repeats:
+            problem = f"repeated the same actions on {url} {self._pairs[pair]} times"
+        elif self.stall >= self.policy.max_stall:
+            problem = f"no progress for {self.stall} steps (last page {url})"
+        elif self.steps >= self.policy.steps and not progress:
+            problem = f"step budget of {self.policy.steps} used up without progress"
+            self.replanned = True  # past the soft budget there is no second chance
+
+        if problem is None:
+            return None
+        if not self.replanned:
+            self.replanned = True
+            self.stall = 0
+            return "replan"
+        self.stop_reason = problem
+        return "stop"
+
+    async def on_step_end(self, agent):
+        item = agent.history.history[-1]
+        actions = []
+        if item.model_output:
+            actions = [json.dumps(a.model_dump(exclude_none=True), sort_keys=True) for a in item.model_output.action]
+        failed = any(r.error for r in item.result)
+
+        verdict = self.observe(item.state.url or "", item.state.title or "", actions, failed)
+        if verdict == "replan":
+            from browser_use.agent.views import ActionResult
+
+            # Shown to the model with the next state as a result of this step
+            agent.state.last_result = (agent.state.last_result or []) + [
+                ActionResult(error="You are going in circles: the last steps did not change the page. "
+                                   "Try a different element or approach, or call done if the goal is reached.")
+            ]
+        elif verdict == "stop":
+            agent.stop()
+
+    def raise_if_stopped(self):
+        if self.stop_reason:
+            raise AgentStuck(f"Agent stopped after {self.steps} steps: {self.stop_reason}")
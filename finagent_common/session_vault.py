@@ -0,0 +1,283 @@
+"""
+Encrypted per-user vault of the Dummy Bank login, so the human logs in
+once and later runs (and fresh browsers) skip the manual login step.
+
+    if not await vault.restore(browser, user):
+        ...human logs in...
+        await vault.capture(browser, user)
+
+What is stored is only what the browser holds after the human logged in:
+the site's cookies and the localStorage `token` (JWT) and `user` keys.
+Passwords and PINs are never seen, stored or typed.
+
+A browser only ever carries the login of the user it is restored for:
+when that user has no saved session, restore() logs a pooled browser out
+of whoever it was signed in as, so the human starts from the login page.
+capture() asks `whoami` (e.g. GET /auth/me) which account the token
+belongs to and refuses to file it under a different user.
+
+Each user's entry is one Fernet-encrypted file (cryptography) in
+<PREFIX>_VAULT_DIR (default ~/.<prefix>/vault), keyed with
+<PREFIX>_VAULT_KEY or, when that isn't set, a key generated once into
+<dir>/vault.key (mode 0600). Expiry is checked locally from the JWT's
+`exp` claim: no network round trip. A token that expires within
+<PREFIX>_VAULT_MARGIN seconds counts as expired and its entry is dropped.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+from finagent_common import Env
+
+if TYPE_CHECKING:
+    from browser_use import Browser
+
+VAULT_MARGIN = 300.0
+
+# localStorage keys the frontend keeps its session in
+_STORAGE_KEYS = ("token", "user")
+
+# Account fields a vault user name may be given as
+_ACCOUNT_FIELDS = ("email", "upiId", "name")
+
+
+class WrongAccount(RuntimeError):
+    """The browser is logged in, but not as the user being captured."""
+
+
+def token_expiry(token: Optional[str]) -> Optional[float]:
+    """`exp` of a JWT (not verified: only used to decide whether to try it)."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def token_valid(token: Optional[str], margin: float = VAULT_MARGIN) -> bool:
+    expires = token_expiry(token)
+    return expires is not None and expires - margin > time.time()
+
+
+def _write_private(directory: Path, data: bytes) -> Path:
+    """data in a new, uniquely named 0600 file in directory, flushed to disk."""
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return Path(tmp)
+
+
+async def _read_storage(browser: Browser) -> dict:
+    page = await browser.must_get_current_page()
+    keys = json.dumps(list(_STORAGE_KEYS))
+    raw = await page.evaluate(f"() => JSON.stringify(Object.fromEntries({keys}.map(k => [k, localStorage.getItem(k)])))")
+    return json.loads(raw or "{}")
+
+
+def account_matches(user: Optional[str], account: dict) -> bool:
+    """Whether account (a /auth/me body) is user; None (the default user) is anyone."""
+    if user is None:
+        return True
+    wanted = user.strip().lower()
+    return any(str(account.get(f) or "").strip().lower() == wanted for f in _ACCOUNT_FIELDS)
+
+
+class SessionVault:
+    def __init__(
+        self,
+        path: Path,
+        origin: str,
+        key: Optional[str] = None,
+        margin: float = VAULT_MARGIN,
+        default_user: str = "default",
+        whoami: Optional[Callable[[str], Awaitable[Optional[dict]]]] = None,
+    ):
+        self.path = Path(path)
+        self.origin = origin
+        self.margin = margin
+        self.default_user = default_user
+        # token -> the account it belongs to, None when that can't be told
+        self.whoami = whoami
+        self._key = key
+        self._cipher = None
+
+    @classmethod
+    def from_env(cls, env: Env, origin: str, whoami=None) -> "SessionVault":
+        default_dir = Path.home() / f".{env.prefix.lower()}" / "vault"
+        return cls(
+            Path(env.get("VAULT_DIR", str(default_dir))),
+            origin,
+            key=env.get("VAULT_KEY"),
+            margin=float(env.get("VAULT_MARGIN", str(VAULT_MARGIN))),
+            default_user=env.get("USER", "default"),
+            whoami=whoami,
+        )
+
+    def ensure_key(self) -> bytes:
+        """
+        The vault key, generating <dir>/vault.key if there is none yet.
+        Safe when several processes get here at once: each writes its key
+        to its own temp file and links it into place, so one of them wins
+        and the others read a complete key, never an empty or partial one.
+        """
+        if self._key:
+            return self._key.encode()
+        key_file = self.path / "vault.key"
+        if not key_file.exists():
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Same as Fernet.generate_key()
+            tmp = _write_private(self.path, base64.urlsafe_b64encode(os.urandom(32)))
+            try:
+                os.link(tmp, key_file)
+            except FileExistsError:
+                pass
+            finally:
+                tmp.unlink()
+        return key_file.read_bytes().strip()
+
+    def _fernet(self):
+        if self._cipher is None:
+            from cryptography.fernet import Fernet
+
+            self._cipher = Fernet(self.ensure_key())
+        return self._cipher
+
+    def _file(self, user: Optional[str]) -> Path:
+        return self.path / f"{hashlib.sha256((user or self.default_user).encode()).hexdigest()[:16]}.vault"
+
+    # ---- storage ---------------------------------------------------------
+
+    def load(self, user: Optional[str]) -> Optional[dict]:
+        """The user's saved session, or None when there is none or it has expired."""
+        file = self._file(user)
+        try:
+            data = file.read_bytes()
+        except FileNotFoundError:
+            return None
+        from cryptography.fernet import InvalidToken
+
+        try:
+            entry = json.loads(self._fernet().decrypt(data))
+        except (InvalidToken, ValueError):
+            print("🔐 Saved login can't be decrypted (key changed?); discarding it.")
+            file.unlink(missing_ok=True)
+            return None
+        if not token_valid(entry["local_storage"].get("token"), self.margin):
+            file.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def save(self, user: Optional[str], entry: dict):
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self._file(user)
+        # Own temp file per write: workers saving the same user never share one
+        tmp = _write_private(self.path, self._fernet().encrypt(json.dumps(entry).encode()))
+        try:
+            os.replace(tmp, file)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def forget(self, user: Optional[str]):
+        self._file(user).unlink(missing_ok=True)
+
+    # ---- browser ---------------------------------------------------------
+
+    async def _account(self, storage: dict) -> Optional[dict]:
+        if self.whoami is not None:
+            return await self.whoami(storage["token"])
+        # No account API: the frontend's own record of who logged in
+        try:
+            return json.loads(storage.get("user") or "null")
+        except ValueError:
+            return None
+
+    async def capture(self, browser: Browser, user: Optional[str]) -> bool:
+        """
+        Save the browser's current login for user. False when it isn't
+        logged in or its account can't be confirmed; WrongAccount when it
+        is someone else's.
+        """
+        storage = await _read_storage(browser)
+        if not token_valid(storage.get("token"), self.margin):
+            return False
+        account = await self._account(storage)
+        if not account:
+            print("🔐 Can't tell which account is logged in; login not saved.")
+            return False
+        if not account_matches(user, account):
+            who = account.get("email") or account.get("name") or "another account"
+            raise WrongAccount(f"The browser is logged in as {who}, not {user}")
+
+        host = urlsplit(self.origin).hostname or ""
+        state = await browser.export_storage_state()
+        cookies = [c for c in state["cookies"] if c["domain"].lstrip(".") == host]
+
+        self.save(user, {
+            "origin": self.origin,
+            "account": {f: account.get(f) for f in _ACCOUNT_FIELDS},
+            "cookies": cookies,
+            "local_storage": {k: v for k, v in storage.items() if v is not None},
+            "expires": token_expiry(storage["token"]),
+            "captured_at": time.time(),
+        })
+        print("🔐 Login saved to the session vault.")
+        return True
+
+    async def restore(self, browser: Browser, user: Optional[str]) -> bool:
+        """
+        Make browser logged in as user without the human: True when it
+        already is, or the saved session was injected; False means the
+        human has to log in, and the browser is then logged out. A pooled
+        browser holding someone else's session is always cleared first.
+        """
+        entry = self.load(user)
+
+        page = await browser.must_get_current_page()
+        if not (await browser.get_current_page_url()).startswith(self.origin):
+            await page.goto(self.origin)
+        current = (await _read_storage(browser)).get("token")
+        if entry is not None and current == entry["local_storage"]["token"]:
+            # Warm browser from the pool, already logged in as this user
+            return True
+        if current:
+            await self.clear(browser)
+        if entry is None:
+            return False
+
+        if entry["cookies"]:
+            cdp = await browser.get_or_create_cdp_session()
+            await cdp.cdp_client.send.Storage.setCookies(
+                params={"cookies": entry["cookies"]}, session_id=cdp.session_id
+            )
+        items = json.dumps(entry["local_storage"])
+        await page.evaluate(f"() => {{ for (const [k, v] of Object.entries({items})) localStorage.setItem(k, v); }}")
+        # The SPA reads its session from localStorage on boot
+        await page.goto(self.origin)
+        return True
+
+    async def clear(self, browser: Browser):
+        """Log browser out of the site: drop its cookies and localStorage, reload."""
+        parts = urlsplit(self.origin)
+        cdp = await browser.get_or_create_cdp_session()
+        await cdp.cdp_client.send.Storage.clearDataForOrigin(
+            params={"origin": f"{parts.scheme}://{parts.netloc}", "storageTypes": "cookies,local_storage"},
+            session_id=cdp.session_id,
+        )
+        page = await browser.must_get_current_page()
+        await page.goto(self.origin)
@@ -0,0 +1,201 @@
+"""
+Lightweight span tracing for runs.
+
+    with tracer.span("pay", run_id=run_id):
+        ...
+    with tracer.span("human_wait", kind="human", checkpoint="pin"):
+        ...
+
+Spans nest through a contextvar, so anything awaited inside a span (and
+tasks created from it) becomes its child. Every finished span is
+
+  * appended to a JSONL file, one OpenTelemetry-shaped span per line
+    (traceId/spanId/parentSpanId/startTimeUnixNano/...), <PREFIX>_TRACE_FILE
+    (default traces.jsonl in the app's directory), empty to disable;
+  * added to an in-memory histogram per (span name, kind) that
+    prometheus() renders for a /metrics endpoint.
+
+kind="human" marks time spent waiting on a person; run_summary() splits
+each run's wall time into human and machine seconds.
+"""
+import contextvars
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from finagent_common import Env
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, float("inf"))
+
+
+class Span:
+    __slots__ = ("name", "kind", "run_id", "trace_id", "span_id", "parent_id", "attrs", "start", "start_ns")
+
+    def __init__(self, name: str, kind: str, run_id: Optional[str], parent: "Optional[Span]", attrs: dict):
+        self.name = name
+        self.kind = kind
+        self.run_id = run_id or (parent.run_id if parent else None)
+        self.trace_id = parent.trace_id if parent else _trace_id(self.run_id)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+
+
+def _trace_id(run_id: Optional[str]) -> str:
+    # Same run -> same trace, even across separate top-level spans
+    if run_id:
+        return hashlib.md5(run_id.encode()).hexdigest()
+    return uuid.uuid4().hex
+
+
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                self.counts[i] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+
+class Tracer:
+    def __init__(self, path: Optional[str] = None, max_runs: int = 1000, metric_prefix: str = "finagent"):
+        self.path = path
+        self.max_runs = max_runs
+        self.metric_prefix = metric_prefix
+        self.histograms: Dict[Tuple[str, str], _Histogram] = {}
+        # run_id -> {"total_s", "human_s", "spans": {name: seconds}}, oldest first
+        self.runs: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def from_env(cls, env: Env) -> "Tracer":
+        return cls(env.path("TRACE_FILE", "traces.jsonl"), metric_prefix=env.metric_prefix)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "machine", run_id: Optional[str] = None, **attrs):
+        span = Span(name, kind, run_id, _current.get(), attrs)
+        token = _current.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            self._finish(span, time.perf_counter() - span.start, error)
+
+    def _finish(self, span: Span, seconds: float, error: Optional[BaseException]):
+        with self._lock:
+            hist = self.histograms.get((span.name, span.kind))
+            if hist is None:
+                hist = self.histograms[(span.name, span.kind)] = _Histogram()
+            hist.observe(seconds)
+
+            if span.run_id:
+                summary = self.runs.get(span.run_id)
+                if summary is None:
+                    summary = self.runs[span.run_id] = {"total_s": 0.0, "human_s": 0.0, "spans": {}}
+                    while len(self.runs) > self.max_runs:
+                        self.runs.popitem(last=False)
+                if span.parent_id is None:
+                    summary["total_s"] += seconds
+                if span.kind == "human":
+                    summary["human_s"] += seconds
+                summary["spans"][span.name] = summary["spans"].get(span.name, 0.0) + seconds
+
+            if self.path:
+                self._write(span, seconds, error)
+
+    def _write(self, span: Span, seconds: float, error: Optional[BaseException]):
+        record = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id,
+            "name": span.name,
+            "startTimeUnixNano": span.start_ns,
+            "endTimeUnixNano": span.start_ns + int(seconds * 1e9),
+            "attributes": {"run_id": span.run_id, "kind": span.kind, **span.attrs},
+            "status": {"code": "ERROR", "message": repr(error)} if error else {"code": "OK"},
+        }
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def run_summary(self, run_id: str) -> Optional[dict]:
+        summary = self.runs.get(run_id)
+        if summary is None:
+            return None
+        return {
+            "total_s": round(summary["total_s"], 3),
+            "human_s": round(summary["human_s"], 3),
+            "machine_s": round(max(0.0, summary["total_s"] - summary["human_s"]), 3),
+            "spans": {k: round(v, 3) for k, v in summary["spans"].items()},
+        }
+
+    def export(self) -> dict:
+        """The span histograms as plain data, for merge() in another process."""
+        with self._lock:
+            return {key: (list(h.counts), h.sum, h.count, h.max) for key, h in self.histograms.items()}
+
+    def merge(self, exported: dict):
+        """Add another tracer's export() into this one's histograms."""
+        with self._lock:
+            for key, (counts, total, count, peak) in exported.items():
+                hist = self.histograms.get(key)
+                if hist is None:
+                    hist = self.histograms[key] = _Histogram()
+                hist.counts = [a + b for a, b in zip(hist.counts, counts)]
+                hist.sum += total
+                hist.count += count
+                hist.max = max(hist.max, peak)
+
+    def prometheus(self, prefix: Optional[str] = None) -> str:
+        """Prometheus text exposition of the span histograms."""
+        prefix = prefix or self.metric_prefix
+        metric = f"{prefix}_span_seconds"
+        lines = [f"# HELP {metric} Span duration by name and kind (human = waiting on a person).",
+                 f"# TYPE {metric} histogram"]
+        with self._lock:
+            for (name, kind), hist in sorted(self.histograms.items()):
+                labels = f'name="{name}",kind="{kind}"'
+                cumulative = 0
+                for le, n in zip(BUCKETS, hist.counts):
+                    cumulative += n
+                    le_s = "+Inf" if le == float("inf") else repr(le)
+                    lines.append(f'{metric}_bucket{{{labels},le="{le_s}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+            lines.append(f"# TYPE {prefix}_span_max_seconds gauge")
+            for (name, kind), hist in sorted(self.histograms.items()):
+                lines.append(f'{prefix}_span_max_seconds{{name="{name}",kind="{kind}"}} {hist.max:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+